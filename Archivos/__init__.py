@@ -0,0 +1,35 @@
+'''
+Simulación de barredoras automatizadas (paquete `bot_cleaners`).
+
+Los nombres del paquete se importan bajo demanda: `import bot_cleaners` no carga el modelo ni NumPy, y fuera de
+`server.py` nada carga Mesa.
+
+Uso:
+    from bot_cleaners import Habitacion
+    python -m bot_cleaners run --tamano 50x50 --agentes 10
+'''
+
+import importlib
+
+# Nombre exportado -> módulo que lo define
+_EXPORTADOS = {
+    "Habitacion": "model",
+    "RobotLimpieza": "model",
+    "get_sucias": "model",
+    "HabitacionFragmentada": "fragmentos",
+    "guardar_checkpoint": "checkpoint",
+    "cargar_checkpoint": "checkpoint",
+    "bifurcar": "checkpoint",
+}
+
+__all__ = list(_EXPORTADOS)
+
+
+def __getattr__(nombre):
+    modulo = _EXPORTADOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nombre)
+    # Se guarda en el paquete para no volver a pasar por aquí
+    globals()[nombre] = valor
+    return valor
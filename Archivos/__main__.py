@@ -0,0 +1,123 @@
+'''
+Punto de entrada del paquete: `python -m bot_cleaners <subcomando>` (o `bot-cleaners <subcomando>` ya instalado).
+
+Subcomandos:
+    run    Corre una simulación sin interfaz y escribe el resultado como una línea JSON
+    serve  Abre la visualización de Mesa en el navegador
+    bench  Benchmarks reproducibles (acepta los mismos argumentos que `python -m bot_cleaners.bench`)
+
+Cada subcomando importa sus módulos solo al ejecutarse: `run` nunca carga Mesa ni la visualización, así que una
+corrida corta arranca en lo que tarda en cargarse NumPy.
+
+Uso:
+    python -m bot_cleaners run --tamano 50x50 --agentes 10 --semilla 1
+    python -m bot_cleaners run --tamano 100x100 --suciedad Poisson --max-pasos 2000 --calentamiento 500
+    python -m bot_cleaners serve --puerto 8521
+    python -m bot_cleaners bench --tamanos 20x20 100x100 --agentes 2 10
+'''
+
+import argparse
+import json
+
+
+# ✓ Función que corre una simulación sin interfaz y escribe su resultado
+def correr(args): # argumentos del subcomando run
+    from .batch import leer_tamano
+    from .model import Habitacion
+
+    M, N = leer_tamano(args.tamano)
+    modelo = Habitacion(
+        M, N,
+        num_agentes = args.agentes,
+        porc_celdas_sucias = args.sucias,
+        porc_muebles = args.muebles,
+        modo_pos_inicial = args.modo_pos,
+        estrategia = args.estrategia,
+        modo_asignacion = args.asignacion,
+        modo_cargadores = args.cargadores,
+        num_cargadores = args.num_cargadores,
+        modo_bateria = args.bateria,
+        margen_bateria = args.margen_bateria,
+        modo_suciedad = args.suciedad,
+        tasa_suciedad = args.tasa_suciedad,
+        calentamiento = args.calentamiento,
+        medir_metricas = args.metricas,
+        modo_vectorizado = args.vectorizado,
+        # Solo interesan las métricas finales: no se guardan fotografías de la grid
+        intervalos_recoleccion = {"Grid": 0},
+        ruta_eventos = args.eventos,
+        seed = args.semilla,
+    )
+
+    # Se avanza la simulación hasta que el salón esté limpio o se alcance el límite de pasos
+    while modelo.running and modelo.tiempo < args.max_pasos:
+        modelo.step()
+    modelo.finalizar()
+
+    resultado = {
+        "tiempo": modelo.tiempo,
+        "movimientos": modelo.movimientos,
+        "cantidad_recargas": modelo.cantidad_recargas,
+        "robots_varados": modelo.robots_varados,
+        "celdas_sucias": modelo.num_celdas_sucias,
+        "limpio": modelo.salon_limpio(),
+    }
+    if modelo.metricas is not None:
+        resultado["metricas"] = modelo.metricas.resumen()
+    print(json.dumps(resultado))
+
+
+# ✓ Función que abre la visualización de Mesa
+def servir(args): # argumentos del subcomando serve
+    from .server import server
+
+    server.port = args.puerto
+    server.launch(port = args.puerto, open_browser = not args.sin_navegador)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "bot_cleaners", description = "Simulación de barredoras automatizadas")
+    subcomandos = parser.add_subparsers(dest = "subcomando", required = True)
+
+    run = subcomandos.add_parser("run", help = "Corre una simulación sin interfaz")
+    run.add_argument("--tamano", default = "20x20", help = "Tamaño MxN de la habitación")
+    run.add_argument("--agentes", type = int, default = 5, help = "Número de robots")
+    run.add_argument("--sucias", type = float, default = 0.6, help = "Porcentaje de celdas sucias")
+    run.add_argument("--muebles", type = float, default = 0.1, help = "Porcentaje de muebles")
+    run.add_argument("--modo-pos", default = "Fija", choices = ["Fija", "Aleatoria"], help = "Posición inicial de los robots")
+    run.add_argument("--estrategia", default = "Aleatoria", choices = ["Aleatoria", "Frontera", "Boustrophedon"], help = "Estrategia de recorrido de los robots")
+    run.add_argument("--asignacion", default = "Voraz", choices = ["Voraz", "Subasta"], help = "Asignación de problemas a robots")
+    run.add_argument("--cargadores", default = "Fija", choices = ["Fija", "Automatica"], help = "Ubicación de los cargadores")
+    run.add_argument("--num-cargadores", type = int, default = 4, help = "Número de cargadores (ubicación automática)")
+    run.add_argument("--bateria", default = "Fijo", choices = ["Fijo", "Predictivo"], help = "Cuándo vuelven los robots a cargarse")
+    run.add_argument("--margen-bateria", type = int, default = 5, help = "Pasos de margen del modo de batería predictivo")
+    run.add_argument("--suciedad", default = "Ninguna", choices = ["Ninguna", "Poisson", "Focos"], help = "Llegada continua de suciedad")
+    run.add_argument("--tasa-suciedad", type = float, default = 0.001, help = "Celdas sucias nuevas por celda y por paso")
+    run.add_argument("--calentamiento", type = int, default = 0, help = "Pasos que no cuentan en las métricas de estado estable")
+    run.add_argument("--metricas", action = "store_true", help = "Medir las métricas de estado estable aunque no llegue suciedad")
+    run.add_argument("--vectorizado", action = "store_true", help = "Usar el paso vectorizado de la flota")
+    run.add_argument("--eventos", default = None, help = "Archivo binario de eventos (opcional)")
+    run.add_argument("--max-pasos", type = int, default = 10_000, help = "Límite de pasos")
+    run.add_argument("--semilla", type = int, default = None, help = "Semilla de la corrida")
+
+    serve = subcomandos.add_parser("serve", help = "Abre la visualización de Mesa en el navegador")
+    serve.add_argument("--puerto", type = int, default = 8521)
+    serve.add_argument("--sin-navegador", action = "store_true", help = "No abrir el navegador automáticamente")
+
+    # Los argumentos de bench se pasan tal cual a su propio parser
+    subcomandos.add_parser("bench", help = "Benchmarks reproducibles", add_help = False)
+
+    args, resto = parser.parse_known_args(argv)
+    if args.subcomando == "bench":
+        from .bench import main as bench
+        bench(resto)
+    elif resto:
+        parser.error(f"argumentos no reconocidos: {' '.join(resto)}")
+    elif args.subcomando == "run":
+        correr(args)
+    else:
+        servir(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+'''
+Asignación de problemas (solicitudes de ayuda) a los robots disponibles.
+
+`Habitacion.notificar_problema` le entrega a su asignador los problemas del paso. Hay dos asignadores:
+    - Voraz: recorre los problemas de mayor a menor gravedad y le da cada uno al robot libre más cercano (el
+      comportamiento original); los problemas que nadie atiende se descartan.
+    - Subasta: agrupa los problemas cercanos en uno solo (sumando su gravedad), descarta los que ya cubre un robot en
+      camino y resuelve el emparejamiento robot-problema de todo el paso a la vez con un algoritmo de subasta
+      (Bertsekas). Solo se consideran los `k` robots libres más cercanos a cada problema:
+      con muchos robots libres se buscan en el índice espacial y, con pocos, se miden de una vez todas las distancias
+      problema-robot; sin robots libres no se busca nada. Las asignaciones se conservan entre pasos: un robot no se
+      reasigna mientras su problema siga sucio, y si otro lo limpió antes, queda libre de nuevo. Los problemas sin
+      robot quedan pendientes para los siguientes pasos mientras sigan sucios.
+
+Uso:
+    modelo = Habitacion(50, 50, num_agentes = 20, modo_asignacion = "Subasta")
+'''
+
+from collections import deque
+
+import numpy as np
+
+from .eventos import AYUDA
+
+
+class AsignadorVoraz:
+    # Asignador base: reparte los problemas del paso entre los robots disponibles del índice espacial
+    def __init__(self, modelo):
+        self.modelo = modelo
+
+    # ✓ Función que le da un problema a un robot y, si lo acepta, registra el evento de asignación (devuelve si lo
+    # aceptó)
+    def entregar(self, robot, gravedad, pos): # asignador, robot, gravedad y posición del problema
+        # Al aceptarlo, el robot sale del índice espacial (pedir_ayuda lo actualiza)
+        if not robot.pedir_ayuda(pos):
+            # Lo rechazó porque ya estaba ocupado: su lugar en el índice se corrige según su estado real
+            self.modelo.indice_robots.actualizar(robot)
+            return False
+        if self.modelo.eventos is not None:
+            self.modelo.eventos.registrar(self.modelo.tiempo, AYUDA, robot.unique_id, pos, gravedad)
+        return True
+
+    # ✓ Función que le da cada problema, de mayor a menor gravedad, al robot libre más cercano (devuelve los que
+    # quedaron sin atender)
+    def asignar(self, problemas): # asignador, listado de problemas (gravedad, posición)
+        # Organiza los problemas por gravedad (cantidad de celdas sucias) de mayor a menor
+        problemas = sorted(problemas, key = lambda problema: problema[0], reverse = True)
+
+        # Por cada problema en la lista de problemas
+        for i, problema in enumerate(problemas):
+            # Busca en el índice espacial el robot disponible más cercano al problema (el siguiente si lo rechaza)
+            while True:
+                robot = self.modelo.indice_robots.mas_cercano(problema[1])
+                # Si ya no hay robots disponibles, el resto de los problemas se descarta
+                if robot is None:
+                    return problemas[i:]
+                if self.entregar(robot, problema[0], problema[1]):
+                    break
+
+        return list()
+
+
+class AsignadorSubasta(AsignadorVoraz):
+    def __init__(self, modelo, radio_agrupacion: int = 2, candidatos: int = 4, peso_gravedad: float = 2.0,
+                 max_pendientes: int = None):
+        """
+        :param radio_agrupacion: Distancia (Chebyshev) a la que dos problemas se consideran el mismo
+        :param candidatos: Robots libres más cercanos que se consideran para cada problema
+        :param peso_gravedad: Distancia que vale cada celda sucia de gravedad (prioriza los problemas graves)
+        :param max_pendientes: Problemas sin robot que se conservan para los siguientes pasos (los más graves)
+        """
+        super().__init__(modelo)
+        self.radio_agrupacion = radio_agrupacion
+        self.candidatos = candidatos
+        self.peso_gravedad = peso_gravedad
+        self.max_pendientes = max_pendientes or 4 * modelo.num_agentes
+        # Beneficio base de cualquier asignación (mayor que la distancia máxima: atender siempre conviene)
+        M, N = modelo.capa_suciedad.shape
+        self.beneficio_base = float(M + N)
+        # Asignaciones vigentes (robot -> (gravedad, posición)) y problemas sin robot de pasos anteriores
+        self.asignaciones = dict()
+        self.pendientes = list()
+
+    # ✓ Función que indica qué problemas siguen sucios (la celda misma o alguna de sus vecinas)
+    def siguen_sucios(self, posiciones): # asignador, listado de posiciones
+        if not posiciones:
+            return np.zeros(0, dtype = bool)
+        modelo = self.modelo
+        N = modelo.grid.height
+        planas = np.fromiter((x * N + y for x, y in posiciones), dtype = np.int64, count = len(posiciones))
+        celdas = np.concatenate([planas[:, None], modelo.tabla_vecinos[planas]], axis = 1)
+        return ((celdas >= 0) & (modelo.capa_suciedad.ravel()[np.maximum(celdas, 0)] == 1)).any(axis = 1)
+
+    # ✓ Función que revisa las asignaciones vigentes: descarta las terminadas y libera a los robots de las ya limpias
+    def revisar_asignaciones(self): # asignador
+        # El robot llegó, abandonó el problema (inalcanzable) o salió del modelo
+        self.asignaciones = {robot: problema for robot, problema in self.asignaciones.items()
+                             if robot.pos is not None and robot.objetivo == problema[1]}
+        robots = list(self.asignaciones)
+        sucios = self.siguen_sucios([self.asignaciones[robot][1] for robot in robots])
+        for robot, sucio in zip(robots, sucios):
+            if not sucio:
+                # Otro robot ya lo limpió: este queda disponible para el emparejamiento de este paso
+                del self.asignaciones[robot]
+                robot.objetivo = None
+                self.modelo.indice_robots.actualizar(robot)
+
+    # ✓ Función que agrupa los problemas cercanos y descarta los que ya cubre una asignación vigente
+    def agrupar(self, problemas): # asignador, listado de problemas (gravedad, posición)
+        radio = self.radio_agrupacion
+        desplazamientos = [(dx, dy) for dx in range(-radio, radio + 1) for dy in range(-radio, radio + 1)]
+        # Zona de cada centro: celda -> centro que la cubre (None si la cubre una asignación vigente)
+        zona = dict()
+        for _, (x, y) in self.asignaciones.values():
+            for dx, dy in desplazamientos:
+                zona[(x + dx, y + dy)] = None
+        # Centro de cada grupo -> gravedad acumulada (los más graves se vuelven centros primero)
+        grupos = dict()
+        for gravedad, pos in sorted(problemas, key = lambda problema: (-problema[0], problema[1])):
+            if pos not in zona:
+                grupos[pos] = gravedad
+                for dx, dy in desplazamientos:
+                    zona.setdefault((pos[0] + dx, pos[1] + dy), pos)
+            elif zona[pos] is not None:
+                grupos[zona[pos]] += gravedad
+        return [(gravedad, pos) for pos, gravedad in grupos.items()]
+
+    # ✓ Función que asigna los problemas del paso (más los pendientes) resolviendo una subasta
+    def asignar(self, problemas):
+        self.revisar_asignaciones()
+        grupos = self.agrupar(self.pendientes + list(problemas))
+        # Solo siguen en juego los grupos que aún tienen basura
+        grupos = [grupo for grupo, sucio in zip(grupos, self.siguen_sucios([grupo[1] for grupo in grupos])) if sucio]
+
+        # Candidatos de cada robot: los problemas para los que está entre los `k` libres más cercanos
+        indice = self.modelo.indice_robots
+        beneficios = dict()
+        cercanos = indice.k_mas_cercanos_lote([pos for _, pos in grupos], self.candidatos)
+        for j, ((gravedad, pos), robots_cercanos) in enumerate(zip(grupos, cercanos)):
+            for distancia, robot in robots_cercanos:
+                valor = self.beneficio_base + self.peso_gravedad * gravedad - distancia
+                beneficios.setdefault(robot, list()).append((j, valor))
+
+        robots = sorted(beneficios, key = lambda robot: robot.unique_id)
+        asignados = subasta([beneficios[robot] for robot in robots], len(grupos))
+
+        atendidos = set()
+        for robot, j in zip(robots, asignados):
+            if j is None:
+                continue
+            gravedad, pos = grupos[j]
+            # Si el robot lo rechaza, el problema queda pendiente para el siguiente paso
+            if self.entregar(robot, gravedad, pos):
+                self.asignaciones[robot] = (gravedad, pos)
+                atendidos.add(j)
+
+        sin_atender = [grupo for j, grupo in enumerate(grupos) if j not in atendidos]
+        self.pendientes = sorted(sin_atender, key = lambda grupo: -grupo[0])[:self.max_pendientes]
+        return sin_atender
+
+
+# ✓ Función que resuelve una asignación con subasta (cada persona puede quedarse sin objeto con beneficio 0)
+def subasta(beneficios, num_objetos: int, epsilon: float = 0.01): # beneficios (objeto, valor) de cada persona
+    """
+    Algoritmo de subasta de Bertsekas para el emparejamiento de máximo beneficio con candidatos dispersos.
+    :param beneficios: Para cada persona, la lista de sus objetos candidatos con su beneficio
+    :param num_objetos: Número de objetos
+    :param epsilon: Incremento mínimo de las pujas (la solución queda a lo más a n * epsilon del óptimo)
+    :return: Objeto asignado a cada persona (None si no le conviene ninguno)
+    """
+    # Una sola fase: con la opción de quedarse sin objeto, los precios de una fase con epsilon grande pueden quedar
+    # por encima de lo que vale cada objeto y, al conservarlos, en la siguiente fase ya nadie pujaría
+    precios = [0.0] * num_objetos
+    dueno = [None] * num_objetos
+    asignado = [None] * len(beneficios)
+    libres = deque(i for i, candidatos in enumerate(beneficios) if candidatos)
+    while libres:
+        i = libres.popleft()
+        # Mejor y segundo mejor valor neto; quedarse sin objeto siempre vale 0
+        mejor, primero, segundo = None, 0.0, 0.0
+        for j, valor in beneficios[i]:
+            neto = valor - precios[j]
+            if neto > primero:
+                mejor, primero, segundo = j, neto, primero
+            elif neto > segundo:
+                segundo = neto
+        if mejor is None:
+            continue
+        # La puja sube el precio lo suficiente para que el objeto siga siendo el mejor para la persona
+        precios[mejor] += primero - segundo + epsilon
+        anterior = dueno[mejor]
+        dueno[mejor] = i
+        asignado[i] = mejor
+        if anterior is not None:
+            asignado[anterior] = None
+            libres.append(anterior)
+    return asignado
+
+
+# Asignadores disponibles por nombre (las opciones del parámetro `modo_asignacion` del modelo)
+ASIGNADORES = {
+    "Voraz": AsignadorVoraz,
+    "Subasta": AsignadorSubasta,
+}
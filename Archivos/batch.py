@@ -0,0 +1,177 @@
+'''
+Ejecución por lotes (sin interfaz gráfica) de la simulación de barredoras.
+
+Barre combinaciones de parámetros de `Habitacion` sobre varias semillas, reparte las corridas entre todos los
+núcleos con un pool de procesos y va escribiendo el resultado final de cada corrida (tiempo, movimientos y
+recargas) en un archivo de resultados por columnas (Parquet si está disponible pyarrow, o CSV).
+
+Uso:
+    python -m bot_cleaners.batch --tamanos 20x20 50x50 --agentes 2 5 10 --semillas 20 --salida resultados.parquet
+'''
+
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .model import Habitacion
+
+# Columnas del archivo de resultados (parámetros de la corrida seguidos de sus métricas finales)
+COLUMNAS = [
+    "M", "N", "num_agentes", "porc_celdas_sucias", "porc_muebles", "modo_pos_inicial", "estrategia", "semilla",
+    "tiempo", "movimientos", "cantidad_recargas", "robots_varados", "limpio",
+]
+
+
+# ✓ Función que genera todas las combinaciones de parámetros a simular
+def generar_configuraciones(tamanos, num_agentes, porc_celdas_sucias, porc_muebles, modos_pos_inicial, semillas,
+                            estrategias = ("Aleatoria",)):
+    for (M, N), agentes, sucias, muebles, modo, estrategia, semilla in itertools.product(
+            tamanos, num_agentes, porc_celdas_sucias, porc_muebles, modos_pos_inicial, estrategias, semillas):
+        yield {
+            "M": M, "N": N,
+            "num_agentes": agentes,
+            "porc_celdas_sucias": sucias,
+            "porc_muebles": muebles,
+            "modo_pos_inicial": modo,
+            "estrategia": estrategia,
+            "semilla": semilla,
+        }
+
+
+# ✓ Función que ejecuta una corrida completa sin interfaz y devuelve sus métricas finales
+def ejecutar_corrida(configuracion, max_pasos = 10_000): # parámetros de la corrida, límite de pasos
+    modelo = Habitacion(
+        configuracion["M"], configuracion["N"],
+        num_agentes = configuracion["num_agentes"],
+        porc_celdas_sucias = configuracion["porc_celdas_sucias"],
+        porc_muebles = configuracion["porc_muebles"],
+        modo_pos_inicial = configuracion["modo_pos_inicial"],
+        estrategia = configuracion.get("estrategia", "Aleatoria"),
+        seed = configuracion["semilla"],
+        # Solo interesan las métricas finales: no se guardan fotografías de la grid
+        intervalos_recoleccion = {"Grid": 0},
+    )
+
+    # Se avanza la simulación hasta que el salón esté limpio o se alcance el límite de pasos
+    while modelo.running and modelo.tiempo < max_pasos:
+        modelo.step()
+
+    resultado = dict(configuracion)
+    resultado["tiempo"] = modelo.tiempo
+    resultado["movimientos"] = modelo.movimientos
+    resultado["cantidad_recargas"] = modelo.cantidad_recargas
+    resultado["robots_varados"] = modelo.robots_varados
+    resultado["limpio"] = modelo.salon_limpio()
+    return resultado
+
+
+class EscritorResultados:
+    # Escribe los resultados por lotes de filas; en Parquet cada lote es un row group, en CSV se agregan filas
+    def __init__(self, ruta: str, tamano_lote: int = 256):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.columnas = {columna: list() for columna in COLUMNAS}
+        self.num_filas = 0
+        self.formato = os.path.splitext(ruta)[1].lower()
+
+        if self.formato == ".parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError as error:
+                raise ImportError("Para escribir resultados en Parquet se necesita pyarrow; usa una salida .csv") from error
+            self._pa = pyarrow
+            self._escritor = None
+        elif self.formato == ".csv":
+            self._archivo = open(ruta, "w", newline = "")
+            self._escritor = csv.writer(self._archivo)
+            self._escritor.writerow(COLUMNAS)
+        else:
+            raise ValueError(f"Formato de resultados no soportado: '{self.formato}' (usa .parquet o .csv)")
+
+    # ✓ Función que agrega el resultado de una corrida y vacía el lote si ya está lleno
+    def agregar(self, resultado):
+        for columna in COLUMNAS:
+            self.columnas[columna].append(resultado[columna])
+        self.num_filas += 1
+        if self.num_filas >= self.tamano_lote:
+            self.vaciar()
+
+    # ✓ Función que escribe en disco el lote pendiente
+    def vaciar(self):
+        if self.num_filas == 0:
+            return
+
+        if self.formato == ".parquet":
+            tabla = self._pa.table(self.columnas)
+            if self._escritor is None:
+                self._escritor = self._pa.parquet.ParquetWriter(self.ruta, tabla.schema)
+            self._escritor.write_table(tabla)
+        else:
+            self._escritor.writerows(zip(*(self.columnas[columna] for columna in COLUMNAS)))
+            self._archivo.flush()
+
+        self.columnas = {columna: list() for columna in COLUMNAS}
+        self.num_filas = 0
+
+    # ✓ Función que vacía el último lote y cierra el archivo
+    def cerrar(self):
+        self.vaciar()
+        if self.formato == ".parquet":
+            if self._escritor is not None:
+                self._escritor.close()
+        else:
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+
+# ✓ Función que reparte las corridas entre procesos y guarda los resultados conforme terminan
+def ejecutar_barrido(configuraciones, ruta_salida, procesos = None, max_pasos = 10_000, tamano_lote = 256):
+    num_corridas = 0
+    with ProcessPoolExecutor(max_workers = procesos or os.cpu_count()) as pool, \
+            EscritorResultados(ruta_salida, tamano_lote) as escritor:
+        futuros = [pool.submit(ejecutar_corrida, configuracion, max_pasos) for configuracion in configuraciones]
+        # Los resultados se escriben en el orden en el que terminan las corridas
+        for futuro in as_completed(futuros):
+            escritor.agregar(futuro.result())
+            num_corridas += 1
+    return num_corridas
+
+
+# ✓ Función que convierte un tamaño con formato "MxN" a una tupla (M, N)
+def leer_tamano(texto):
+    M, _, N = texto.lower().partition("x")
+    return int(M), int(N or M)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Barrido de parámetros de la simulación de barredoras sin interfaz")
+    parser.add_argument("--tamanos", nargs = "+", type = leer_tamano, default = [(20, 20)], help = "Tamaños MxN de la habitación")
+    parser.add_argument("--agentes", nargs = "+", type = int, default = [5], help = "Número de robots")
+    parser.add_argument("--sucias", nargs = "+", type = float, default = [0.3], help = "Porcentaje de celdas sucias")
+    parser.add_argument("--muebles", nargs = "+", type = float, default = [0.1], help = "Porcentaje de muebles")
+    parser.add_argument("--modos", nargs = "+", default = ["Fija", "Aleatoria"], choices = ["Fija", "Aleatoria"], help = "Posición inicial de los robots")
+    parser.add_argument("--estrategias", nargs = "+", default = ["Aleatoria"], choices = ["Aleatoria", "Frontera", "Boustrophedon"], help = "Estrategias de recorrido de los robots")
+    parser.add_argument("--semillas", type = int, default = 10, help = "Número de semillas por combinación")
+    parser.add_argument("--semilla-inicial", type = int, default = 0, help = "Primera semilla del barrido")
+    parser.add_argument("--procesos", type = int, default = None, help = "Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--max-pasos", type = int, default = 10_000, help = "Límite de pasos por corrida")
+    parser.add_argument("--salida", default = "resultados.csv", help = "Archivo de resultados (.parquet o .csv)")
+    args = parser.parse_args(argv)
+
+    semillas = range(args.semilla_inicial, args.semilla_inicial + args.semillas)
+    configuraciones = generar_configuraciones(args.tamanos, args.agentes, args.sucias, args.muebles, args.modos, semillas,
+                                              args.estrategias)
+    num_corridas = ejecutar_barrido(configuraciones, args.salida, args.procesos, args.max_pasos)
+    print(f"{num_corridas} corridas guardadas en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
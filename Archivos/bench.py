@@ -0,0 +1,254 @@
+'''
+Benchmarks reproducibles de la simulación de barredoras.
+
+Construye `Habitacion` con una semilla fija sobre una matriz de tamaños, número de robots y porcentajes de
+suciedad y muebles. Cada configuración corre en un proceso nuevo (para que la memoria máxima sea solo suya) y se
+mide: tiempo de construcción, percentiles de la latencia de `step`, tiempo de `notificar_problema` y de `get_grid`,
+memoria máxima (RSS), memoria asignada por paso y pasos hasta limpiar.
+
+La memoria asignada por paso se mide con tracemalloc en unos pasos de calentamiento aparte (con el rastreo activo los
+pasos son más lentos, así que no se mezclan con las latencias): es el pico de memoria nueva durante cada paso. Los
+pasos hasta limpiar se cuentan al final, siguiendo la misma corrida sin medir cada paso hasta `--pasos-limpieza`.
+
+Los resultados se guardan en JSON junto con el commit de git, y se pueden comparar contra un archivo base para
+detectar regresiones entre commits.
+
+Uso:
+    python -m bot_cleaners.bench --tamanos 20x20 100x100 --agentes 2 10 --salida bench.json
+    python -m bot_cleaners.bench --tamanos 20x20 100x100 --agentes 2 10 --base bench.json --tolerancia 0.2
+'''
+
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import leer_tamano
+
+# Métricas que se comparan contra la base (todas son "menor es mejor")
+METRICAS_COMPARADAS = [
+    "construccion_s", "step_p50_ms", "step_p90_ms", "step_p99_ms",
+    "notificar_problema_ms", "get_grid_ms", "rss_max_mb", "asignado_por_paso_kb",
+]
+
+
+# ✓ Función que genera todas las configuraciones de la matriz de benchmarks
+def generar_configuraciones(tamanos, num_agentes, porc_celdas_sucias, porc_muebles, semilla, max_pasos, vectorizado,
+                            pasos_memoria = 10, pasos_limpieza = 5000):
+    for (M, N), agentes, sucias, muebles in itertools.product(tamanos, num_agentes, porc_celdas_sucias, porc_muebles):
+        yield {
+            "M": M, "N": N,
+            "num_agentes": agentes,
+            "porc_celdas_sucias": sucias,
+            "porc_muebles": muebles,
+            "semilla": semilla,
+            "max_pasos": max_pasos,
+            "vectorizado": vectorizado,
+            "pasos_memoria": pasos_memoria,
+            "pasos_limpieza": pasos_limpieza,
+        }
+
+
+# ✓ Función que identifica una configuración (para emparejarla con la base)
+def clave_configuracion(configuracion):
+    return (f"{configuracion['M']}x{configuracion['N']}-a{configuracion['num_agentes']}"
+            f"-s{configuracion['porc_celdas_sucias']}-m{configuracion['porc_muebles']}"
+            f"-{'vec' if configuracion['vectorizado'] else 'mesa'}")
+
+
+# ✓ Función que devuelve los percentiles de una lista de tiempos (en milisegundos)
+def percentiles(tiempos_ns):
+    if not tiempos_ns:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    ms = np.asarray(tiempos_ns, dtype = np.float64) / 1e6
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(ms.max())}
+
+
+# ✓ Función que da formato a una métrica para el resumen en pantalla ("n/a" si no se midió)
+def formatear(valor, formato = ".3f"): # valor de la métrica (o None), especificación de formato
+    return "n/a" if valor is None else format(valor, formato)
+
+
+# ✓ Función que mide una configuración (se ejecuta en un proceso propio)
+def medir_configuracion(configuracion, repeticiones_grid = 5): # parámetros, veces que se mide get_grid
+    from .model import Habitacion, get_grid
+
+    gc.collect()
+    inicio = time.perf_counter()
+    modelo = Habitacion(
+        configuracion["M"], configuracion["N"],
+        num_agentes = configuracion["num_agentes"],
+        porc_celdas_sucias = configuracion["porc_celdas_sucias"],
+        porc_muebles = configuracion["porc_muebles"],
+        modo_pos_inicial = "Aleatoria",
+        modo_vectorizado = configuracion["vectorizado"],
+        seed = configuracion["semilla"],
+    )
+    construccion_s = time.perf_counter() - inicio
+
+    # Calentamiento con tracemalloc: pico de memoria nueva (sobre la que ya estaba asignada) durante cada paso
+    asignado_por_paso = list()
+    tracemalloc.start()
+    while modelo.running and modelo.tiempo < configuracion.get("pasos_memoria", 0):
+        tracemalloc.reset_peak()
+        actual, _ = tracemalloc.get_traced_memory()
+        modelo.step()
+        asignado_por_paso.append(tracemalloc.get_traced_memory()[1] - actual)
+    tracemalloc.stop()
+
+    # notificar_problema se mide envolviéndolo en la instancia (step lo llama a través de self)
+    tiempos_notificar = list()
+    notificar_problema = modelo.notificar_problema
+
+    def notificar_medido():
+        inicio = time.perf_counter_ns()
+        notificar_problema()
+        tiempos_notificar.append(time.perf_counter_ns() - inicio)
+    modelo.notificar_problema = notificar_medido
+
+    tiempos_step = list()
+    fin_medicion = modelo.tiempo + configuracion["max_pasos"]
+    while modelo.running and modelo.tiempo < fin_medicion:
+        inicio = time.perf_counter_ns()
+        modelo.step()
+        tiempos_step.append(time.perf_counter_ns() - inicio)
+
+    tiempos_grid = list()
+    for _ in range(repeticiones_grid):
+        inicio = time.perf_counter_ns()
+        get_grid(modelo)
+        tiempos_grid.append(time.perf_counter_ns() - inicio)
+
+    # La corrida sigue, sin medir cada paso, hasta que el salón quede limpio o se llegue al límite
+    modelo.notificar_problema = notificar_problema
+    while modelo.running and modelo.tiempo < configuracion.get("pasos_limpieza", 0):
+        modelo.step()
+
+    latencias = percentiles(tiempos_step)
+    resultado = dict(configuracion)
+    resultado.update({
+        "clave": clave_configuracion(configuracion),
+        "construccion_s": construccion_s,
+        "pasos": len(tiempos_step),
+        "pasos_para_limpiar": modelo.tiempo if modelo.salon_limpio() else None,
+        "step_p50_ms": latencias["p50"],
+        "step_p90_ms": latencias["p90"],
+        "step_p99_ms": latencias["p99"],
+        "step_max_ms": latencias["max"],
+        "notificar_problema_ms": float(np.mean(tiempos_notificar)) / 1e6 if tiempos_notificar else None,
+        "get_grid_ms": float(np.median(tiempos_grid)) / 1e6,
+        # ru_maxrss está en kilobytes en Linux y en bytes en macOS
+        "rss_max_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024),
+        "asignado_por_paso_kb": float(np.mean(asignado_por_paso)) / 1024 if asignado_por_paso else None,
+    })
+    modelo.finalizar()
+    return resultado
+
+
+# ✓ Función que ejecuta cada configuración en un proceso nuevo y devuelve sus resultados en orden
+def ejecutar_benchmarks(configuraciones):
+    # "spawn" para que cada proceso empiece limpio y su memoria máxima no herede la del proceso padre
+    contexto = multiprocessing.get_context("spawn")
+    resultados = list()
+    for configuracion in configuraciones:
+        with ProcessPoolExecutor(max_workers = 1, mp_context = contexto) as pool:
+            resultado = pool.submit(medir_configuracion, configuracion).result()
+        print(f"{resultado['clave']}: construcción {resultado['construccion_s']:.3f} s, "
+              f"step p50 {formatear(resultado['step_p50_ms'])} ms, p99 {formatear(resultado['step_p99_ms'])} ms, "
+              f"{resultado['rss_max_mb']:.0f} MB, limpio en {formatear(resultado['pasos_para_limpiar'], 'd')} pasos",
+              flush = True)
+        resultados.append(resultado)
+    return resultados
+
+
+# ✓ Función que obtiene el commit actual del repositorio (None si no se puede)
+def commit_actual():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "HEAD"], cwd = os.path.dirname(os.path.abspath(__file__)),
+                                capture_output = True, text = True, check = True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return salida.stdout.strip()
+
+
+# ✓ Función que compara los resultados contra una base y devuelve las regresiones encontradas
+def comparar(resultados, base, tolerancia = 0.1): # resultados actuales, resultados base, aumento relativo permitido
+    base_por_clave = {resultado["clave"]: resultado for resultado in base["resultados"]}
+    regresiones = list()
+    for resultado in resultados:
+        anterior = base_por_clave.get(resultado["clave"])
+        if anterior is None:
+            continue
+        for metrica in METRICAS_COMPARADAS:
+            actual, previo = resultado.get(metrica), anterior.get(metrica)
+            if actual is None or previo is None or previo <= 0:
+                continue
+            cambio = (actual - previo) / previo
+            if cambio > tolerancia:
+                regresiones.append({"clave": resultado["clave"], "metrica": metrica,
+                                    "base": previo, "actual": actual, "cambio": cambio})
+    return regresiones
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmarks reproducibles de la simulación de barredoras")
+    parser.add_argument("--tamanos", nargs = "+", type = leer_tamano,
+                        default = [(20, 20), (100, 100), (300, 300), (1000, 1000)], help = "Tamaños MxN de la habitación")
+    parser.add_argument("--agentes", nargs = "+", type = int, default = [2, 10, 100, 1000], help = "Número de robots")
+    parser.add_argument("--sucias", nargs = "+", type = float, default = [0.3], help = "Porcentaje de celdas sucias")
+    parser.add_argument("--muebles", nargs = "+", type = float, default = [0.1], help = "Porcentaje de muebles")
+    parser.add_argument("--semilla", type = int, default = 42, help = "Semilla fija de todas las corridas")
+    parser.add_argument("--max-pasos", type = int, default = 200, help = "Pasos medidos por configuración")
+    parser.add_argument("--pasos-memoria", type = int, default = 10, help = "Pasos de calentamiento medidos con tracemalloc")
+    parser.add_argument("--pasos-limpieza", type = int, default = 5000,
+                        help = "Límite de pasos para contar los pasos hasta limpiar (0 para no contarlos)")
+    parser.add_argument("--vectorizado", action = "store_true", help = "Usar el paso vectorizado de la flota")
+    parser.add_argument("--salida", default = "bench.json", help = "Archivo JSON de resultados")
+    parser.add_argument("--base", default = None, help = "Resultados base (JSON) contra los que se compara")
+    parser.add_argument("--tolerancia", type = float, default = 0.1, help = "Aumento relativo permitido antes de marcar una regresión")
+    args = parser.parse_args(argv)
+
+    # Se descartan configuraciones con más robots que celdas
+    configuraciones = [configuracion for configuracion in generar_configuraciones(
+        args.tamanos, args.agentes, args.sucias, args.muebles, args.semilla, args.max_pasos, args.vectorizado,
+        args.pasos_memoria, args.pasos_limpieza)
+        if configuracion["num_agentes"] < configuracion["M"] * configuracion["N"] // 2]
+
+    resultados = ejecutar_benchmarks(configuraciones)
+    with open(args.salida, "w") as archivo:
+        json.dump({
+            "commit": commit_actual(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }, archivo, indent = 2)
+    print(f"{len(resultados)} configuraciones guardadas en {args.salida}")
+
+    if args.base:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultados, base, args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion['clave']} {regresion['metrica']}: "
+                  f"{regresion['base']:.4g} -> {regresion['actual']:.4g} (+{100 * regresion['cambio']:.0f}%)")
+        if regresiones:
+            sys.exit(1)
+        print(f"Sin regresiones contra {args.base} (commit {base.get('commit')})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+'''
+Checkpoints de una simulación de barredoras en curso.
+
+Guarda el estado completo de un `Habitacion` (capas del piso, robots con su carga, objetivo, siguiente posición y
+contadores, orden del scheduler, generadores aleatorios, colas de cargadores, estrategias y el historial del
+recolector) en un pickle comprimido, y lo restaura para continuar la corrida exactamente igual que sin interrupción.
+Desde un mismo checkpoint se pueden bifurcar varias corridas "¿y si...?" sin volver a pagar la construcción.
+
+Uso:
+    guardar_checkpoint(modelo, "paso_5000.ckpt")
+    modelo = cargar_checkpoint("paso_5000.ckpt")
+    variantes = bifurcar("paso_5000.ckpt", 8, semillas = range(8))
+'''
+
+import gzip
+import os
+import pickle
+
+import numpy as np
+
+# Versión del formato de los checkpoints
+VERSION = 2
+
+
+# ✓ Función que guarda el estado completo del modelo en un archivo comprimido (se escribe de forma atómica)
+def guardar_checkpoint(modelo, ruta, nivel_compresion = 6): # modelo, archivo destino, nivel de gzip (1-9)
+    # Se escribe en un archivo temporal y se renombra, para no dejar un checkpoint a medias si la corrida se cae
+    temporal = f"{ruta}.tmp"
+    with gzip.open(temporal, "wb", compresslevel = nivel_compresion) as archivo:
+        pickle.dump({"version": VERSION, "modelo": modelo}, archivo, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+
+# ✓ Función que lee un checkpoint y devuelve el modelo sin reabrir sus archivos
+def leer_checkpoint(datos): # bytes del checkpoint ya descomprimidos
+    contenido = pickle.loads(datos)
+    if contenido.get("version") != VERSION:
+        raise ValueError(f"Versión de checkpoint no soportada: {contenido.get('version')} (se esperaba {VERSION})")
+    return contenido["modelo"]
+
+
+# ✓ Función que restaura un modelo desde un checkpoint para continuar la corrida
+def cargar_checkpoint(ruta): # archivo del checkpoint
+    with gzip.open(ruta, "rb") as archivo:
+        modelo = leer_checkpoint(archivo.read())
+    # El registro de eventos y el perfil siguen escribiendo donde se quedaron al guardar
+    modelo.reanudar_archivos()
+    return modelo
+
+
+# ✓ Función que crea varias corridas independientes a partir de un mismo checkpoint
+def bifurcar(origen, num_copias, semillas = None, modificar = None, rutas_eventos = None):
+    """
+    Método para bifurcar corridas "¿y si...?" desde un estado ya calentado
+    :param origen: Ruta de un checkpoint o un modelo en memoria
+    :param num_copias: Número de corridas a crear
+    :param semillas: Semilla de cada copia (None = todas continúan con el mismo generador que el origen)
+    :param modificar: Función opcional modificar(modelo, indice) que aplica el cambio de cada copia
+    :param rutas_eventos: Archivo de eventos de cada copia (None = las copias no registran eventos)
+    :return: Lista de modelos
+    """
+    # El checkpoint se lee (o serializa) una sola vez y cada copia se deserializa desde memoria
+    if isinstance(origen, (str, os.PathLike)):
+        with gzip.open(origen, "rb") as archivo:
+            datos = archivo.read()
+    else:
+        datos = pickle.dumps({"version": VERSION, "modelo": origen}, protocol = pickle.HIGHEST_PROTOCOL)
+
+    from .eventos import RegistroEventos
+
+    copias = list()
+    for indice in range(num_copias):
+        modelo = leer_checkpoint(datos)
+
+        # Las copias no comparten los archivos del origen
+        modelo.eventos = RegistroEventos(rutas_eventos[indice]) if rutas_eventos else None
+        if modelo.perfil is not None:
+            modelo.perfil.desligar()
+
+        # Con otra semilla, cada copia sigue su propia secuencia aleatoria
+        if semillas is not None:
+            semilla = semillas[indice]
+            modelo.reset_randomizer(semilla)
+            if modelo.paso_vectorizado is not None:
+                modelo.paso_vectorizado.rng = np.random.default_rng(semilla)
+            if modelo.proceso_suciedad is not None:
+                modelo.proceso_suciedad.rng = np.random.default_rng(semilla)
+
+        if modificar is not None:
+            modificar(modelo, indice)
+        copias.append(modelo)
+    return copias
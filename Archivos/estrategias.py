@@ -0,0 +1,243 @@
+'''
+Estrategias de recorrido de los robots cuando no tienen celdas sucias alrededor.
+
+`RobotLimpieza.seleccionar_nueva_pos` le pide a su estrategia la siguiente posición. Hay tres estrategias:
+    - Aleatoria: se mueve a un vecino disponible al azar (el comportamiento original).
+    - Frontera: busca con BFS la celda sucia libre más cercana (que no haya reclamado otro robot) y sigue el camino.
+    - Boustrophedon: reparte la habitación en franjas contiguas (una por robot) recorridas en zigzag; cada robot
+      avanza por su franja saltando celdas limpias (y las que no puede alcanzar, p. ej. encerradas por muebles) y,
+      cuando la termina, ayuda con la estrategia Frontera.
+'''
+
+import numpy as np
+
+from .model import INALCANZABLE, CampoAcotado, campo_distancias
+
+# Desplazamientos de la vecindad de Moore
+VECINOS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+# Celdas de la franja que se revisan a la vez al buscar la siguiente celda sucia
+TAMANO_BLOQUE = 256
+
+
+class EstrategiaAleatoria:
+    # Estrategia base: elige la siguiente posición de un robot que no tiene celdas sucias alrededor moviéndolo a un
+    # vecino disponible al azar (el comportamiento original); las demás estrategias la extienden
+    # Si el modelo debe notificar problemas en celdas sucias al azar en cada paso (las estrategias que planean su
+    # recorrido ya mandan a cada robot libre hacia la basura, y esas notificaciones los desviarían de su plan)
+    problemas_aleatorios = True
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+
+    # ✓ Función que devuelve la siguiente posición del robot (su posición actual si se queda quieto)
+    def siguiente_pos(self, robot, celdas_disponibles): # estrategia, robot, posiciones vecinas disponibles
+        return vecino_aleatorio(robot, celdas_disponibles)
+
+    # ✓ Función que descarta lo que la estrategia tenga planeado para un robot (al recibir otro objetivo)
+    def olvidar(self, id_robot): # estrategia, id del robot
+        pass
+
+    # ✓ Función que ajusta la estrategia cuando entran o salen robots del modelo (p. ej. en un modelo fragmentado)
+    def actualizar_flota(self): # estrategia
+        pass
+
+
+class EstrategiaFrontera(EstrategiaAleatoria):
+    problemas_aleatorios = False
+
+    def __init__(self, modelo):
+        super().__init__(modelo)
+        # Los robots no caminan sobre muebles ni cargadores mientras limpian
+        self.obstaculos = (modelo.capa_muebles == 1) | (modelo.capa_cargadores == 1)
+        # Camino pendiente (lista de posiciones) y destino de cada robot, por id
+        self.caminos = dict()
+        self.destinos = dict()
+        # Celdas sucias que ya tienen un robot en camino
+        self.reclamadas = set()
+
+    # ✓ Función que sigue el camino del robot hacia su destino, recalculándolo si ya no sirve
+    def siguiente_pos(self, robot, celdas_disponibles):
+        destino = self.destinos.get(robot.unique_id)
+        # El destino se descarta si ya se limpió (por este u otro robot)
+        if destino is not None and not self.modelo.capa_suciedad[destino]:
+            self.olvidar(robot.unique_id)
+            destino = None
+        if destino is None:
+            destino = self.buscar_destino(robot)
+            if destino is None:
+                # No queda basura alcanzable: se mueve al azar
+                return vecino_aleatorio(robot, celdas_disponibles)
+            self.asignar(robot, destino)
+
+        camino = self.caminos[robot.unique_id]
+        # Si otro robot bloquea el siguiente paso, se recalcula el camino rodeando a los robots
+        if camino and camino[0] not in celdas_disponibles:
+            camino = self.caminos[robot.unique_id] = self.camino_sin_robots(robot.pos, destino)
+        # Si aun así no hay camino, se da un paso al azar y se vuelve a planear en el siguiente paso
+        if not camino or camino[0] not in celdas_disponibles:
+            self.olvidar(robot.unique_id)
+            return vecino_aleatorio(robot, celdas_disponibles)
+        return camino.pop(0)
+
+    # ✓ Función que busca la celda sucia libre más cercana (en pasos) con ventanas de BFS cada vez más grandes
+    def buscar_destino(self, robot, radio = 8): # estrategia, robot, radio inicial de la ventana
+        M, N = self.obstaculos.shape
+        x, y = robot.pos
+        while True:
+            campo = CampoAcotado(self.obstaculos, robot.pos, radio)
+            x1, y1 = campo.x0 + campo.distancias.shape[0], campo.y0 + campo.distancias.shape[1]
+            sucias = self.modelo.capa_suciedad[campo.x0:x1, campo.y0:y1] == 1
+            distancias = np.where(sucias, campo.distancias, INALCANZABLE)
+            # Las celdas reclamadas por otros robots no cuentan
+            for rx, ry in self.reclamadas:
+                if campo.x0 <= rx < x1 and campo.y0 <= ry < y1:
+                    distancias[rx - campo.x0, ry - campo.y0] = INALCANZABLE
+            i = int(distancias.argmin())
+            if distancias.flat[i] != INALCANZABLE:
+                dx, dy = divmod(i, distancias.shape[1])
+                return (campo.x0 + dx, campo.y0 + dy)
+            # Si la ventana ya cubre toda la habitación, no hay basura alcanzable
+            if x - radio <= 0 and y - radio <= 0 and x + radio >= M - 1 and y + radio >= N - 1:
+                return None
+            radio *= 4
+
+    # ✓ Función que asigna un destino al robot y calcula el camino hacia él
+    def asignar(self, robot, destino): # estrategia, robot, posición destino
+        self.destinos[robot.unique_id] = destino
+        self.reclamadas.add(destino)
+        self.caminos[robot.unique_id] = camino_mas_corto(self.obstaculos, robot.pos, destino)
+
+    # ✓ Función que calcula un camino tratando como obstáculos las celdas ocupadas por robots
+    def camino_sin_robots(self, origen, destino): # estrategia, posición del robot, posición destino
+        ocupadas = [robot.pos for robot in self.modelo.schedule.agents if robot.pos != origen]
+        if not ocupadas:
+            return camino_mas_corto(self.obstaculos, origen, destino)
+        xs, ys = zip(*ocupadas)
+        previos = self.obstaculos[xs, ys]
+        self.obstaculos[xs, ys] = True
+        camino = camino_mas_corto(self.obstaculos, origen, destino)
+        # Se restauran los obstáculos que había (un robot puede estar sobre un cargador)
+        self.obstaculos[xs, ys] = previos
+        return camino
+
+    # ✓ Función que olvida el destino y el camino de un robot (y libera la celda que había reclamado)
+    def olvidar(self, id_robot): # estrategia, id del robot
+        destino = self.destinos.pop(id_robot, None)
+        self.reclamadas.discard(destino)
+        self.caminos.pop(id_robot, None)
+
+
+class EstrategiaBoustrophedon(EstrategiaFrontera):
+    def __init__(self, modelo):
+        super().__init__(modelo)
+        M, N = self.obstaculos.shape
+        # Recorrido en zigzag de toda la habitación (índices planos): filas pares de ida, impares de regreso
+        orden = np.arange(M * N).reshape(M, N)
+        orden[1::2] = orden[1::2, ::-1]
+        self.orden = orden.ravel()
+        # Franja de cada robot en el recorrido (inicio, fin) y avance dentro de ella, por id
+        self.franjas = None
+        self.cursores = dict()
+        # Componente conexa (sin cruzar obstáculos) de cada celda, calculada bajo demanda (-1 = sin calcular)
+        self.componentes = np.full(M * N, -1, dtype = np.int64)
+        self.num_componentes = 0
+
+    # ✓ Función que obtiene la componente conexa de una celda libre (la primera vez la etiqueta completa con un BFS)
+    def componente(self, pos): # estrategia, posición
+        plana = pos[0] * self.obstaculos.shape[1] + pos[1]
+        if self.componentes[plana] < 0:
+            alcanzables = campo_distancias(self.obstaculos, pos).ravel() != INALCANZABLE
+            self.componentes[alcanzables] = self.num_componentes
+            self.num_componentes += 1
+        return int(self.componentes[plana])
+
+    # ✓ Función que obtiene las componentes a las que puede llegar un robot limpiando
+    def componentes_robot(self, robot): # estrategia, robot
+        if not self.obstaculos[robot.pos]:
+            return {self.componente(robot.pos)}
+        # Sobre un cargador: las de sus vecinos libres
+        N = self.obstaculos.shape[1]
+        vecinos = self.modelo.tabla_vecinos[robot.pos[0] * N + robot.pos[1]].tolist()
+        return {self.componente(divmod(vecino, N)) for vecino in vecinos
+                if vecino >= 0 and not self.obstaculos.flat[vecino]}
+
+    # ✓ Función que vuelve a repartir las franjas (en el siguiente destino) si cambió la flota
+    def actualizar_flota(self):
+        self.franjas = None
+
+    # ✓ Función que reparte el recorrido en franjas contiguas del mismo tamaño, una por robot (por orden de id)
+    def repartir_franjas(self): # estrategia
+        ids = sorted(robot.unique_id for robot in self.modelo.schedule.agents)
+        cortes = np.linspace(0, len(self.orden), len(ids) + 1).astype(int)
+        self.franjas = {id: (int(cortes[k]), int(cortes[k + 1])) for k, id in enumerate(ids)}
+        self.cursores = {id: inicio for id, (inicio, _) in self.franjas.items()}
+
+    # ✓ Función que toma como destino la siguiente celda sucia de la franja del robot (o usa Frontera si ya no hay)
+    def buscar_destino(self, robot, radio = 8):
+        if self.franjas is None:
+            self.repartir_franjas()
+        _, fin = self.franjas[robot.unique_id]
+        cursor = self.cursores[robot.unique_id]
+        N = self.obstaculos.shape[1]
+
+        # Se avanza el cursor hasta la siguiente celda sucia, libre, alcanzable y no reclamada de la franja (por
+        # bloques); las inalcanzables quedan atrás para siempre porque los obstáculos no cambian
+        suciedad = self.modelo.capa_suciedad.ravel()
+        alcanzables = self.componentes_robot(robot)
+        while cursor < fin:
+            bloque = self.orden[cursor:min(cursor + TAMANO_BLOQUE, fin)]
+            pendientes = np.flatnonzero(suciedad[bloque])
+            if pendientes.size == 0:
+                cursor += bloque.size
+                continue
+            cursor += int(pendientes[0])
+            destino = divmod(int(self.orden[cursor]), N)
+            if (destino not in self.reclamadas and not self.obstaculos[destino]
+                    and self.componente(destino) in alcanzables):
+                self.cursores[robot.unique_id] = cursor
+                return destino
+            cursor += 1
+        self.cursores[robot.unique_id] = cursor
+
+        # La franja ya está limpia: el robot ayuda en el resto de la habitación
+        return super().buscar_destino(robot, radio)
+
+
+# ✓ Función que elige un vecino disponible al azar (el robot se queda quieto si no hay ninguno)
+def vecino_aleatorio(robot, celdas_disponibles):
+    if len(celdas_disponibles) == 0:
+        return robot.pos
+    return robot.random.choice(celdas_disponibles)
+
+
+# ✓ Función que obtiene el camino más corto (sin incluir el origen) entre dos posiciones, evitando obstáculos
+def camino_mas_corto(obstaculos, origen, destino):
+    # Campo acotado alrededor del destino que cubre el origen; si no alcanza, se calcula el campo completo
+    radio = 2 * max(abs(origen[0] - destino[0]), abs(origen[1] - destino[1])) + 8
+    campo = CampoAcotado(obstaculos, destino, radio)
+    if campo[origen] == INALCANZABLE:
+        campo = campo_distancias(obstaculos, destino)
+        if campo[origen] == INALCANZABLE:
+            return []
+
+    # Desde el origen, cada paso va al vecino con una distancia menos hasta llegar al destino
+    M, N = obstaculos.shape
+    camino = list()
+    pos = origen
+    distancia = campo[origen]
+    while distancia > 0:
+        for dx, dy in VECINOS:
+            vecino = (pos[0] + dx, pos[1] + dy)
+            if 0 <= vecino[0] < M and 0 <= vecino[1] < N and campo[vecino] == distancia - 1:
+                break
+        pos, distancia = vecino, distancia - 1
+        camino.append(pos)
+    return camino
+
+
+# Estrategias disponibles por nombre (las opciones del parámetro `estrategia` del modelo)
+ESTRATEGIAS = {
+    "Aleatoria": EstrategiaAleatoria,
+    "Frontera": EstrategiaFrontera,
+    "Boustrophedon": EstrategiaBoustrophedon,
+}
@@ -0,0 +1,143 @@
+'''
+Registro de eventos de la simulación en disco, para análisis fuera de línea de corridas largas.
+
+Los eventos (celda limpiada, movimiento, carga y asignación de ayuda) se escriben en un formato binario de registros
+de tamaño fijo, solo agregando al final y con un búfer en memoria. El lector abre el archivo con `np.memmap`, así que
+puede reproducir o recortar cualquier rango de pasos sin cargar todo el archivo.
+'''
+
+import os
+
+import numpy as np
+
+# Encabezado del archivo (identificador del formato y versión)
+ENCABEZADO = b"BARREV01"
+
+# Tipos de evento
+LIMPIEZA = 1
+MOVIMIENTO = 2
+CARGA = 3
+AYUDA = 4
+
+NOMBRES_EVENTOS = {LIMPIEZA: "limpieza", MOVIMIENTO: "movimiento", CARGA: "carga", AYUDA: "ayuda"}
+
+# Registro de tamaño fijo (17 bytes): paso, tipo, robot, posición y un valor que depende del tipo
+# (carga del robot al moverse o cargarse, gravedad del problema en una ayuda)
+DTYPE_EVENTO = np.dtype([
+    ("paso", "<u4"),
+    ("tipo", "u1"),
+    ("robot", "<i4"),
+    ("x", "<u2"),
+    ("y", "<u2"),
+    ("valor", "<i4"),
+])
+
+
+class RegistroEventos:
+    # Escritor de eventos: los acumula en un arreglo y los agrega al archivo cuando se llena
+    def __init__(self, ruta: str, tamano_buffer: int = 65_536):
+        self.ruta = ruta
+        self.buffer = np.empty(tamano_buffer, dtype = DTYPE_EVENTO)
+        self.num_pendientes = 0
+        self.archivo = open(ruta, "wb")
+        self.archivo.write(ENCABEZADO)
+        # Bytes escritos hasta el último checkpoint
+        self.posicion = len(ENCABEZADO)
+
+    # ✓ Función que registra un evento
+    def registrar(self, paso, tipo, robot, pos, valor = 0): # registro, paso, tipo de evento, id del robot, posición, valor
+        self.buffer[self.num_pendientes] = (paso, tipo, robot, pos[0], pos[1], valor)
+        self.num_pendientes += 1
+        if self.num_pendientes == len(self.buffer):
+            self.vaciar()
+
+    # ✓ Función que registra en bloque eventos del mismo tipo (arreglos de robots, coordenadas y valores)
+    def registrar_bloque(self, paso, tipo, robots, x, y, valores = 0):
+        eventos = np.empty(len(robots), dtype = DTYPE_EVENTO)
+        eventos["paso"] = paso
+        eventos["tipo"] = tipo
+        eventos["robot"] = robots
+        eventos["x"] = x
+        eventos["y"] = y
+        eventos["valor"] = valores
+
+        # Si no caben en el búfer, se vacía primero y los bloques grandes se escriben directo
+        if self.num_pendientes + len(eventos) > len(self.buffer):
+            self.vaciar()
+        if len(eventos) > len(self.buffer):
+            self.archivo.write(eventos.tobytes())
+            return
+        self.buffer[self.num_pendientes:self.num_pendientes + len(eventos)] = eventos
+        self.num_pendientes += len(eventos)
+
+    # ✓ Función que agrega al archivo los eventos pendientes
+    def vaciar(self): # registro
+        if self.num_pendientes:
+            self.archivo.write(self.buffer[:self.num_pendientes].tobytes())
+            self.num_pendientes = 0
+
+    # ✓ Función que vacía el búfer y cierra el archivo
+    def cerrar(self): # registro
+        if self.archivo is not None and not self.archivo.closed:
+            self.vaciar()
+            self.archivo.close()
+
+    # ✓ Función que reabre el archivo tras restaurar un checkpoint, descartando lo escrito después de guardarlo
+    def reanudar(self): # registro
+        self.archivo = open(self.ruta, "r+b")
+        self.archivo.truncate(self.posicion)
+        self.archivo.seek(self.posicion)
+
+    # En un checkpoint se guarda la ruta y hasta dónde se había escrito (el archivo abierto no se puede guardar)
+    def __getstate__(self):
+        if self.archivo is not None and not self.archivo.closed:
+            self.vaciar()
+            self.archivo.flush()
+            self.posicion = self.archivo.tell()
+        estado = self.__dict__.copy()
+        estado["archivo"] = None
+        return estado
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+
+class LectorEventos:
+    # Lector de eventos con el archivo mapeado en memoria (los eventos están ordenados por paso)
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as archivo:
+            if archivo.read(len(ENCABEZADO)) != ENCABEZADO:
+                raise ValueError(f"'{ruta}' no es un registro de eventos de barredoras")
+
+        num_eventos = (os.path.getsize(ruta) - len(ENCABEZADO)) // DTYPE_EVENTO.itemsize
+        if num_eventos:
+            self.eventos = np.memmap(ruta, dtype = DTYPE_EVENTO, mode = "r", offset = len(ENCABEZADO), shape = (num_eventos,))
+        else:
+            self.eventos = np.empty(0, dtype = DTYPE_EVENTO)
+
+    def __len__(self):
+        return len(self.eventos)
+
+    # ✓ Función que obtiene los eventos de los pasos [paso_inicial, paso_final) sin copiarlos
+    def rango(self, paso_inicial, paso_final, tipo = None): # lector, primer paso, paso final (excluido), tipo opcional
+        pasos = self.eventos["paso"]
+        inicio = np.searchsorted(pasos, paso_inicial, side = "left")
+        fin = np.searchsorted(pasos, paso_final, side = "left")
+        eventos = self.eventos[inicio:fin]
+        if tipo is not None:
+            eventos = eventos[eventos["tipo"] == tipo]
+        return eventos
+
+    # ✓ Función que reproduce paso por paso los eventos de un rango
+    def reproducir(self, paso_inicial = 0, paso_final = None): # lector, primer paso, paso final (excluido)
+        if paso_final is None:
+            paso_final = int(self.eventos["paso"][-1]) + 1 if len(self.eventos) else paso_inicial
+        eventos = self.rango(paso_inicial, paso_final)
+        pasos = eventos["paso"]
+        # Límites de cada paso dentro del rango
+        cortes = np.flatnonzero(np.diff(pasos)) + 1
+        for bloque in np.split(eventos, cortes) if len(eventos) else ():
+            yield int(bloque["paso"][0]), bloque
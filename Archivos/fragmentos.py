@@ -0,0 +1,412 @@
+'''
+Habitación fragmentada en varios procesos para pisos muy grandes.
+
+El piso se divide en franjas verticales (rangos de x) y cada franja la simula un proceso con su propio `Fragmento`
+(un `Habitacion` con los muebles, la suciedad, los cargadores y los robots de su franja). Cada fragmento ve además
+una columna de halo por cada vecino: sus robots pueden pisar y limpiar esas celdas, y los que terminan el paso en el
+halo se entregan al vecino. En la barrera de cada paso el coordinador intercambia por pipes, solo entre vecinos:
+    - los robots que cruzaron la frontera (con su carga, movimientos y objetivo),
+    - las celdas del halo que se limpiaron (el dueño las descuenta) y la columna de borde de cada fragmento,
+    - las solicitudes de ayuda de `pedir_ayuda_aux` que ningún robot del fragmento pudo atender.
+
+Limitaciones: los robots de fragmentos vecinos no se ven entre sí en el halo (dos robots pueden coincidir un paso en
+la frontera), cada robot solo conoce los cargadores de la franja en la que está y no se admite el modo vectorizado.
+
+Uso:
+    with HabitacionFragmentada(2000, 500, num_fragmentos = 8, num_agentes = 400, seed = 1) as modelo:
+        while modelo.running:
+            modelo.step()
+'''
+
+import multiprocessing
+import os
+import random
+import traceback
+
+import numpy as np
+
+from .model import Habitacion, RobotLimpieza, ubicar_cargadores, get_sucias
+from .recoleccion import RecolectorDatos
+
+# Solo se reenvían a los vecinos las solicitudes de los robots (4 o más celdas sucias alrededor), no los problemas
+# aleatorios de una celda, que siempre sobran
+GRAVEDAD_REENVIO = 4
+# Lado opuesto de cada frontera
+OPUESTO = {"izq": "der", "der": "izq"}
+
+
+class Fragmento(Habitacion):
+    # Franja de la habitación simulada por un proceso: un Habitacion con una columna de halo por cada vecino
+    def __init__(self, x_inicio: int, halo_izq: bool, halo_der: bool, **parametros):
+        """
+        :param x_inicio: Columna global de la primera columna local (la del halo izquierdo, si existe)
+        :param halo_izq: Si hay un fragmento a la izquierda (la primera columna local es su halo)
+        :param halo_der: Si hay un fragmento a la derecha (la última columna local es su halo)
+        :param parametros: Parámetros de Habitacion, con el plano de la franja (halo incluido)
+        """
+        super().__init__(**parametros)
+        M = self.grid.width
+        self.x_inicio = x_inicio
+        # Columnas locales del halo y del borde propio de cada lado (None si no hay vecino de ese lado)
+        self.halos = {"izq": 0 if halo_izq else None, "der": M - 1 if halo_der else None}
+        self.bordes = {"izq": 1 if halo_izq else None, "der": M - 2 if halo_der else None}
+        # Columnas propias de la franja (sin halos)
+        self.nucleo = slice(1 if halo_izq else 0, M - 1 if halo_der else M)
+        # Suciedad del halo al empezar el paso, para saber qué celdas limpiaron los robots de este fragmento
+        self.halo_previo = {lado: self.capa_suciedad[col].copy() for lado, col in self.halos.items() if col is not None}
+        # Las estrategias que planean su recorrido solo lo hacen dentro de la franja propia (el halo es del vecino)
+        obstaculos = getattr(self.estrategia, "obstaculos", None)
+        if obstaculos is not None:
+            for col in self.halos.values():
+                if col is not None:
+                    obstaculos[col] = True
+
+    # ✓ Función que convierte una posición local a global
+    def a_global(self, pos): # fragmento, posición local
+        return (pos[0] + self.x_inicio, pos[1])
+
+    # ✓ Función que convierte una posición global a local
+    def a_local(self, pos): # fragmento, posición global
+        return (pos[0] - self.x_inicio, pos[1])
+
+    # ✓ Función que cuenta las celdas sucias propias (sin las de los halos, que cuentan los vecinos)
+    def sucias_propias(self): # fragmento
+        return int(self.capa_suciedad[self.nucleo].sum())
+
+    # ✓ Función que ejecuta un paso del fragmento y devuelve los problemas que no atendió ningún robot
+    def paso(self): # fragmento
+        # Los fragmentos avanzan aunque su franja esté limpia: pueden llegar robots y solicitudes de los vecinos
+        self.avanzar_robots()
+        self.generar_problemas()
+        sin_atender = self.notificar_problema()
+        self.tiempo += 1
+        return sin_atender
+
+    # ✓ Función que aplica lo que mandaron los vecinos en la barrera
+    def recibir(self, mensaje): # fragmento, mensaje armado por el coordinador
+        for lado, col in self.halos.items():
+            if col is None:
+                continue
+            # Celdas propias que limpiaron los robots del vecino desde su halo
+            borde = self.bordes[lado]
+            for y in mensaje[f"limpiadas_{lado}"]:
+                self.limpiar_celda((borde, int(y)))
+            # El halo se iguala a la columna de borde del vecino
+            columna = mensaje[f"halo_{lado}"]
+            if columna is not None:
+                for y in np.flatnonzero(columna != self.capa_suciedad[col]).tolist():
+                    if columna[y]:
+                        self.ensuciar_celda((col, y))
+                    else:
+                        self.limpiar_celda((col, y))
+            self.halo_previo[lado] = self.capa_suciedad[col].copy()
+
+        # Robots que cruzaron hacia este fragmento y solicitudes de ayuda de los vecinos
+        for estado in mensaje["robots"]:
+            self.agregar_robot(estado)
+        for gravedad, pos in mensaje["problemas"]:
+            self.pedir_ayuda_aux(self.a_local(pos), gravedad)
+
+    # ✓ Función que arma lo que este fragmento manda a sus vecinos al terminar el paso
+    def salida(self, sin_atender = ()): # fragmento, problemas que no atendió ningún robot
+        salida = {"movimientos": self.movimientos, "recargas": self.cantidad_recargas}
+        reenvios = self.elegir_reenvios(sin_atender)
+        for lado, col in self.halos.items():
+            if col is None:
+                continue
+            salida[f"limpiadas_{lado}"] = np.flatnonzero(self.halo_previo[lado] > self.capa_suciedad[col])
+            salida[f"borde_{lado}"] = self.capa_suciedad[self.bordes[lado]].copy()
+            salida[f"robots_{lado}"] = [self.retirar_robot(robot) for robot in list(self.schedule.agents)
+                                        if robot.pos[0] == col]
+            salida[f"problemas_{lado}"] = reenvios[lado]
+        salida["sucias"] = self.sucias_propias()
+        salida["robots"] = len(self.schedule.agents)
+        return salida
+
+    # ✓ Función que elige qué solicitudes sin atender se reenvían (a lo más la más grave por vecino)
+    def elegir_reenvios(self, sin_atender): # fragmento, problemas ordenados de mayor a menor gravedad
+        reenvios = {"izq": list(), "der": list()}
+        lados = [lado for lado, col in self.halos.items() if col is not None]
+        for gravedad, pos in sin_atender:
+            if gravedad < GRAVEDAD_REENVIO or not lados:
+                break
+            # Se le pide al vecino más cercano; la ayuda se solicita en la columna de borde (el halo del vecino),
+            # de modo que el robot que acuda cruce hacia este fragmento y aquí se le asigne el problema
+            lado = min(lados, key = lambda lado: abs(pos[0] - self.halos[lado]))
+            if not reenvios[lado]:
+                reenvios[lado].append((gravedad, self.a_global((self.bordes[lado], pos[1]))))
+        return reenvios
+
+    # ✓ Función que saca a un robot del fragmento y devuelve su estado para entregarlo al vecino
+    def retirar_robot(self, robot): # fragmento, robot
+        objetivo = robot.objetivo
+        estado = {
+            "id": robot.unique_id,
+            "pos": self.a_global(robot.pos),
+            "carga": robot.carga,
+            "movimientos": robot.movimientos,
+            "celdas_sucias": robot.celdas_sucias,
+            # Un cargador de este fragmento no le sirve en el vecino: allá elegirá uno de su franja
+            "objetivo": self.a_global(objetivo) if objetivo and not self.capa_cargadores[objetivo] else None,
+        }
+        self.liberar_cargador(robot.unique_id)
+        self.estrategia.olvidar(robot.unique_id)
+        self.indice_robots.quitar(robot)
+        self.quitar_robot(robot)
+        self.schedule.remove(robot)
+        self.num_agentes = len(self.schedule.agents)
+        self.estrategia.actualizar_flota()
+        return estado
+
+    # ✓ Función que agrega al fragmento un robot entregado por un vecino
+    def agregar_robot(self, estado): # fragmento, estado del robot
+        robot = RobotLimpieza(estado["id"], self)
+        robot.carga = estado["carga"]
+        robot.movimientos = estado["movimientos"]
+        robot.celdas_sucias = estado["celdas_sucias"]
+        # El objetivo solo se conserva si cae dentro de la franja (halos incluidos)
+        if estado["objetivo"] is not None:
+            objetivo = self.a_local(estado["objetivo"])
+            if 0 <= objetivo[0] < self.grid.width:
+                robot.objetivo = objetivo
+        self.colocar_robot(robot, self.a_local(estado["pos"]))
+        self.schedule.add(robot)
+        self.indice_robots.actualizar(robot)
+        self.num_agentes = len(self.schedule.agents)
+        self.estrategia.actualizar_flota()
+
+
+# ✓ Función que ejecuta un fragmento en su proceso, atendiendo las órdenes del coordinador
+def ejecutar_fragmento(conexion, parametros): # extremo del pipe del proceso, parámetros del Fragmento
+    try:
+        modelo = Fragmento(**parametros)
+        conexion.send("listo")
+        while True:
+            orden, datos = conexion.recv()
+            if orden == "paso":
+                modelo.recibir(datos)
+                conexion.send(modelo.salida(modelo.paso()))
+            elif orden == "capa":
+                conexion.send(modelo.capa_suciedad[modelo.nucleo].copy())
+            elif orden == "robots":
+                conexion.send([(robot.unique_id, modelo.a_global(robot.pos), robot.carga)
+                               for robot in modelo.schedule.agents])
+            else:
+                break
+        modelo.finalizar()
+    except Exception:
+        # El error se manda al coordinador para que no se quede esperando en la barrera
+        conexion.send(RuntimeError(f"Error en el fragmento que empieza en x = {parametros['x_inicio']}:\n"
+                                   f"{traceback.format_exc()}"))
+    finally:
+        conexion.close()
+
+
+class HabitacionFragmentada:
+    def __init__(self, M: int, N: int,
+                 num_fragmentos: int = None,
+                 num_agentes: int = 5,
+                 porc_celdas_sucias: float = 0.6,
+                 porc_muebles: float = 0.1,
+                 modo_pos_inicial: str = 'Aleatoria',
+                 estrategia: str = 'Aleatoria',
+                 num_cargadores: int = 4,
+                 max_campos_objetivo: int = None,
+                 intervalos_recoleccion: dict = None,
+                 contexto: str = None,
+                 seed: int = None,
+                 ):
+        """
+        :param num_fragmentos: Número de franjas (y de procesos); por defecto, uno por núcleo
+        :param num_cargadores: Cargadores de cada franja (ubicados por k-centro dentro de ella)
+        :param contexto: Método de inicio de los procesos ('fork', 'spawn', ...; por defecto el de la plataforma)
+        El resto de los parámetros son los de Habitacion.
+        """
+        num_fragmentos = num_fragmentos or os.cpu_count() or 1
+        if M < 2 * num_fragmentos:
+            raise ValueError(f"La habitación ({M} columnas) es muy angosta para {num_fragmentos} fragmentos")
+
+        self.random = random.Random(seed)
+        self.running = True
+        self.todas_celdas_limpias = False
+        self.num_agentes = num_agentes
+        self.tiempo = 0
+        self.movimientos = 0
+        self.cantidad_recargas = 0
+
+        # Límites de las franjas: la franja k tiene las columnas [cortes[k], cortes[k + 1])
+        self.cortes = np.linspace(0, M, num_fragmentos + 1).astype(int).tolist()
+
+        # Piso completo, construido igual que en Habitacion (máscara de disponibles e índices planos)
+        capa_muebles = np.zeros((M, N), dtype = np.uint8)
+        capa_suciedad = np.zeros((M, N), dtype = np.uint8)
+        disponibles = np.ones((M, N), dtype = bool)
+        disponibles[1, 1] = False
+
+        # Cargadores por k-centro dentro de cada franja, para que todas tengan dónde cargar
+        self.pos_cargadores = list()
+        for x0, x1 in zip(self.cortes, self.cortes[1:]):
+            reservadas = ((1 - x0, 1),) if x0 <= 1 < x1 else ()
+            self.pos_cargadores += [(x + x0, y) for x, y in ubicar_cargadores(x1 - x0, N, num_cargadores, reservadas)]
+        for pos in self.pos_cargadores:
+            disponibles[pos] = False
+
+        posiciones_muebles = self.random.sample(np.flatnonzero(disponibles).tolist(), k = int(M * N * porc_muebles))
+        capa_muebles.ravel()[posiciones_muebles] = 1
+        disponibles.ravel()[posiciones_muebles] = False
+        posiciones_disponibles = np.flatnonzero(disponibles).tolist()
+
+        self.celdas_sucias = int(M * N * porc_celdas_sucias)
+        capa_suciedad.ravel()[self.random.sample(posiciones_disponibles, k = self.celdas_sucias)] = 1
+        self.num_celdas_sucias = self.celdas_sucias
+
+        if modo_pos_inicial == 'Aleatoria':
+            pos_robots = [divmod(pos, N) for pos in self.random.sample(posiciones_disponibles, k = num_agentes)]
+        else: # 'Fija'
+            pos_robots = [(1, 1)] * num_agentes
+
+        # Un proceso por franja; cada uno construye su Fragmento en paralelo
+        contexto = multiprocessing.get_context(contexto)
+        self.conexiones = list()
+        self.procesos = list()
+        for k, (x0, x1) in enumerate(zip(self.cortes, self.cortes[1:])):
+            halo_izq, halo_der = k > 0, k < num_fragmentos - 1
+            a, b = x0 - halo_izq, x1 + halo_der
+            robots = [(id, (x - a, y)) for id, (x, y) in enumerate(pos_robots, start = 1) if x0 <= x < x1]
+            plano = {
+                "muebles": capa_muebles[a:b],
+                "suciedad": capa_suciedad[a:b],
+                "robots": [pos for _, pos in robots],
+                "ids_robots": [id for id, _ in robots],
+                # Los ids hasta el número total de robots son de los robots (pueden llegar de otras franjas)
+                "ultimo_id": num_agentes,
+                "celdas_sucias": self.celdas_sucias,
+            }
+            parametros = {
+                "M": b - a,
+                "N": N,
+                "num_agentes": len(robots),
+                "estrategia": estrategia,
+                "pos_cargadores": [(x - a, y) for x, y in self.pos_cargadores if x0 <= x < x1],
+                "plano": plano,
+                "max_campos_objetivo": max_campos_objetivo,
+                "intervalos_recoleccion": {"Grid": 0},
+                "seed": self.random.getrandbits(32),
+                "x_inicio": a,
+                "halo_izq": halo_izq,
+                "halo_der": halo_der,
+            }
+            padre, hijo = contexto.Pipe()
+            proceso = contexto.Process(target = ejecutar_fragmento, args = (hijo, parametros), daemon = True)
+            proceso.start()
+            hijo.close()
+            self.conexiones.append(padre)
+            self.procesos.append(proceso)
+        for k in range(num_fragmentos):
+            self.respuesta(k)
+
+        # Robots de cada franja y mensajes pendientes para el siguiente paso (al inicio los halos ya coinciden)
+        self.robots_por_fragmento = [sum(x0 <= x < x1 for x, _ in pos_robots) for x0, x1 in zip(self.cortes, self.cortes[1:])]
+        self.mensajes = [self.mensaje_vacio() for _ in range(num_fragmentos)]
+
+        self.datacollector = RecolectorDatos(
+            model_reporters = {"CeldasSucias": get_sucias,
+                               "Tiempo": "tiempo",
+                               "Movimientos": "movimientos",
+                               "Recargas": "cantidad_recargas"
+                               },
+            intervalos = intervalos_recoleccion)
+
+    # ✓ Función que ejecuta un paso en todos los fragmentos y hace el intercambio de la barrera
+    def step(self): # habitación fragmentada
+        self.datacollector.collect(self)
+
+        if self.num_celdas_sucias == 0:
+            self.running = False
+            self.cerrar()
+            return
+
+        # Todos los fragmentos avanzan a la vez; la barrera es esperar la salida de todos
+        for conexion, mensaje in zip(self.conexiones, self.mensajes):
+            conexion.send(("paso", mensaje))
+        salidas = [self.respuesta(k) for k in range(len(self.conexiones))]
+        self.mensajes = self.enrutar(salidas)
+
+        self.tiempo += 1
+        self.num_celdas_sucias = sum(salida["sucias"] for salida in salidas)
+        self.movimientos = sum(salida["movimientos"] for salida in salidas)
+        self.cantidad_recargas = sum(salida["recargas"] for salida in salidas)
+        self.robots_por_fragmento = [salida["robots"] for salida in salidas]
+        for k, mensaje in enumerate(self.mensajes):
+            self.robots_por_fragmento[k] += len(mensaje["robots"])
+        if self.num_celdas_sucias == 0:
+            self.todas_celdas_limpias = True
+
+    # ✓ Función que arma un mensaje sin nada que aplicar
+    @staticmethod
+    def mensaje_vacio():
+        return {"robots": list(), "problemas": list(), "limpiadas_izq": (), "limpiadas_der": (),
+                "halo_izq": None, "halo_der": None}
+
+    # ✓ Función que reparte la salida de cada fragmento entre sus vecinos
+    def enrutar(self, salidas): # habitación fragmentada, salidas de los fragmentos
+        mensajes = [self.mensaje_vacio() for _ in salidas]
+        for k, salida in enumerate(salidas):
+            for lado, vecino in (("izq", k - 1), ("der", k + 1)):
+                if f"borde_{lado}" not in salida:
+                    continue
+                opuesto = OPUESTO[lado]
+                mensaje = mensajes[vecino]
+                # El halo del vecino es el borde de este fragmento, sin las celdas que el vecino ya limpió desde ahí
+                borde = salida[f"borde_{lado}"]
+                borde[salidas[vecino][f"limpiadas_{opuesto}"]] = 0
+                mensaje[f"halo_{opuesto}"] = borde
+                mensaje[f"limpiadas_{opuesto}"] = salida[f"limpiadas_{lado}"]
+                mensaje["robots"].extend(salida[f"robots_{lado}"])
+                mensaje["problemas"].extend(salida[f"problemas_{lado}"])
+        return mensajes
+
+    # ✓ Función que espera la respuesta de un fragmento (y propaga sus errores)
+    def respuesta(self, k): # habitación fragmentada, índice del fragmento
+        respuesta = self.conexiones[k].recv()
+        if isinstance(respuesta, Exception):
+            self.cerrar()
+            raise respuesta
+        return respuesta
+
+    # ✓ Función que reúne la capa de suciedad de todo el piso
+    def obtener_capa_suciedad(self): # habitación fragmentada
+        for conexion in self.conexiones:
+            conexion.send(("capa", None))
+        return np.concatenate([self.respuesta(k) for k in range(len(self.conexiones))])
+
+    # ✓ Función que obtiene el id, la posición global y la carga de todos los robots
+    def get_robots(self): # habitación fragmentada
+        for conexion in self.conexiones:
+            conexion.send(("robots", None))
+        robots = [robot for k in range(len(self.conexiones)) for robot in self.respuesta(k)]
+        # Los robots que cruzaron una frontera en el último paso aún van en los mensajes de la barrera
+        return robots + [(estado["id"], estado["pos"], estado["carga"])
+                         for mensaje in self.mensajes for estado in mensaje["robots"]]
+
+    # ✓ Función que termina los procesos de los fragmentos
+    def cerrar(self): # habitación fragmentada
+        for conexion in self.conexiones:
+            try:
+                conexion.send(("fin", None))
+            except (BrokenPipeError, OSError):
+                pass
+            conexion.close()
+        for proceso in self.procesos:
+            # Un proceso atorado (p. ej. tras un error en otro fragmento) se termina a la fuerza
+            proceso.join(timeout = 5)
+            if proceso.is_alive():
+                proceso.terminate()
+        self.conexiones = list()
+        self.procesos = list()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
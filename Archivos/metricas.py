@@ -0,0 +1,157 @@
+'''
+Métricas de estado estable de la simulación de barredoras.
+
+Pensadas para la habitación con llegada continua de suciedad (ver `suciedad.py`), donde no hay un "tiempo para
+limpiar" sino una carga sostenida. Después de un calentamiento acumulan:
+    - la fracción media de celdas libres que están sucias,
+    - las celdas limpiadas por robot y por paso, los movimientos gastados por celda limpiada y la fracción de los
+      movimientos que limpian una celda,
+    - la latencia entre una solicitud de `pedir_ayuda_aux` y la limpieza de las celdas sucias que la motivaron
+      (la celda misma si estaba sucia, si no sus vecinas sucias),
+    - el uso de la batería: carga media, fracción de robots cargándose o sin batería y robots varados (los que se
+      quedaron sin batería fuera de un cargador).
+Todo se calcula en bloque con NumPy al cerrar cada paso; durante el paso solo se anotan las solicitudes.
+
+Uso:
+    modelo = Habitacion(50, 50, modo_suciedad = "Poisson", tasa_suciedad = 0.001, calentamiento = 500)
+    for _ in range(5000):
+        modelo.step()
+    print(modelo.metricas.resumen())
+'''
+
+from array import array
+
+import numpy as np
+
+
+class MetricasEstables:
+    def __init__(self, modelo, calentamiento: int = 0):
+        """
+        :param modelo: Habitación que se mide
+        :param calentamiento: Pasos iniciales que no cuentan (mientras la habitación llega al estado estable)
+        """
+        self.modelo = modelo
+        self.calentamiento = calentamiento
+        M, N = modelo.capa_suciedad.shape
+        self.celdas_libres = int(np.count_nonzero((modelo.capa_muebles == 0) & (modelo.capa_cargadores == 0)))
+
+        # Acumulados desde el fin del calentamiento
+        self.pasos = 0
+        self.suma_fraccion_sucia = 0.0
+        self.robot_pasos = 0
+        self.suma_carga = 0
+        self.robot_pasos_cargando = 0
+        self.robot_pasos_sin_bateria = 0
+        self.limpiadas_inicio = None
+        self.movimientos_inicio = None
+        self.varados_inicio = None
+
+        # Solicitudes anotadas en el paso en curso (posición plana)
+        self.nuevas = list()
+        # Solicitudes pendientes: posición, celdas que las motivaron (-1 = ninguna) y paso en el que se pidieron
+        self.posiciones_pendientes = np.empty(0, dtype = np.int64)
+        self.pendientes_celdas = np.empty((0, 9), dtype = np.int64)
+        self.pendientes_paso = np.empty(0, dtype = np.int64)
+        # Celdas con una solicitud pendiente (las repetidas no vuelven a contar)
+        self.pendiente = np.zeros(M * N, dtype = bool)
+        # Latencias (en pasos) de las solicitudes atendidas
+        self.latencias = array('i')
+
+    # ✓ Función que anota una solicitud de ayuda en una posición (durante el paso, el tiempo del modelo es el del paso)
+    def registrar_solicitud(self, pos): # métricas, posición de la solicitud
+        if self.modelo.tiempo >= self.calentamiento:
+            self.nuevas.append(pos[0] * self.modelo.grid.height + pos[1])
+
+    # ✓ Función que cierra un paso: acumula las métricas y resuelve las solicitudes atendidas
+    def registrar_paso(self): # métricas
+        modelo = self.modelo
+        # Al cerrar el paso el modelo ya aumentó su tiempo: el paso que se cierra es el anterior
+        paso = modelo.tiempo - 1
+        if paso < self.calentamiento:
+            return
+        if self.limpiadas_inicio is None:
+            self.limpiadas_inicio = modelo.celdas_limpiadas
+            self.movimientos_inicio = modelo.movimientos
+            self.varados_inicio = modelo.robots_varados
+
+        self.pasos += 1
+        self.suma_fraccion_sucia += modelo.num_celdas_sucias / self.celdas_libres if self.celdas_libres else 0.0
+
+        # Batería (de los arreglos del paso vectorizado o de los agentes)
+        N = modelo.grid.height
+        if modelo.paso_vectorizado is not None:
+            cargas, posiciones = modelo.paso_vectorizado.carga, modelo.paso_vectorizado.pos
+        else:
+            robots = modelo.schedule.agents
+            cargas = np.fromiter((robot.carga for robot in robots), dtype = np.int64, count = len(robots))
+            posiciones = np.fromiter((robot.pos[0] * N + robot.pos[1] for robot in robots), dtype = np.int64,
+                                     count = len(robots))
+        self.robot_pasos += cargas.size
+        self.suma_carga += int(cargas.sum())
+        self.robot_pasos_cargando += int(np.count_nonzero((cargas < 100) & (modelo.capa_cargadores.ravel()[posiciones] == 1)))
+        self.robot_pasos_sin_bateria += int(np.count_nonzero(cargas == 0))
+
+        self.agregar_solicitudes(paso)
+        self.resolver_solicitudes(paso)
+
+    # ✓ Función que pasa las solicitudes del paso a las pendientes, con las celdas sucias que las motivaron
+    def agregar_solicitudes(self, paso): # métricas, paso en el que se pidieron
+        if not self.nuevas:
+            return
+        posiciones = np.unique(np.array(self.nuevas, dtype = np.int64))
+        self.nuevas = list()
+        posiciones = posiciones[~self.pendiente[posiciones]]
+        if posiciones.size == 0:
+            return
+
+        suciedad = self.modelo.capa_suciedad.ravel()
+        # La celda misma si está sucia (un problema puntual); si no, sus vecinas sucias (la solicitud de un robot)
+        celdas = np.concatenate([posiciones[:, None], self.modelo.tabla_vecinos[posiciones]], axis = 1).astype(np.int64)
+        sucias = (celdas >= 0) & (suciedad[np.maximum(celdas, 0)] == 1)
+        sucias[:, 1:] &= ~sucias[:, :1]
+        celdas[~sucias] = -1
+
+        self.pendiente[posiciones] = True
+        self.posiciones_pendientes = np.concatenate([self.posiciones_pendientes, posiciones])
+        self.pendientes_celdas = np.concatenate([self.pendientes_celdas, celdas])
+        self.pendientes_paso = np.concatenate([self.pendientes_paso, np.full(posiciones.size, paso)])
+
+    # ✓ Función que registra la latencia de las solicitudes cuyas celdas ya están todas limpias
+    def resolver_solicitudes(self, paso): # métricas, paso que se cierra
+        if self.pendientes_paso.size == 0:
+            return
+        suciedad = self.modelo.capa_suciedad.ravel()
+        celdas = self.pendientes_celdas
+        atendidas = ~((celdas >= 0) & (suciedad[np.maximum(celdas, 0)] == 1)).any(axis = 1)
+        if not atendidas.any():
+            return
+
+        self.latencias.extend((paso - self.pendientes_paso[atendidas]).tolist())
+        self.pendiente[self.posiciones_pendientes[atendidas]] = False
+        self.pendientes_celdas = celdas[~atendidas]
+        self.pendientes_paso = self.pendientes_paso[~atendidas]
+        self.posiciones_pendientes = self.posiciones_pendientes[~atendidas]
+
+    # ✓ Función que devuelve las métricas acumuladas como diccionario
+    def resumen(self): # métricas
+        modelo = self.modelo
+        limpiadas = modelo.celdas_limpiadas - self.limpiadas_inicio if self.pasos else 0
+        movimientos = modelo.movimientos - self.movimientos_inicio if self.pasos else 0
+        latencias = np.frombuffer(self.latencias, dtype = np.intc) if len(self.latencias) else np.zeros(0)
+        return {
+            "pasos": self.pasos,
+            "fraccion_sucia_media": self.suma_fraccion_sucia / self.pasos if self.pasos else 0.0,
+            "limpiezas_por_robot_paso": limpiadas / self.robot_pasos if self.robot_pasos else 0.0,
+            "movimientos_por_limpieza": movimientos / limpiadas if limpiadas else 0.0,
+            "fraccion_movimientos_limpiando": limpiadas / movimientos if movimientos else 0.0,
+            "solicitudes_atendidas": int(latencias.size),
+            "solicitudes_pendientes": int(self.pendientes_paso.size),
+            "latencia_media": float(latencias.mean()) if latencias.size else 0.0,
+            "latencia_p50": float(np.percentile(latencias, 50)) if latencias.size else 0.0,
+            "latencia_p90": float(np.percentile(latencias, 90)) if latencias.size else 0.0,
+            "latencia_max": int(latencias.max()) if latencias.size else 0,
+            "carga_media": self.suma_carga / self.robot_pasos if self.robot_pasos else 0.0,
+            "fraccion_cargando": self.robot_pasos_cargando / self.robot_pasos if self.robot_pasos else 0.0,
+            "fraccion_sin_bateria": self.robot_pasos_sin_bateria / self.robot_pasos if self.robot_pasos else 0.0,
+            "robots_varados": modelo.robots_varados - self.varados_inicio if self.pasos else 0,
+        }
@@ -12,71 +12,231 @@ capaces de limpiar, evitar obstáculos y cargarse.
 --------------------------------------------------------------------------------------------------------------------------
 '''
 
-from mesa.model import Model
-from mesa.agent import Agent
-from mesa.space import MultiGrid
-from mesa.time import RandomActivation
-from mesa.datacollection import DataCollector
+# Núcleo ligero compatible con Mesa (importar Mesa carga toda su visualización; ver nucleo.py)
+from .nucleo import Model, Agent, MultiGrid, RandomActivation
 
 import numpy as np
 import math
+from array import array
+from collections import OrderedDict
+
+from .recoleccion import RecolectorDatos
+from .eventos import RegistroEventos, LIMPIEZA, MOVIMIENTO, CARGA
+
+# Distancia asignada a las celdas que no se pueden alcanzar desde el origen de un campo de distancias
+INALCANZABLE = np.iinfo(np.int32).max
+# Desplazamientos de la vecindad de Moore, en el mismo orden que `MultiGrid.get_neighborhood`
+DESPLAZAMIENTOS_MOORE = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+# Carga con la que un robot vuelve a cargarse con el modo de batería 'Fijo'
+UMBRAL_BATERIA = 30
+# Pasos seguidos que un robot puede quedarse bloqueado por otros robots antes de soltar su objetivo (modo 'Predictivo')
+PASOS_BLOQUEO = 5
+
+# ✓ Función que calcula un campo de distancias (BFS con vecindad de Moore) desde un origen, evitando los muebles
+def campo_distancias(capa_muebles: np.ndarray, origen, max_distancia: int = None) -> np.ndarray:
+    """
+    Método para calcular el número mínimo de pasos desde cada celda hasta el origen
+    :param capa_muebles: Capa de muebles del modelo (1 = obstáculo)
+    :param origen: Posición (x, y) de origen
+    :param max_distancia: Si se indica, el BFS se detiene en esa distancia (el resto queda INALCANZABLE)
+    :return: Arreglo M x N con la distancia en pasos (INALCANZABLE si no hay camino)
+    """
+    M, N = capa_muebles.shape
+    # Se agrega un borde de obstáculos para que los desplazamientos sobre el arreglo plano no den la vuelta
+    ancho = N + 2
+    libres = np.zeros((M + 2, ancho), dtype = bool)
+    libres[1:-1, 1:-1] = capa_muebles == 0
+    libres = libres.ravel()
+    desplazamientos = np.array([-ancho - 1, -ancho, -ancho + 1, -1, 1, ancho - 1, ancho, ancho + 1])
+
+    distancias = np.full(libres.size, INALCANZABLE, dtype = np.int32)
+    frontera = np.array([(origen[0] + 1) * ancho + origen[1] + 1])
+    distancias[frontera] = 0
+    libres[frontera] = False
+    # Marca auxiliar para quitar repetidos de la frontera sin ordenarla
+    marca = np.empty(libres.size, dtype = np.int64)
+
+    # Se expande la frontera completa en cada nivel del BFS
+    distancia = 0
+    while frontera.size and (max_distancia is None or distancia < max_distancia):
+        distancia += 1
+        candidatos = (frontera[:, None] + desplazamientos).ravel()
+        candidatos = candidatos[libres[candidatos]]
+        # Cada celda se queda solo con su última aparición en la lista de candidatos
+        indices = np.arange(candidatos.size)
+        marca[candidatos] = indices
+        frontera = candidatos[marca[candidatos] == indices]
+        distancias[frontera] = distancia
+        libres[frontera] = False
+
+    return distancias.reshape(M + 2, ancho)[1:-1, 1:-1].copy()
+
+# ✓ Función que ubica cargadores por k-centro (punto más lejano y refinamiento), con distancia en pasos de Moore
+def ubicar_cargadores(M: int, N: int, num_cargadores: int, reservadas = ((1, 1),), iteraciones: int = 10) -> list:
+    """
+    Método para repartir los cargadores de forma que ninguna celda quede demasiado lejos de uno
+    :param M: Ancho de la habitación
+    :param N: Alto de la habitación
+    :param num_cargadores: Número de cargadores a ubicar
+    :param reservadas: Posiciones en las que no se puede poner un cargador
+    :param iteraciones: Número máximo de refinamientos (cada centro se mueve al centro de las celdas que atiende)
+    :return: Lista de posiciones (x, y) de los cargadores
+    """
+    if num_cargadores < 1:
+        raise ValueError(f"num_cargadores debe ser al menos 1 (se recibió {num_cargadores})")
+    num_cargadores = min(num_cargadores, M * N - len(reservadas))
+    xs, ys = np.divmod(np.arange(M * N), N)
+
+    # Punto más lejano: se empieza en el centro y se agrega la celda más alejada de los cargadores ya elegidos
+    centros = [(M // 2, N // 2)]
+    distancia = np.maximum(np.abs(xs - M // 2), np.abs(ys - N // 2))
+    while len(centros) < num_cargadores:
+        i = int(distancia.argmax())
+        centros.append((int(xs[i]), int(ys[i])))
+        distancia = np.minimum(distancia, np.maximum(np.abs(xs - xs[i]), np.abs(ys - ys[i])))
+
+    # Refinamiento: cada celda se asigna a su cargador más cercano y el cargador se mueve al centro de su región
+    for _ in range(iteraciones):
+        asignacion = np.zeros(M * N, dtype = np.int64)
+        distancia = np.full(M * N, M + N)
+        for j, (cx, cy) in enumerate(centros):
+            distancia_centro = np.maximum(np.abs(xs - cx), np.abs(ys - cy))
+            mas_cerca = distancia_centro < distancia
+            asignacion[mas_cerca] = j
+            distancia[mas_cerca] = distancia_centro[mas_cerca]
+        x_min, x_max = np.full(len(centros), M), np.full(len(centros), -1)
+        y_min, y_max = np.full(len(centros), N), np.full(len(centros), -1)
+        np.minimum.at(x_min, asignacion, xs)
+        np.maximum.at(x_max, asignacion, xs)
+        np.minimum.at(y_min, asignacion, ys)
+        np.maximum.at(y_max, asignacion, ys)
+        nuevos = [((int(x_min[j]) + int(x_max[j])) // 2, (int(y_min[j]) + int(y_max[j])) // 2) if x_max[j] >= 0 else centro
+                  for j, centro in enumerate(centros)]
+        if nuevos == centros:
+            break
+        centros = nuevos
+
+    # Los cargadores repetidos o en posiciones reservadas se mueven a la celda libre más cercana
+    ocupadas = set(reservadas)
+    posiciones = list()
+    for cx, cy in centros:
+        radio = 0
+        while True:
+            libres = [(x, y) for x in range(cx - radio, cx + radio + 1) for y in range(cy - radio, cy + radio + 1)
+                      if 0 <= x < M and 0 <= y < N and (x, y) not in ocupadas]
+            if libres:
+                break
+            radio += 1
+        ocupadas.add(libres[0])
+        posiciones.append(libres[0])
+    return posiciones
+
+# ✓ Función que precalcula los vecinos transitables (sin muebles) de cada celda como índices planos
+def tabla_vecinos(capa_muebles: np.ndarray) -> np.ndarray:
+    """
+    Método para construir la tabla de vecinos de la habitación (la distribución de muebles no cambia)
+    :param capa_muebles: Capa de muebles del modelo (1 = obstáculo)
+    :return: Arreglo (M * N) x 8 con el índice plano (x * N + y) de cada vecino de Moore, -1 si no existe o es mueble
+    """
+    M, N = capa_muebles.shape
+    xs, ys = np.divmod(np.arange(M * N, dtype = np.int32), N)
+    muebles = capa_muebles.ravel() == 1
+    tabla = np.full((M * N, len(DESPLAZAMIENTOS_MOORE)), -1, dtype = np.int32)
+    # Una columna por desplazamiento, para no crear arreglos intermedios de M * N * 8
+    for k, (dx, dy) in enumerate(DESPLAZAMIENTOS_MOORE):
+        x, y = xs + dx, ys + dy
+        validos = (x >= 0) & (x < M) & (y >= 0) & (y < N)
+        indices = np.where(validos, x * N + y, 0)
+        validos &= ~muebles[indices]
+        tabla[validos, k] = indices[validos]
+    return tabla
+
+class CampoAcotado:
+    # Campo de distancias calculado solo en una ventana de `radio` celdas alrededor del origen (fuera, INALCANZABLE)
+    def __init__(self, capa_muebles: np.ndarray, origen, radio: int):
+        M, N = capa_muebles.shape
+        self.N = N
+        self.x0, self.y0 = max(0, origen[0] - radio), max(0, origen[1] - radio)
+        x1, y1 = min(M, origen[0] + radio + 1), min(N, origen[1] + radio + 1)
+        # Un camino de a lo más `radio` pasos nunca sale de la ventana, así que esas distancias son exactas
+        self.distancias = campo_distancias(capa_muebles[self.x0:x1, self.y0:y1],
+                                           (origen[0] - self.x0, origen[1] - self.y0), radio)
+
+    def __getitem__(self, pos):
+        x, y = pos[0] - self.x0, pos[1] - self.y0
+        if 0 <= x < self.distancias.shape[0] and 0 <= y < self.distancias.shape[1]:
+            return self.distancias[x, y]
+        return INALCANZABLE
 
 class Celda(Agent):
-    def __init__(self, unique_id, model, suciedad: bool = False):
+    # Vista de compatibilidad: la suciedad real vive en la capa `capa_suciedad` del modelo
+    def __init__(self, unique_id, model, pos):
         super().__init__(unique_id, model)
-        self.sucia = suciedad
+        self.pos = pos
+
+    @property
+    def sucia(self):
+        return bool(self.model.capa_suciedad[self.pos])
+
+    @sucia.setter
+    def sucia(self, suciedad: bool):
+        if suciedad:
+            self.model.ensuciar_celda(self.pos)
+        else:
+            self.model.limpiar_celda(self.pos)
 
 class Mueble(Agent):
-    def __init__(self, unique_id, model):
+    # Vista de compatibilidad: los muebles reales viven en la capa `capa_muebles` del modelo
+    def __init__(self, unique_id, model, pos = None):
         super().__init__(unique_id, model)
+        self.pos = pos
         
 class Cargador(Agent):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
 
 class RobotLimpieza(Agent):
-    def __init__(self, unique_id, model):
+    def __init__(self, unique_id, model, estrategia = None):
         super().__init__(unique_id, model)
+        # Estrategia de recorrido cuando no hay celdas sucias alrededor (por defecto, la del modelo)
+        self.estrategia = estrategia if estrategia is not None else model.estrategia
         self.sig_pos = None
         self.movimientos = 0
         self.carga = 100
         self.objetivo = None
         self.celdas_sucias = 0
+        self.pasos_bloqueado = 0
 
-    # ✓ Función que encuentra las celdas disponibles alrededor de un robot
-    def buscar_celdas_disponibles(self, tipo_agente): # robot, tipo de agente a buscar
-        # Encuentra los vecinos
-        vecinos = self.model.grid.get_neighbors(self.pos, moore = True, include_center = False)
-
-        # Lista de celdas
-        celdas = list()
-
-        # Para cada uno de los vecinos
-        for vecino in vecinos:
-            # Si el elemento es una instancia del elemento del tipo de agente
-            if isinstance(vecino, tipo_agente):
-                celdas.append(vecino) # Lo mete al arreglo de celdas
+    # En un checkpoint no se guardan las reglas medidas por el perfilado (se vuelven a instrumentar al restaurar)
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        for metodo in ("regla_cargar", "regla_viajar", "regla_bateria_baja", "regla_limpiar"):
+            estado.pop(metodo, None)
+        return estado
 
-        # Lista de celdas disponibles
-        celdas_disponibles = list()
+    # ✓ Función que encuentra las posiciones disponibles alrededor de un robot
+    def buscar_celdas_disponibles(self, tipo_agente): # robot, tipo de agente a buscar (Celda, Cargador o ambos)
+        # Se determina qué capas se buscan a partir del tipo de agente
+        tipos = tipo_agente if isinstance(tipo_agente, tuple) else (tipo_agente,)
+        buscar_celdas = Celda in tipos
+        buscar_cargadores = Cargador in tipos
 
-        # Por cada una de las celdas
-        for celda in celdas:
-            # Se obtiene la posición de cada una de las celdas y puede incluir varios agentes y otros objetos en la celda.
-            posicion_celda = self.model.grid.get_cell_list_contents(celda.pos)
-            # Esto lo hace para evitar una celda ocupada por un robot
-            robots_cargando = [agente for agente in posicion_celda if isinstance(agente, RobotLimpieza)]
+        if not (buscar_celdas or buscar_cargadores):
+            return []
 
-            # Si no están esos robots 
-            if not robots_cargando:
-                # Mete la celda a una disponible
-                celdas_disponibles.append(celda)
-
-        # Se devuelven las celdas disponibles
-        return celdas_disponibles
+        # Vecinos de la posición según la tabla del modelo (los muebles ya están excluidos)
+        N = self.model.grid.height
+        vecinos = self.model.tabla_vecinos[self.pos[0] * N + self.pos[1]].tolist()
+        # Se devuelven las posiciones sin robots (según el mapa de ocupación del modelo) del tipo buscado
+        ocupacion = self.model.ocupacion_robots
+        if buscar_celdas and buscar_cargadores:
+            return [divmod(indice, N) for indice in vecinos if indice >= 0 and not ocupacion[indice]]
+        es_cargador = self.model.mascara_cargadores
+        return [divmod(indice, N) for indice in vecinos
+                if indice >= 0 and not ocupacion[indice] and es_cargador[indice] == buscar_cargadores]
 
     # ✓ Función que encuentra una celda sucia y procede a limpiarla
-    def limpiar_una_celda(self, celdas_sucias): # robot, listado de celdas sucias
+    def limpiar_una_celda(self, celdas_sucias): # robot, listado de posiciones sucias
         # Si no hay celdas sucias
         if len(celdas_sucias) == 0:
             # El robot se queda quieto
@@ -85,25 +245,19 @@ class RobotLimpieza(Agent):
         else:
             # De lo contrario, comienza la limpieza y elige una celda random de la lista de celdas sucias
             celda_elegida = self.random.choice(celdas_sucias)
-            # Ahora, marca esa celda sucia como limpia
-            celda_elegida.sucia = False
+            # Ahora, marca esa celda sucia como limpia (y actualiza el índice del modelo)
+            self.model.limpiar_celda(celda_elegida, self)
             # Disminuye de las celdas sucias esa celda
             self.celdas_sucias -= 1
             # La siguiente posición es la nueva posición a limpiar
-            self.sig_pos = celda_elegida.pos
+            self.sig_pos = celda_elegida
 
     # ✓ Función que selecciona la nueva posición a avanzar
     def seleccionar_nueva_pos(self): # robot
         # Encuentra todas las celdas disponibles
         celdas_disponibles = self.buscar_celdas_disponibles((Celda))
-        # Si no hay celdas disponibles
-        if len(celdas_disponibles) == 0:
-            # El robot se queda quieto
-            self.sig_pos = self.pos
-            return # Sale de la función
-        else:
-            # De lo contrario, busca una posición random dentro de los vecinos
-            self.sig_pos = self.random.choice(celdas_disponibles).pos
+        # La estrategia elige a cuál moverse (o si el robot se queda quieto)
+        self.sig_pos = self.estrategia.siguiente_pos(self, celdas_disponibles)
 
     # ✓ Función que calcula la distancia entre 2 puntos
     def distancia_euclidiana(self, punto1, punto2): # robot, dos coordenadas a comparar (punto #1 y punto #2)
@@ -111,53 +265,74 @@ class RobotLimpieza(Agent):
     
     # ✓ Función que selecciona un cargador y lo establece como objetivo del robot
     def seleccionar_cargador(self, cargadores): # robot, listado de cargadores
-        # Se inicializan variables del cargador más cercano y la distancia mínima
-        cargador_mas_cercano = cargadores[0]
-        distancia_minima = float("infinity")
-
-        # Por cada cargador en la lista de cargadores
-        for cargador in cargadores:
-            # Se encuentra la distancia actual entre la posición del robot y el cargador
-            distancia_actual = self.distancia_euclidiana(cargador, self.pos)  
-            # Si la distancia actual encontrada es menor a la distancia mínima
-            if distancia_actual < distancia_minima:
-                # La distancia mínima se reemplaza por la distancia actual
-                distancia_minima = distancia_actual
-                # El cargador se asigna como el más cercano
-                cargador_mas_cercano = cargador
-
-        # El objetivo es el cargador más cercano
-        self.objetivo = cargador_mas_cercano
+        # Distancia (en pasos, evitando muebles) entre la posición del robot y cada cargador
+        distancias = [self.model.get_campo_distancias(cargador)[self.pos] for cargador in cargadores]
+        # El objetivo es el cargador con menor espera esperada más viaje (queda reservado para el robot)
+        self.objetivo = self.model.asignar_cargador(self.unique_id, distancias, self.carga)
+        # Se descarta lo que tenía planeado la estrategia de recorrido
+        self.estrategia.olvidar(self.unique_id)
 
     # ✓ Función que mueve un robot a una posición específica
     def viajar_a_objetivo(self): # robot
         # Si tiene como objetivo ir a un cargador    
-        if self.objetivo in self.model.pos_cargadores:
+        a_cargador = self.model.capa_cargadores[self.objetivo]
+        if a_cargador:
             # Busca las celdas en donde están los cargadores
             celdas_objetivo = self.buscar_celdas_disponibles((Celda, Cargador))
         else:
             # De lo contrario, busca cualquier tipo de celda disponible
             celdas_objetivo = self.buscar_celdas_disponibles((Celda))
 
+        # Campo de distancias (camino más corto evitando muebles) hacia el objetivo
+        campo = self.model.get_campo_distancias(self.objetivo, self.pos)
+
+        # Si el objetivo no se puede alcanzar desde aquí, se descarta
+        if campo[self.pos] == INALCANZABLE:
+            self.objetivo = None
+            self.model.liberar_cargador(self.unique_id)
+            self.sig_pos = self.pos
+            return # Sale de la función
+
+        # Con el planificador predictivo, si llegaría al cargador antes de su turno, espera donde está (sin gastar batería)
+        if (a_cargador and self.model.modo_bateria == 'Predictivo'
+                and self.model.espera_cargador(self.unique_id, self.objetivo, int(campo[self.pos])) > 0):
+            self.sig_pos = self.pos
+            return # Sale de la función
+
         # Si no hay celdas disponibles
         if len(celdas_objetivo) == 0:
             # El robot se queda quieto
-            self.sig_pos = self.pos
+            self.esperar_bloqueado()
             return # Sale de la función
         else:
-            # De lo contrario, ordena de menor a mayor las distancias entre el objetivo y el siguiente paso a dar
-            celdas_objetivo = sorted(celdas_objetivo, key = lambda vecino: self.distancia_euclidiana(self.objetivo, vecino.pos))
-            # Selecciona el recorrido más corto (el menor del sorted) como siguiente posición
-            self.sig_pos = celdas_objetivo[0].pos
-            # Se obtiene la posición de cada una de las celdas y puede incluir varios agentes y otros objetos en la celda.
-            celdas = self.model.grid.get_cell_list_contents(self.sig_pos)
-            # Por cada celda en las celdas
-            for celda in celdas:
-                # Si en el proceso de llegar al cargador hay una celda sucia
-                if isinstance(celda, Celda) and celda.sucia:
-                    # Procede a limpiarla
-                    celda.sucia = False
+            # De lo contrario, elige el vecino con menor distancia al objetivo según el campo
+            siguiente = min(celdas_objetivo, key = lambda vecino: campo[vecino])
+            # Si el paso alejaría al robot del objetivo (vecinos bloqueados por robots), mejor espera; con el
+            # planificador predictivo, camino al cargador solo se rodea (paso a la misma distancia) si sobra batería
+            estricto = (a_cargador and self.model.modo_bateria == 'Predictivo'
+                        and self.carga <= campo[self.pos] + 1)
+            limite = campo[self.pos] - 1 if estricto else campo[self.pos]
+            if campo[siguiente] > limite:
+                self.esperar_bloqueado()
+                return # Sale de la función
+            self.sig_pos = siguiente
+            self.pasos_bloqueado = 0
+            # Si en el proceso de llegar al objetivo hay una celda sucia, procede a limpiarla
+            self.model.limpiar_celda(self.sig_pos, self)
     
+    # ✓ Función que deja quieto a un robot al que otros robots le cierran el paso hacia su objetivo
+    def esperar_bloqueado(self): # robot
+        self.sig_pos = self.pos
+        if self.model.modo_bateria != 'Predictivo':
+            return # Sale de la función
+        # Con el planificador predictivo, tras varios pasos bloqueado suelta el objetivo para no trabar a los demás:
+        # una solicitud de ayuda se abandona y el lugar en la cola del cargador se libera (se vuelve a elegir después)
+        self.pasos_bloqueado += 1
+        if self.pasos_bloqueado >= PASOS_BLOQUEO:
+            self.objetivo = None
+            self.model.liberar_cargador(self.unique_id)
+            self.pasos_bloqueado = 0
+
     # ✓ Función que carga la batería de un robot
     def cargar_robot(self): # robot
         # Si la carga del robot es menor a 100
@@ -168,10 +343,18 @@ class RobotLimpieza(Agent):
             self.carga = min(self.carga, 100)
             # Mientras esté cargando, el robot se queda quieto
             self.sig_pos = self.pos
+            # Se registra el evento de carga (con la carga alcanzada)
+            if self.model.eventos is not None:
+                self.model.eventos.registrar(self.model.tiempo, CARGA, self.unique_id, self.pos, self.carga)
 
             # Si la carga es 100, cantidad de cargas completas aumenta en 1 (para gráficas)
             if self.carga == 100:
                 self.model.cantidad_recargas += 1
+                # El cargador queda libre para el siguiente robot en la cola
+                self.model.liberar_cargador(self.unique_id)
+            else:
+                # Se actualizan los pasos de carga que le quedan en la cola
+                self.model.actualizar_reserva(self.unique_id, self.carga)
 
     # ✓ Función para verificar si un robot puede ayudar a resolver un problema
     def pedir_ayuda(self, pos): # robot, posición de ayuda
@@ -182,24 +365,18 @@ class RobotLimpieza(Agent):
         else:
             # De lo contrario, el objetivo toma lugar como la solicitud
             self.objetivo = pos
+            # Se descarta lo que tenía planeado la estrategia de recorrido
+            self.estrategia.olvidar(self.unique_id)
+            # El robot deja de estar disponible en el índice espacial
+            self.model.indice_robots.actualizar(self)
             # Se procesa la solicitud
             return True
     
     # ✓ Función para encontrar todos las celdas vecinas que están sucias
-    @staticmethod
-    def buscar_celdas_sucias(lista_de_vecinos): # listado de vecinos
-        # Se inicializa una lista de celdas sucias
-        celdas_sucias = list()
-
-        # Para cada celda vecina
-        for vecino in lista_de_vecinos:
-            # Si se encuentra sucia
-            if isinstance(vecino, Celda) and vecino.sucia:
-                # Se agrega a la lista de celdas sucias
-                celdas_sucias.append(vecino)
-
-        # Se devuelven las celdas sucias
-        return celdas_sucias
+    def buscar_celdas_sucias(self, lista_de_vecinos): # robot, listado de posiciones vecinas
+        # Se consulta directamente la capa de suciedad del modelo
+        capa_suciedad = self.model.capa_suciedad
+        return [vecino for vecino in lista_de_vecinos if capa_suciedad[vecino]]
 
     # ✓ Función encargada de ejecutar un paso en la simulación 
     def step(self): # robot
@@ -207,43 +384,63 @@ class RobotLimpieza(Agent):
         if self.pos == self.objetivo:
             # Se desmarca el objetivo
             self.objetivo = None
+        # Con el planificador predictivo, una solicitud de ayuda se abandona cuando ya hay que volver a cargarse
+        if (self.objetivo and self.model.modo_bateria == 'Predictivo' and not self.model.capa_cargadores[self.objetivo]
+                and self.model.necesita_cargar(self.pos, self.carga)):
+            self.objetivo = None
         
         # REGLAS DE LA SIMULACIÓN
         # 1. El robot se encuentra cargándose
-        if self.carga < 100 and self.pos in self.model.pos_cargadores:
-            # Aumentar la carga
-            self.cargar_robot()
+        if self.carga < 100 and self.model.capa_cargadores[self.pos]:
+            self.regla_cargar()
         # 2. El robot tiene un cargador asignado y está viajando hacia este
         elif self.objetivo:
-            # Acercarse al cargador
-            self.viajar_a_objetivo()
+            self.regla_viajar()
         # 3. El robot tiene batería baja y necesita cargarse
-        elif self.carga <= 30:
-            # Se le asigna el cargador más cercano y se acerca al cargador
-            self.seleccionar_cargador(self.model.pos_cargadores)
-            self.viajar_a_objetivo()
+        elif self.model.necesita_cargar(self.pos, self.carga):
+            self.regla_bateria_baja()
         # 4. El robot se encarga de limpiar celdas
         else:
-            # Obtiene las celdas sucias
-            celdas_sucias = self.buscar_celdas_sucias(self.buscar_celdas_disponibles(Celda))
-            # Actualiza el número de celdas sucias alrededor
-            self.celdas_sucias = len(celdas_sucias)
-            # Si el tamaño de las celdas sucias es 0
-            if self.celdas_sucias == 0:
-                # El robot se mueve a una posición random o se queda quieto
-                self.seleccionar_nueva_pos()
-            else:
-                # De lo contrario, si el número de celdas sucias es mayor o igual a 3
-                if self.celdas_sucias >= 4:
-                    # Se agrega un problema
-                    self.model.pedir_ayuda_aux(self.pos, self.celdas_sucias)
-                
-                # Limpia una celda
-                self.limpiar_una_celda(celdas_sucias)
+            self.regla_limpiar()
 
         # Se avanza en la simulación
         self.advance()
 
+    # ✓ Regla 1: el robot se encuentra cargándose
+    def regla_cargar(self): # robot
+        # Aumentar la carga
+        self.cargar_robot()
+
+    # ✓ Regla 2: el robot tiene un objetivo asignado y está viajando hacia este
+    def regla_viajar(self): # robot
+        # Acercarse al objetivo
+        self.viajar_a_objetivo()
+
+    # ✓ Regla 3: el robot tiene batería baja y necesita cargarse
+    def regla_bateria_baja(self): # robot
+        # Se le asigna el cargador más cercano y se acerca al cargador
+        self.seleccionar_cargador(self.model.pos_cargadores)
+        self.viajar_a_objetivo()
+
+    # ✓ Regla 4: el robot se encarga de limpiar celdas
+    def regla_limpiar(self): # robot
+        # Obtiene las celdas sucias
+        celdas_sucias = self.buscar_celdas_sucias(self.buscar_celdas_disponibles(Celda))
+        # Actualiza el número de celdas sucias alrededor
+        self.celdas_sucias = len(celdas_sucias)
+        # Si el tamaño de las celdas sucias es 0
+        if self.celdas_sucias == 0:
+            # El robot se mueve a una posición random o se queda quieto
+            self.seleccionar_nueva_pos()
+        else:
+            # De lo contrario, si el número de celdas sucias es mayor o igual a 3
+            if self.celdas_sucias >= 4:
+                # Se agrega un problema
+                self.model.pedir_ayuda_aux(self.pos, self.celdas_sucias)
+
+            # Limpia una celda
+            self.limpiar_una_celda(celdas_sucias)
+
     # ✓ Función encargada para avanzar al robot en la simulación
     def advance(self): # robot
         # Si el robot no se quedó quieto
@@ -254,7 +451,140 @@ class RobotLimpieza(Agent):
 
             # Se disminuye la carga en 1
             self.carga -= 1
-            self.model.grid.move_agent(self, self.sig_pos)
+            self.model.mover_robot(self, self.sig_pos)
+            # Se registra el evento de movimiento (con la carga restante)
+            if self.model.eventos is not None:
+                self.model.eventos.registrar(self.model.tiempo, MOVIMIENTO, self.unique_id, self.pos, self.carga)
+            # Un robot sin batería fuera de un cargador ya no llegará: queda varado y deja libre su lugar en la cola
+            if self.carga == 0 and not self.model.capa_cargadores[self.pos]:
+                self.model.robots_varados += 1
+                self.model.liberar_cargador(self.unique_id)
+
+        # Se actualiza la posición (y disponibilidad) del robot en el índice espacial
+        self.model.indice_robots.actualizar(self)
+
+
+class IndiceRobotsLibres:
+    # Índice espacial por cubetas de los robots disponibles para atender problemas (sin objetivo ni basura alrededor)
+    def __init__(self, M: int, N: int, tamano_cubeta: int = 8):
+        self.tamano_cubeta = tamano_cubeta
+        self.num_cubetas_x = math.ceil(M / tamano_cubeta)
+        self.num_cubetas_y = math.ceil(N / tamano_cubeta)
+        # Cada cubeta es un diccionario (ordenado por inserción) de robots, para que los recorridos sean deterministas
+        self.cubetas = dict()
+        # Cubeta en la que está registrado cada robot disponible
+        self.cubeta_robot = dict()
+
+    # ✓ Función que obtiene la cubeta de una posición
+    def cubeta(self, pos): # índice, posición
+        return (pos[0] // self.tamano_cubeta, pos[1] // self.tamano_cubeta)
+
+    # ✓ Función que registra, mueve o retira a un robot del índice según su disponibilidad
+    def actualizar(self, robot): # índice, robot
+        anterior = self.cubeta_robot.get(robot)
+        nueva = self.cubeta(robot.pos) if (robot.celdas_sucias == 0 and not robot.objetivo) else None
+        if anterior == nueva:
+            return
+
+        # Se retira de la cubeta anterior
+        if anterior is not None:
+            del self.cubetas[anterior][robot]
+            del self.cubeta_robot[robot]
+        # Se registra en la nueva cubeta
+        if nueva is not None:
+            self.cubetas.setdefault(nueva, dict())[robot] = None
+            self.cubeta_robot[robot] = nueva
+
+    # ✓ Función que retira a un robot del índice (cuando sale del modelo)
+    def quitar(self, robot): # índice, robot
+        cubeta = self.cubeta_robot.pop(robot, None)
+        if cubeta is not None:
+            del self.cubetas[cubeta][robot]
+
+    # ✓ Función que obtiene las cubetas que están exactamente a `anillo` cubetas de distancia de (cx, cy)
+    @staticmethod
+    def cubetas_anillo(cx, cy, anillo): # coordenadas de la cubeta central, radio del anillo
+        if anillo == 0:
+            yield (cx, cy)
+            return
+        for bx in range(cx - anillo, cx + anillo + 1):
+            yield (bx, cy - anillo)
+            yield (bx, cy + anillo)
+        for by in range(cy - anillo + 1, cy + anillo):
+            yield (cx - anillo, by)
+            yield (cx + anillo, by)
+
+    # ✓ Función que encuentra el robot disponible más cercano a una posición (búsqueda por anillos de cubetas)
+    def mas_cercano(self, pos): # índice, posición
+        # Si no hay robots disponibles no hace falta buscar
+        if not self.cubeta_robot:
+            return None
+
+        cx, cy = self.cubeta(pos)
+        mejor = None
+        mejor_clave = None
+        max_anillo = max(cx, cy, self.num_cubetas_x - 1 - cx, self.num_cubetas_y - 1 - cy)
+
+        for anillo in range(max_anillo + 1):
+            # Se revisan las cubetas que están exactamente a `anillo` cubetas de distancia
+            for cubeta in self.cubetas_anillo(cx, cy, anillo):
+                for robot in self.cubetas.get(cubeta, ()):
+                    distancia = (robot.pos[0] - pos[0]) ** 2 + (robot.pos[1] - pos[1]) ** 2
+                    clave = (distancia, robot.unique_id)
+                    if mejor_clave is None or clave < mejor_clave:
+                        mejor, mejor_clave = robot, clave
+
+            # Ningún robot en anillos más lejanos puede estar a menos de anillo * tamano_cubeta
+            if mejor is not None and mejor_clave[0] <= (anillo * self.tamano_cubeta) ** 2:
+                break
+
+        return mejor
+
+    # ✓ Función que encuentra los `k` robots disponibles más cercanos a una posición (con su distancia)
+    def k_mas_cercanos(self, pos, k: int): # índice, posición, número de robots
+        if not self.cubeta_robot:
+            return list()
+
+        # Con pocos robots libres no hace falta seguir buscando el k-ésimo
+        k = min(k, len(self.cubeta_robot))
+        cx, cy = self.cubeta(pos)
+        encontrados = list()
+        max_anillo = max(cx, cy, self.num_cubetas_x - 1 - cx, self.num_cubetas_y - 1 - cy)
+
+        for anillo in range(max_anillo + 1):
+            for cubeta in self.cubetas_anillo(cx, cy, anillo):
+                for robot in self.cubetas.get(cubeta, ()):
+                    distancia = (robot.pos[0] - pos[0]) ** 2 + (robot.pos[1] - pos[1]) ** 2
+                    encontrados.append((distancia, robot.unique_id, robot))
+
+            # Igual que en `mas_cercano`: se para cuando el k-ésimo ya no puede mejorar con anillos más lejanos
+            if len(encontrados) >= k:
+                encontrados.sort(key = lambda encontrado: encontrado[:2])
+                del encontrados[k:]
+                if encontrados[-1][0] <= (anillo * self.tamano_cubeta) ** 2:
+                    break
+
+        encontrados.sort(key = lambda encontrado: encontrado[:2])
+        return [(math.sqrt(distancia), robot) for distancia, _, robot in encontrados[:k]]
+
+    # ✓ Función que encuentra los `k` robots disponibles más cercanos a cada posición de un listado
+    def k_mas_cercanos_lote(self, posiciones, k: int, max_pares: int = 1 << 20): # índice, posiciones, número de robots, límite de pares
+        if not self.cubeta_robot or not posiciones:
+            return [list() for _ in posiciones]
+        # Con muchos robots libres, la búsqueda por anillos termina pronto para cada posición
+        if len(posiciones) * len(self.cubeta_robot) > max_pares:
+            return [self.k_mas_cercanos(pos, k) for pos in posiciones]
+
+        # Con pocos, recorrería casi toda la habitación por cada posición: se miden todas las distancias de una vez
+        robots = sorted(self.cubeta_robot, key = lambda robot: robot.unique_id)
+        k = min(k, len(robots))
+        diferencias = np.array(posiciones, dtype = np.int64)[:, None, :] - np.array([robot.pos for robot in robots])
+        distancias = (diferencias ** 2).sum(axis = 2)
+        # Orden estable: a igual distancia queda primero el de menor id, igual que en `k_mas_cercanos`
+        orden = np.argsort(distancias, axis = 1, kind = 'stable')[:, :k]
+        cercanas = np.sqrt(np.take_along_axis(distancias, orden, axis = 1))
+        return [[(distancia, robots[j]) for distancia, j in zip(fila_distancias, fila_orden)]
+                for fila_distancias, fila_orden in zip(cercanas.tolist(), orden.tolist())]
 
 
 class Habitacion(Model):
@@ -263,7 +593,30 @@ class Habitacion(Model):
                  porc_celdas_sucias: float = 0.6,
                  porc_muebles: float = 0.1,
                  modo_pos_inicial: str = 'Fija',
+                 estrategia: str = 'Aleatoria',
+                 modo_cargadores: str = 'Fija',
+                 num_cargadores: int = 4,
+                 modo_bateria: str = 'Fijo',
+                 margen_bateria: int = 5,
+                 pos_cargadores: list = None,
+                 plano: dict = None,
+                 modo_asignacion: str = 'Voraz',
+                 modo_suciedad: str = 'Ninguna',
+                 tasa_suciedad: float = 0.001,
+                 num_focos: int = 4,
+                 calentamiento: int = 0,
+                 medir_metricas: bool = False,
+                 max_campos_objetivo: int = None,
+                 modo_vectorizado: bool = False,
+                 intervalos_recoleccion: dict = None,
+                 capacidad_grid: int = 100,
+                 ruta_eventos: str = None,
+                 perfilar: bool = False,
+                 ruta_perfil: str = None,
+                 seed: int = None,
                  ):
+        # Inicializa el modelo base de Mesa (running, schedule); la semilla la toma Mesa al crear el modelo
+        super().__init__()
 
         self.num_agentes = num_agentes
         self.porc_celdas_sucias = porc_celdas_sucias
@@ -275,158 +628,513 @@ class Habitacion(Model):
         center_y = (N // 2) + 5
 
         # Se guardan las posiciones de los cargadores
-        self.pos_cargadores = [
-            (center_x, center_y),
-            (center_x - 11, center_y),
-            (center_x, center_y - 11),
-            (center_x - 11, center_y - 11)
-        ]
+        if pos_cargadores is not None:
+            # Posiciones indicadas explícitamente
+            self.pos_cargadores = [tuple(pos) for pos in pos_cargadores]
+            if not self.pos_cargadores:
+                raise ValueError("pos_cargadores debe indicar al menos un cargador")
+        else:
+            # 'Fija': los cuatro cargadores originales alrededor del centro
+            self.pos_cargadores = [
+                (center_x, center_y),
+                (center_x - 11, center_y),
+                (center_x, center_y - 11),
+                (center_x - 11, center_y - 11)
+            ]
+            # 'Automatica' (o si el arreglo fijo no cabe en la habitación): k-centro con `num_cargadores` cargadores
+            fuera = any(not (0 <= x < M and 0 <= y < N) or (x, y) == (1, 1) for x, y in self.pos_cargadores)
+            if modo_cargadores == 'Automatica' or fuera:
+                self.pos_cargadores = ubicar_cargadores(M, N, num_cargadores)
+
+        # Cola de reservas de cada cargador: id del robot -> (paso estimado de llegada, pasos de carga)
+        self.reservas_cargadores = {pos: dict() for pos in self.pos_cargadores}
+        # Cargador reservado por cada robot
+        self.cargador_reservado = dict()
 
         # Inicializamos un listado de problemas
         self.problemas = list()
 
+        # Registro opcional de eventos en disco (None = desactivado)
+        self.eventos = RegistroEventos(ruta_eventos) if ruta_eventos else None
+        # Perfilado opcional por fase del step y por regla de los robots (None = desactivado)
+        self.perfil = None
+        if perfilar or ruta_perfil:
+            from .perfil import EstadisticasPerfil
+            self.perfil = EstadisticasPerfil(ruta_perfil)
+
         # Inicialización de variables para gráficas
         self.tiempo = 0
         self.movimientos = 0
         self.cantidad_recargas = 0
+        self.celdas_limpiadas = 0
+        # Robots que se quedaron sin batería fuera de un cargador
+        self.robots_varados = 0
 
-        # Permite la habilitación de las capas en el ambiente
+        # Permite la habilitación de las capas en el ambiente (solo contiene robots y cargadores)
         self.grid = MultiGrid(M, N, False)
+        # Capas compactas del piso: suciedad, muebles y cargadores (1 = presente)
+        self.capa_suciedad = np.zeros((M, N), dtype = np.uint8)
+        self.capa_muebles = np.zeros((M, N), dtype = np.uint8)
+        self.capa_cargadores = np.zeros((M, N), dtype = np.uint8)
         # Permite que los robots se activen en un órden aleatorio
         self.schedule = RandomActivation(self)
 
-        posiciones_disponibles = [pos for _, pos in self.grid.coord_iter()]
+        # Máscara de celdas disponibles; las posiciones se muestrean como índices planos (x * N + y), en el mismo
+        # orden que recorre la grid, para no construir ni modificar listas de tuplas en la construcción
+        disponibles = np.ones((M, N), dtype = bool)
 
         # Removemos la posición 1, 1 para el estado Fijo de la simulación
-        posiciones_disponibles.remove((1, 1))
+        disponibles[1, 1] = False
 
-        # Posicionamiento de cargadores
-        for id, pos in enumerate(self.pos_cargadores):
-            cargador = Cargador(int(f"{num_agentes}0{id}") + 1, self)
+        # Con un plano precalculado, los ids de sus robots (y los reservados fuera del modelo) ya están asignados:
+        # el contador empieza después de ellos
+        if plano is not None:
+            self.current_id = max([self.current_id, plano.get("ultimo_id", 0)] + list(plano.get("ids_robots", ())))
+
+        # Posicionamiento de cargadores (los ids se asignan con el contador del modelo, sin colisiones)
+        for pos in self.pos_cargadores:
+            cargador = Cargador(self.next_id(), self)
             self.grid.place_agent(cargador, pos)
-            posiciones_disponibles.remove(pos)
-
-        # Posicionamiento de muebles
-        num_muebles = int(M * N * porc_muebles)
-        posiciones_muebles = self.random.sample(posiciones_disponibles, k = num_muebles)
-        for id, pos in enumerate(posiciones_muebles):
-            mueble = Mueble(int(f"{num_agentes}0{id}") + 1, self)
-            self.grid.place_agent(mueble, pos)
-            posiciones_disponibles.remove(pos)
-
-        # Posicionamiento de celdas sucias
-        self.celdas_sucias = int(M * N * porc_celdas_sucias)
-        posiciones_celdas_sucias = self.random.sample(posiciones_disponibles, k = self.celdas_sucias)
-        for id, pos in enumerate(posiciones_disponibles):
-            suciedad = pos in posiciones_celdas_sucias
-            celda = Celda(int(f"{num_agentes}{id}") + 1, self, suciedad)
-            self.grid.place_agent(celda, pos)
+            self.capa_cargadores[pos] = 1
+            disponibles[pos] = False
+
+        # Posicionamiento de muebles (del plano o aleatorio)
+        if plano is not None:
+            self.capa_muebles[:] = plano["muebles"]
+            disponibles &= self.capa_muebles == 0
+        else:
+            num_muebles = int(M * N * porc_muebles)
+            posiciones_muebles = self.random.sample(np.flatnonzero(disponibles).tolist(), k = num_muebles)
+            self.capa_muebles.ravel()[posiciones_muebles] = 1
+            disponibles.ravel()[posiciones_muebles] = False
+        posiciones_disponibles = np.flatnonzero(disponibles).tolist()
+
+        # Tabla de vecinos transitables de cada celda (con los muebles ya colocados) y máscara de cargadores por índice
+        # plano (un byte por celda, para separar los vecinos por tipo sin memorizar nada por celda)
+        self.tabla_vecinos = tabla_vecinos(self.capa_muebles)
+        self.mascara_cargadores = self.capa_cargadores.tobytes()
+        # Mapa de ocupación: número de robots en cada celda (índice plano), se actualiza al mover a los robots
+        self.ocupacion_robots = array('i', bytes(4 * M * N))
+
+        # Campos de distancias precalculados hacia cada cargador (con los muebles ya colocados)
+        self.campos_cargadores = {pos: campo_distancias(self.capa_muebles, pos) for pos in self.pos_cargadores}
+        # Cuándo volver a cargarse: con 'Fijo' al llegar a UMBRAL_BATERIA; con 'Predictivo' justo a tiempo, cuando la
+        # carga apenas alcanza el camino exacto al cargador alcanzable más cercano más `margen_bateria` pasos
+        self.modo_bateria = modo_bateria
+        self.margen_bateria = margen_bateria
+        # Distancia (en pasos, evitando muebles) de cada celda a su cargador alcanzable más cercano
+        self.distancia_cargador = np.full((M, N), INALCANZABLE, dtype = np.int32)
+        for campo in self.campos_cargadores.values():
+            np.minimum(self.distancia_cargador, campo, out = self.distancia_cargador)
+        # Caché LRU de campos de distancias hacia otros objetivos (solicitudes de ayuda)
+        self.campos_objetivos = OrderedDict()
+        # Por defecto caben un par de objetivos por robot (la mayoría son campos acotados y pequeños)
+        self.max_campos_objetivo = max_campos_objetivo or max(32, 2 * num_agentes)
+
+        # Posicionamiento de celdas sucias (del plano o aleatorio)
+        if plano is not None:
+            self.capa_suciedad[:] = plano["suciedad"]
+            posiciones_celdas_sucias = np.flatnonzero(self.capa_suciedad).tolist()
+            # El total inicial puede ser el de una habitación mayor (p. ej. la de un modelo fragmentado)
+            self.celdas_sucias = plano.get("celdas_sucias", len(posiciones_celdas_sucias))
+        else:
+            self.celdas_sucias = int(M * N * porc_celdas_sucias)
+            posiciones_celdas_sucias = self.random.sample(posiciones_disponibles, k = self.celdas_sucias)
+            self.capa_suciedad.ravel()[posiciones_celdas_sucias] = 1
+        # Índice vivo de celdas sucias: conjunto de posiciones y contador, actualizados al limpiar
+        self.pos_celdas_sucias = {divmod(pos, N) for pos in posiciones_celdas_sucias}
+        self.num_celdas_sucias = len(self.pos_celdas_sucias)
 
         # Posicionamiento de agentes robot
-        if modo_pos_inicial == 'Aleatoria':
-            pos_inicial_robots = self.random.sample(posiciones_disponibles, k = num_agentes)
+        if plano is not None:
+            pos_inicial_robots = [tuple(pos) for pos in plano["robots"]]
+        elif modo_pos_inicial == 'Aleatoria':
+            pos_inicial_robots = [divmod(pos, N) for pos in self.random.sample(posiciones_disponibles, k = num_agentes)]
         else: # 'Fija'
             pos_inicial_robots = [(1, 1)] * num_agentes
-        for id in range(num_agentes):
-            robot = RobotLimpieza(id, self)
-            self.grid.place_agent(robot, pos_inicial_robots[id])
+        # Estrategia de recorrido de los robots ('Aleatoria', 'Frontera' o 'Boustrophedon')
+        from .estrategias import ESTRATEGIAS
+        self.estrategia = ESTRATEGIAS[estrategia](self)
+        # Asignador de problemas a robots ('Voraz' o 'Subasta', ver asignacion.py)
+        from .asignacion import ASIGNADORES
+        self.asignador = ASIGNADORES[modo_asignacion](self)
+        # Índice espacial de los robots disponibles para atender problemas
+        self.indice_robots = IndiceRobotsLibres(M, N)
+        ids_robots = plano.get("ids_robots") if plano is not None else None
+        for k, pos in enumerate(pos_inicial_robots):
+            robot = RobotLimpieza(ids_robots[k] if ids_robots else self.next_id(), self)
+            self.colocar_robot(robot, pos)
             self.schedule.add(robot)
+            self.indice_robots.actualizar(robot)
+            if self.perfil is not None:
+                self.perfil.instrumentar_robot(robot)
+
+        # Bloque de ids reservado para las vistas de compatibilidad del piso (una por celda)
+        self.id_base_celdas = self.current_id + 1
+        self.current_id += M * N
+
+        # Paso sincrónico vectorizado opcional para flotas grandes (reemplaza la activación aleatoria)
+        self.paso_vectorizado = None
+        if modo_vectorizado:
+            from .vectorizado import PasoVectorizado
+            self.paso_vectorizado = PasoVectorizado(self)
 
-        # Variables utilizadas para las gráficas en el server.py
-        self.datacollector = DataCollector(
+        # Llegada continua de suciedad ('Poisson' o 'Focos'): el modelo ya no termina al quedar limpio
+        self.proceso_suciedad = None
+        if modo_suciedad != 'Ninguna':
+            from .suciedad import PROCESOS_SUCIEDAD
+            if modo_suciedad not in PROCESOS_SUCIEDAD:
+                raise ValueError(f"Modo de suciedad desconocido: {modo_suciedad!r} "
+                                 f"(se esperaba 'Ninguna' o uno de {', '.join(PROCESOS_SUCIEDAD)})")
+            self.proceso_suciedad = PROCESOS_SUCIEDAD[modo_suciedad](self, tasa_suciedad, num_focos = num_focos)
+        # Métricas de estado estable (siempre con llegada de suciedad; opcionales en una limpieza única)
+        self.metricas = None
+        if self.proceso_suciedad is not None or medir_metricas:
+            from .metricas import MetricasEstables
+            self.metricas = MetricasEstables(self, calentamiento)
+
+        # Variables utilizadas para las gráficas en el server.py (muestreo por reportero, grid en un búfer acotado)
+        self.datacollector = RecolectorDatos(
             model_reporters = {"Grid": get_grid,
                                 "CeldasSucias": get_sucias,
                                 "Tiempo": "tiempo",
                                 "Movimientos": "movimientos",
                                 "Recargas": "cantidad_recargas"
-                            })
+                            },
+            intervalos = intervalos_recoleccion,
+            capacidad_grid = capacidad_grid)
+
+        # Con el perfilado activo, el step se reemplaza por su versión medida (sin costo cuando está desactivado)
+        if self.perfil is not None:
+            self.step = self.step_perfilado
 
     # ✓ Función encargada de ejecutar un paso en la simulación 
     def step(self): # habitación
         # Recolecta la información de las gráficas
         self.datacollector.collect(self)
         
-        # Si no está todo limpio
-        if not self.salon_limpio():
+        # Si no está todo limpio (con llegada continua de suciedad la simulación nunca termina)
+        if self.proceso_suciedad is not None or not self.salon_limpio():
+            # Aparece la suciedad nueva del paso
+            self.llegada_suciedad()
             # Programa un step
-            self.schedule.step()
-            
-            # Se obtienen todas las celdas sucias
-            celdas_sucias = self.get_celdas_sucias()
-            # Selecciona aleatoriamente un grupo de celdas sucias para notificar un problema
-            grupo_celdas_sucias = self.random.sample(celdas_sucias, k = min(len(celdas_sucias), self.num_agentes))
-            # Por cada celda sucia en el grupo de esas celdas
-            for celda_sucia in grupo_celdas_sucias:
-                # Crea un problema
-                self.pedir_ayuda_aux(celda_sucia, 1)
-
+            self.avanzar_robots()
+            # Crea problemas en celdas sucias aleatorias
+            self.generar_problemas()
             # Notifica el problema a todos los robots
             self.notificar_problema()
             # Se aumenta el tiempo en 1 (Para gráfica)
             self.tiempo += 1
-
             # Verifica si todas las celdas sucias han sido limpiadas
-            if len(self.get_celdas_sucias()) == 0:
-                self.todas_celdas_limpias = True
+            self.verificar_limpieza()
+            # Acumula las métricas de estado estable
+            if self.metricas is not None:
+                self.metricas.registrar_paso()
         else:
             # Si todas las celdas sucias han sido limpiadas, finaliza la simulación
             self.running = False
+            self.finalizar()
+
+    # ✓ Función que ejecuta el mismo paso que `step`, midiendo el tiempo de cada fase
+    def step_perfilado(self): # habitación
+        perfil = self.perfil
+        perfil.medir("recoleccion", self.datacollector.collect, self)
+
+        if self.proceso_suciedad is not None or not perfil.medir("salon_limpio", self.salon_limpio):
+            perfil.medir("suciedad", self.llegada_suciedad)
+            perfil.medir("schedule", self.avanzar_robots)
+            perfil.medir("problemas", self.generar_problemas)
+            perfil.medir("notificar_problema", self.notificar_problema)
+            self.tiempo += 1
+            perfil.medir("verificar_limpieza", self.verificar_limpieza)
+            if self.metricas is not None:
+                perfil.medir("metricas", self.metricas.registrar_paso)
+            perfil.cerrar_paso(self.tiempo)
+        else:
+            # La verificación que detecta el salón limpio no es otro paso: se suma a la fila del último paso,
+            # antes de cerrar el archivo del perfil
+            perfil.sumar_al_ultimo_paso()
+            self.running = False
+            self.finalizar()
+
+    # ✓ Función que avanza a todos los robots (todos a la vez en el modo vectorizado)
+    def avanzar_robots(self): # habitación
+        if self.paso_vectorizado is not None:
+            self.paso_vectorizado.step()
+            self.schedule.steps += 1
+            self.schedule.time += 1
+        else:
+            self.schedule.step()
+
+    # ✓ Función que agrega la suciedad que llega en este paso (solo con un proceso de suciedad)
+    def llegada_suciedad(self): # habitación
+        if self.proceso_suciedad is not None:
+            self.ensuciar_celdas(self.proceso_suciedad.generar())
+
+    # ✓ Función que crea problemas en un grupo aleatorio de celdas sucias
+    def generar_problemas(self): # habitación
+        # Las estrategias que planean su recorrido no usan problemas aleatorios
+        if not self.estrategia.problemas_aleatorios:
+            return
+        # Se obtienen todas las celdas sucias
+        celdas_sucias = self.get_celdas_sucias()
+        # Selecciona aleatoriamente un grupo de celdas sucias para notificar un problema
+        grupo_celdas_sucias = self.random.sample(celdas_sucias, k = min(len(celdas_sucias), self.num_agentes))
+        # Por cada celda sucia en el grupo de esas celdas
+        for celda_sucia in grupo_celdas_sucias:
+            # Crea un problema
+            self.pedir_ayuda_aux(celda_sucia, 1)
+
+    # ✓ Función que verifica si todas las celdas sucias han sido limpiadas
+    def verificar_limpieza(self): # habitación
+        if self.num_celdas_sucias == 0:
+            self.todas_celdas_limpias = True
+
+    # Estado para checkpoints: el step perfilado se vuelve a enlazar al restaurar
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado.pop("step", None)
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        if self.perfil is not None:
+            for robot in self.schedule.agents:
+                self.perfil.instrumentar_robot(robot)
+            self.step = self.step_perfilado
+
+    # ✓ Función que reabre los archivos de la simulación (eventos y perfil) tras restaurar un checkpoint
+    def reanudar_archivos(self): # habitación
+        if self.eventos is not None:
+            self.eventos.reanudar()
+        if self.perfil is not None:
+            self.perfil.reanudar()
+
+    # ✓ Función que cierra los recursos abiertos por la simulación (registro de eventos y de perfilado)
+    def finalizar(self): # habitación
+        if self.eventos is not None:
+            self.eventos.cerrar()
+        if self.perfil is not None:
+            self.perfil.cerrar()
 
     # ✓ Función que calcula la distancia entre 2 puntos
     def distancia_euclidiana(self, punto1, punto2): # habitación, dos coordenadas a comparar (punto #1 y punto #2)
         return math.sqrt(pow(punto1[0] - punto2[0], 2) + pow(punto1[1] - punto2[1], 2))
 
+    # ✓ Función que marca una celda como limpia y la retira del índice de celdas sucias
+    def limpiar_celda(self, pos, robot = None): # habitación, posición a limpiar, robot que la limpia
+        # Solo se actualiza el índice si la celda realmente estaba sucia
+        if self.capa_suciedad[pos]:
+            self.capa_suciedad[pos] = 0
+            self.pos_celdas_sucias.discard(pos)
+            self.num_celdas_sucias -= 1
+            self.celdas_limpiadas += 1
+            # Se registra el evento de limpieza
+            if self.eventos is not None:
+                self.eventos.registrar(self.tiempo, LIMPIEZA, robot.unique_id if robot else -1, pos)
+
+    # ✓ Función que limpia en bloque un arreglo de posiciones planas (x * N + y)
+    def limpiar_celdas(self, posiciones, robots = None): # habitación, arreglo de posiciones planas, ids de los robots
+        suciedad = self.capa_suciedad.ravel()
+        # Solo interesan las celdas que estaban sucias (sin repetir)
+        sucias = suciedad[posiciones] == 1
+        posiciones, primeros = np.unique(posiciones[sucias], return_index = True)
+        suciedad[posiciones] = 0
+        x, y = np.divmod(posiciones, self.grid.height)
+        for celda in zip(x.tolist(), y.tolist()):
+            self.pos_celdas_sucias.discard(celda)
+        self.num_celdas_sucias -= len(posiciones)
+        self.celdas_limpiadas += len(posiciones)
+        # Se registran los eventos de limpieza
+        if self.eventos is not None:
+            ids = robots[sucias][primeros] if robots is not None else np.full(len(posiciones), -1)
+            self.eventos.registrar_bloque(self.tiempo, LIMPIEZA, ids, x, y)
+
+    # ✓ Función que marca una celda como sucia y la agrega al índice de celdas sucias
+    def ensuciar_celda(self, pos): # habitación, posición a ensuciar
+        # Solo se ensucian celdas libres (sin muebles ni cargadores) que estén limpias
+        if not (self.capa_suciedad[pos] or self.capa_muebles[pos] or self.capa_cargadores[pos]):
+            self.capa_suciedad[pos] = 1
+            self.pos_celdas_sucias.add(pos)
+            self.num_celdas_sucias += 1
+
+    # ✓ Función que coloca a un robot en la grid y lo registra en el mapa de ocupación
+    def colocar_robot(self, robot, pos): # habitación, robot, posición
+        self.grid.place_agent(robot, pos)
+        self.ocupacion_robots[pos[0] * self.grid.height + pos[1]] += 1
+
+    # ✓ Función que mueve a un robot en la grid y en el mapa de ocupación
+    def mover_robot(self, robot, pos): # habitación, robot, nueva posición
+        N = self.grid.height
+        self.ocupacion_robots[robot.pos[0] * N + robot.pos[1]] -= 1
+        self.ocupacion_robots[pos[0] * N + pos[1]] += 1
+        self.grid.move_agent(robot, pos)
+
+    # ✓ Función que retira a un robot de la grid y del mapa de ocupación
+    def quitar_robot(self, robot): # habitación, robot
+        self.ocupacion_robots[robot.pos[0] * self.grid.height + robot.pos[1]] -= 1
+        self.grid.remove_agent(robot)
+
+    # ✓ Función que ensucia en bloque un arreglo de posiciones planas (x * N + y)
+    def ensuciar_celdas(self, posiciones): # habitación, arreglo de posiciones planas
+        # Solo se ensucian celdas limpias, sin muebles, cargadores ni robots (sin repetir)
+        posiciones = np.unique(posiciones)
+        libres = ((self.capa_suciedad.ravel()[posiciones] == 0) & (self.capa_muebles.ravel()[posiciones] == 0)
+                  & (self.capa_cargadores.ravel()[posiciones] == 0)
+                  & (np.frombuffer(self.ocupacion_robots, dtype = np.intc)[posiciones] == 0))
+        posiciones = posiciones[libres]
+        self.capa_suciedad.ravel()[posiciones] = 1
+        x, y = np.divmod(posiciones, self.grid.height)
+        self.pos_celdas_sucias.update(zip(x.tolist(), y.tolist()))
+        self.num_celdas_sucias += len(posiciones)
+
+    # ✓ Función que construye bajo demanda las vistas de compatibilidad (Celda o Mueble) de una posición
+    def get_vistas_celda(self, pos): # habitación, posición a consultar
+        x, y = pos
+        unique_id = self.id_base_celdas + x * self.grid.height + y
+        if self.capa_muebles[pos]:
+            return [Mueble(unique_id, self, pos)]
+        if self.capa_cargadores[pos]:
+            return []
+        return [Celda(unique_id, self, pos)]
+
+    # ✓ Función que obtiene todo el contenido de una posición (vistas del piso más robots y cargadores)
+    def get_contenido_celda(self, pos): # habitación, posición a consultar
+        return self.get_vistas_celda(pos) + self.grid.get_cell_list_contents([pos])
+
+    # ✓ Función que estima cuántos pasos faltan para que un robot que llega en `distancia` pasos empiece a cargarse
+    def costo_cargador(self, pos, distancia): # habitación, posición del cargador, distancia del robot al cargador
+        llegada = self.tiempo + distancia
+        # La cola se atiende en orden de llegada; solo cuentan los robots que llegan antes
+        libre = self.tiempo
+        for llegada_robot, duracion in sorted(self.reservas_cargadores[pos].values()):
+            if llegada_robot > llegada:
+                break
+            libre = max(libre, llegada_robot) + duracion
+        return max(libre, llegada) - self.tiempo
+
+    # ✓ Función que estima cuántos pasos antes de su turno llegaría un robot a su cargador (positivo = llegaría antes)
+    def espera_cargador(self, id_robot, pos, distancia): # habitación, id del robot, posición del cargador, distancia
+        reservas = self.reservas_cargadores[pos]
+        propia = reservas.get(id_robot)
+        # Solo cuentan los robots que van antes en la cola (por llegada prevista, luego por id)
+        libre = self.tiempo
+        for id_otro, (llegada, duracion) in sorted(reservas.items(), key = lambda reserva: (reserva[1][0], reserva[0])):
+            if id_otro == id_robot:
+                continue
+            if propia is not None and (llegada, id_otro) > (propia[0], id_robot):
+                break
+            libre = max(libre, llegada) + duracion
+        return libre - (self.tiempo + distancia)
+
+    # ✓ Función que elige el cargador con menor espera más viaje y lo reserva para el robot
+    def asignar_cargador(self, id_robot, distancias, carga): # habitación, id del robot, distancias a cada cargador, carga
+        self.liberar_cargador(id_robot)
+        mejor, mejor_costo = self.pos_cargadores[0], INALCANZABLE
+        # Con el planificador predictivo solo se consideran los cargadores a los que alcanza la batería (si hay alguno)
+        limite = INALCANZABLE
+        if self.modo_bateria == 'Predictivo' and any(distancia <= carga for distancia in distancias):
+            limite = carga
+        for pos, distancia in zip(self.pos_cargadores, distancias):
+            if distancia == INALCANZABLE or distancia > limite:
+                continue
+            costo = self.costo_cargador(pos, int(distancia))
+            if costo < mejor_costo:
+                mejor, mejor_costo = pos, costo
+                distancia_mejor = int(distancia)
+
+        # Si ningún cargador es alcanzable no se reserva (el robot descartará el objetivo al viajar)
+        if mejor_costo != INALCANZABLE:
+            # Pasos de carga estimados con la batería con la que llegará (25 por paso)
+            duracion = math.ceil((100 - max(carga - distancia_mejor, 0)) / 25)
+            self.reservas_cargadores[mejor][id_robot] = (self.tiempo + distancia_mejor, duracion)
+            self.cargador_reservado[id_robot] = mejor
+        return mejor
+
+    # ✓ Función que actualiza la reserva de un robot que ya se está cargando (pasos restantes desde ahora)
+    def actualizar_reserva(self, id_robot, carga): # habitación, id del robot, carga actual
+        pos = self.cargador_reservado.get(id_robot)
+        if pos is not None:
+            self.reservas_cargadores[pos][id_robot] = (self.tiempo, math.ceil((100 - carga) / 25))
+
+    # ✓ Función que libera el lugar de un robot en la cola de su cargador (si tenía uno)
+    def liberar_cargador(self, id_robot): # habitación, id del robot
+        pos = self.cargador_reservado.pop(id_robot, None)
+        if pos is not None:
+            del self.reservas_cargadores[pos][id_robot]
+
+    # ✓ Función que indica si un robot con cierta carga ya debe volver a cargarse desde su posición
+    def necesita_cargar(self, pos, carga): # habitación, posición del robot, carga actual
+        if self.modo_bateria == 'Fijo':
+            return carga <= UMBRAL_BATERIA
+        # Sin cargador alcanzable no tiene caso volver
+        distancia = self.distancia_cargador[pos]
+        return distancia != INALCANZABLE and carga <= distancia + self.margen_bateria
+
+    # ✓ Función que obtiene, para un arreglo de posiciones planas, la carga con la que ya hay que volver a cargarse
+    def umbral_bateria(self, posiciones): # habitación, arreglo de posiciones planas
+        if self.modo_bateria == 'Fijo':
+            return np.full(len(posiciones), UMBRAL_BATERIA, dtype = np.int64)
+        distancias = self.distancia_cargador.ravel()[posiciones].astype(np.int64)
+        return np.where(distancias == INALCANZABLE, -1, distancias + self.margen_bateria)
+
+    # ✓ Función que obtiene el campo de distancias hacia un objetivo (precalculado para cargadores, LRU para el resto)
+    def get_campo_distancias(self, objetivo, desde = None): # habitación, posición objetivo, posición que debe cubrir el campo
+        campo = self.campos_cargadores.get(objetivo)
+        if campo is not None:
+            return campo
+
+        # Los campos de la caché pueden estar acotados: sirven si son completos o si cubren la posición pedida
+        campo = self.campos_objetivos.get(objetivo)
+        if campo is not None and (isinstance(campo, np.ndarray) or (desde is not None and campo[desde] != INALCANZABLE)):
+            # Se marca como el campo usado más recientemente
+            self.campos_objetivos.move_to_end(objetivo)
+            return campo
+
+        # Si se conoce desde dónde se consulta, basta un campo acotado (el doble de la distancia más un margen)
+        campo = None
+        if desde is not None:
+            radio = 2 * max(abs(desde[0] - objetivo[0]), abs(desde[1] - objetivo[1])) + 8
+            campo = CampoAcotado(self.capa_muebles, objetivo, radio)
+        # Si el campo acotado no alcanza la posición (o no se indicó), se calcula el campo completo
+        if campo is None or campo[desde] == INALCANZABLE:
+            campo = campo_distancias(self.capa_muebles, objetivo)
+
+        # Se guarda el campo y se descarta el usado hace más tiempo si la caché está llena
+        self.campos_objetivos[objetivo] = campo
+        self.campos_objetivos.move_to_end(objetivo)
+        if len(self.campos_objetivos) > self.max_campos_objetivo:
+            self.campos_objetivos.popitem(last = False)
+        return campo
+
     # ✓ Función que verifica que todo el salón esté limpio
     def salon_limpio(self): # habitación
-        for (content, pos) in self.grid.coord_iter():
-            for celda in content:
-                if isinstance(celda, Celda) and celda.sucia:
-                    return False
-        return True
+        return self.num_celdas_sucias == 0
     
     # ✓ Función que obtiene la posición actual de las celdas sucias
     def get_celdas_sucias(self): # habitación
-        celdas_sucias = list()
-        for(content, pos) in self.grid.coord_iter():
-            for celda in content:
-                if isinstance(celda, Celda) and celda.sucia:
-                    celdas_sucias.append(pos)
-        return celdas_sucias
+        # Se ordenan para conservar el mismo orden (por columnas) que el recorrido de la grid
+        return sorted(self.pos_celdas_sucias)
     
     # ✓ Función que obtiene la posición actual de los robots
     def get_robots(self): # habitación
-        robots = list()
-        for (content, pos) in self.grid.coord_iter():
-            for celda in content:
-                if isinstance(celda, RobotLimpieza):
-                    robots.append((celda, pos))
-        return robots
+        # Los robots se obtienen del scheduler en lugar de recorrer la grid
+        return [(robot, robot.pos) for robot in self.schedule.agents]
     
     # ✓ Función para añadir problemas a la lista de estos
     def pedir_ayuda_aux(self, pos, num_sucias): # habitación, posición de ayuda y número de celdas sucias
         self.problemas.append((num_sucias, pos))
+        # Se anota la solicitud para medir cuánto tarda en atenderse
+        if self.metricas is not None:
+            self.metricas.registrar_solicitud(pos)
 
-    # ✓ Función que notifica que existe mucha basura en un área a todos los robots
+    # ✓ Función que notifica que existe mucha basura en un área a todos los robots (devuelve los que nadie atendió)
     def notificar_problema(self): # habitación
-        # Organiza los problemas por gravedad (cantidad de celdas sucias) de mayor a menor
-        self.problemas = sorted(self.problemas, key = lambda problema: problema[0], reverse = True)
-        # Obtiene la posición de todos los robots
-        posiciones_robots = self.get_robots()
-
-        # Por cada problema en la lista de problemas
-        for problema in self.problemas:
-            # Verifica cuál robot está más cerca del problema (la mínima distancia)
-            posiciones_robots = sorted(posiciones_robots, key = lambda posicion_robot: self.distancia_euclidiana(problema[1], posicion_robot[1]))
-            # Se examina cada posición del robot
-            for posicion_robot in posiciones_robots:
-                # Se verifica si el robot puede o no encargarse del problema
-                resultado = posicion_robot[0].pedir_ayuda(problema[1])
-                # En caso de que sí se pueda, se le asigna el problema
-                if resultado:
-                    break
-        
+        # El asignador reparte los problemas entre los robots disponibles del índice espacial
+        sin_atender = self.asignador.asignar(self.problemas)
         # Limpia la lista de problemas para no iterar todo en cada step de la simulación
         self.problemas = list()
+        return sin_atender
 
 def get_grid(model: Model) -> np.ndarray:
     """
@@ -434,15 +1142,12 @@ def get_grid(model: Model) -> np.ndarray:
     :param model: Modelo (entorno)
     :return: grid
     """
-    grid = np.zeros((model.grid.width, model.grid.height))
-    for cell in model.grid.coord_iter():
-        cell_content, pos = cell
-        x, y = pos
-        for obj in cell_content:
-            if isinstance(obj, RobotLimpieza):
-                grid[x][y] = 2
-            elif isinstance(obj, Celda):
-                grid[x][y] = int(obj.sucia)
+    # Celdas sucias a partir de la capa de suciedad del modelo
+    grid = model.capa_suciedad.astype(float)
+    # Los robots se dibujan encima de las celdas
+    for robot in model.schedule.agents:
+        x, y = robot.pos
+        grid[x][y] = 2
     return grid
 
 def get_sucias(model: Model) -> int:
@@ -451,10 +1156,5 @@ def get_sucias(model: Model) -> int:
     :param model: Modelo Mesa
     :return: número de celdas sucias
     """
-    sum_sucias = 0
-    for cell in model.grid.coord_iter():
-        cell_content, pos = cell
-        for obj in cell_content:
-            if isinstance(obj, Celda) and obj.sucia:
-                sum_sucias += 1
-    return sum_sucias / model.celdas_sucias
+    # Con llegada continua de suciedad la habitación puede empezar limpia
+    return model.num_celdas_sucias / max(model.celdas_sucias, 1)
@@ -0,0 +1,154 @@
+'''
+Núcleo ligero de agentes para las corridas sin interfaz.
+
+Implementa el subconjunto de Mesa que usa el modelo (`Model`, `Agent`, `MultiGrid` y `RandomActivation`) con la
+misma semántica y el mismo consumo del generador aleatorio, así que las corridas dan exactamente lo mismo que con
+Mesa (`tests/test_nucleo.py` corre el mismo modelo sobre ambos y compara cada paso). Importar cualquier módulo de
+Mesa carga también su visualización (tornado), pandas y networkx, lo que domina el arranque de las corridas cortas
+que se lanzan por miles; con este núcleo solo `server.py` importa Mesa. El servidor de Mesa acepta el modelo tal
+cual porque solo usa su interfaz (`running`, `step`, `datacollector`, `grid`).
+
+La grid guarda solo las celdas ocupadas (robots y cargadores) en un diccionario, en lugar de una lista por celda.
+'''
+
+import random
+
+
+class Model:
+    # Modelo base: generador aleatorio propio (sembrado con `seed`), bandera `running` e ids consecutivos
+    def __new__(cls, *args, **kwargs):
+        objeto = object.__new__(cls)
+        # Igual que en Mesa: sin semilla se sortea una (y se conserva para poder reiniciar el generador)
+        objeto._seed = kwargs.get("seed")
+        if objeto._seed is None:
+            objeto._seed = random.random()
+        objeto.random = random.Random(objeto._seed)
+        return objeto
+
+    def __init__(self, *args, **kwargs):
+        self.running = True
+        self.schedule = None
+        self.current_id = 0
+
+    # ✓ Función que corre el modelo hasta que termina
+    def run_model(self): # modelo
+        while self.running:
+            self.step()
+
+    def step(self):
+        pass
+
+    # ✓ Función que devuelve el siguiente id único para un agente
+    def next_id(self): # modelo
+        self.current_id += 1
+        return self.current_id
+
+    # ✓ Función que reinicia el generador aleatorio (con la semilla original si no se da otra)
+    def reset_randomizer(self, seed = None): # modelo, nueva semilla
+        if seed is None:
+            seed = self._seed
+        self.random.seed(seed)
+        self._seed = seed
+
+
+class Agent:
+    # Agente base: id único, modelo al que pertenece y posición en la grid (None fuera de ella)
+    def __init__(self, unique_id, model):
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+
+    def step(self):
+        pass
+
+    def advance(self):
+        pass
+
+    @property
+    def random(self):
+        return self.model.random
+
+
+class MultiGrid:
+    # Grid (sin toroide) donde varios agentes pueden compartir celda
+    def __init__(self, width: int, height: int, torus: bool = False):
+        self.width = width
+        self.height = height
+        self.torus = torus
+        # Posición -> agentes en esa celda (en orden de llegada); las celdas vacías no se guardan
+        self.celdas = dict()
+
+    # ✓ Función que indica si una posición está fuera de la grid
+    def out_of_bounds(self, pos): # grid, posición
+        x, y = pos
+        return x < 0 or x >= self.width or y < 0 or y >= self.height
+
+    # ✓ Función que coloca a un agente en una posición
+    def place_agent(self, agent, pos): # grid, agente, posición
+        self.celdas.setdefault(pos, list()).append(agent)
+        agent.pos = pos
+
+    # ✓ Función que retira a un agente de la grid
+    def remove_agent(self, agent): # grid, agente
+        agentes = self.celdas[agent.pos]
+        agentes.remove(agent)
+        if not agentes:
+            del self.celdas[agent.pos]
+        agent.pos = None
+
+    # ✓ Función que mueve a un agente a otra posición
+    def move_agent(self, agent, pos): # grid, agente, nueva posición
+        self.remove_agent(agent)
+        self.place_agent(agent, pos)
+
+    # ✓ Función que indica si una celda no tiene agentes
+    def is_cell_empty(self, pos): # grid, posición
+        return pos not in self.celdas
+
+    # ✓ Función que recorre los agentes de un listado de posiciones
+    def iter_cell_list_contents(self, cell_list): # grid, listado de posiciones
+        for pos in cell_list:
+            yield from self.celdas.get(pos, ())
+
+    # ✓ Función que obtiene los agentes de un listado de posiciones
+    def get_cell_list_contents(self, cell_list): # grid, listado de posiciones
+        return list(self.iter_cell_list_contents(cell_list))
+
+
+class RandomActivation:
+    # Calendarizador que activa a cada agente una vez por paso, en un orden aleatorio distinto en cada paso
+    def __init__(self, model):
+        self.model = model
+        self.steps = 0
+        self.time = 0
+        # Id -> agente (en orden de alta, que es el orden que se baraja)
+        self._agents = dict()
+
+    # ✓ Función que agrega un agente al calendario
+    def add(self, agent): # calendario, agente
+        if agent.unique_id in self._agents:
+            raise ValueError(f"El agente con id {agent.unique_id!r} ya está en el calendario")
+        self._agents[agent.unique_id] = agent
+
+    # ✓ Función que quita un agente del calendario
+    def remove(self, agent): # calendario, agente
+        del self._agents[agent.unique_id]
+
+    # ✓ Función que ejecuta el paso de todos los agentes en orden aleatorio
+    def step(self): # calendario
+        ids = list(self._agents)
+        self.model.random.shuffle(ids)
+        for id_agente in ids:
+            # Un agente retirado durante el paso ya no se activa
+            if id_agente in self._agents:
+                self._agents[id_agente].step()
+        self.steps += 1
+        self.time += 1
+
+    # ✓ Función que devuelve el número de agentes en el calendario
+    def get_agent_count(self): # calendario
+        return len(self._agents)
+
+    @property
+    def agents(self):
+        return list(self._agents.values())
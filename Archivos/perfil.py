@@ -0,0 +1,213 @@
+'''
+Perfilado de la simulación de barredoras por fase y por regla.
+
+Mide cuánto tarda cada fase de `Habitacion.step` (recolección de datos, verificación del salón limpio, llegada de
+suciedad, avance de los robots, generación y notificación de problemas, verificación final y métricas) y cuántas
+veces se aplica cada regla de `RobotLimpieza.step` y cuánto cuesta. Cuando el perfilado está desactivado el modelo
+no usa nada de este módulo.
+
+Uso:
+    modelo = Habitacion(50, 50, perfilar = True, ruta_perfil = "perfil.csv")
+    ...
+    print(modelo.perfil.tabla())
+'''
+
+import csv
+import json
+import os
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter_ns
+
+# Fases de Habitacion.step, en el orden en el que se ejecutan
+FASES = ["recoleccion", "salon_limpio", "suciedad", "schedule", "problemas", "notificar_problema", "verificar_limpieza",
+         "metricas"]
+
+# Reglas de RobotLimpieza.step (nombre del método -> nombre de la regla)
+REGLAS = {
+    "regla_cargar": "cargar",
+    "regla_viajar": "viajar",
+    "regla_bateria_baja": "bateria_baja",
+    "regla_limpiar": "limpiar",
+}
+
+
+class Acumulado:
+    # Número de llamadas y tiempo total (en nanosegundos) de una fase o regla
+    __slots__ = ("llamadas", "tiempo_ns")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.tiempo_ns = 0
+
+    # ✓ Función que devuelve el acumulado como diccionario (tiempos en milisegundos)
+    def como_dict(self): # acumulado
+        return {
+            "llamadas": self.llamadas,
+            "total_ms": self.tiempo_ns / 1e6,
+            "promedio_ms": self.tiempo_ns / 1e6 / self.llamadas if self.llamadas else 0.0,
+        }
+
+
+class EstadisticasPerfil:
+    def __init__(self, ruta: str = None):
+        """
+        :param ruta: Archivo opcional (.csv, .json o .jsonl) donde se escribe una fila por paso
+        """
+        self.fases = defaultdict(Acumulado)
+        self.reglas = defaultdict(Acumulado)
+        self.num_pasos = 0
+        # Tiempos y conteos del paso en curso (se vacían en cerrar_paso)
+        self.paso_fases = defaultdict(int)
+        self.paso_reglas = defaultdict(int)
+        # Fila del último paso cerrado: se escribe al cerrar el siguiente, para poder sumarle la verificación final
+        self._pendiente = None
+
+        self.ruta = ruta
+        self.formato = os.path.splitext(ruta)[1].lower() if ruta else None
+        self._archivo = None
+        self._escritor = None
+        self._filas = None
+        if ruta:
+            if self.formato == ".csv":
+                self._archivo = open(ruta, "w", newline = "")
+                self._escritor = csv.writer(self._archivo)
+                self._escritor.writerow(["paso"] + [f"{fase}_ms" for fase in FASES] + list(REGLAS.values()))
+            elif self.formato == ".jsonl":
+                self._archivo = open(ruta, "w")
+            elif self.formato == ".json":
+                # El JSON completo se escribe al cerrar
+                self._filas = list()
+            else:
+                raise ValueError(f"Formato de perfil no soportado: '{self.formato}' (usa .csv, .json o .jsonl)")
+
+    # ✓ Función que ejecuta una fase midiendo su tiempo y devuelve su resultado
+    def medir(self, fase, funcion, *args): # perfil, nombre de la fase, función, argumentos
+        inicio = perf_counter_ns()
+        resultado = funcion(*args)
+        transcurrido = perf_counter_ns() - inicio
+
+        acumulado = self.fases[fase]
+        acumulado.llamadas += 1
+        acumulado.tiempo_ns += transcurrido
+        self.paso_fases[fase] += transcurrido
+        return resultado
+
+    # ✓ Función que registra una aplicación de una regla y su costo
+    def registrar_regla(self, regla, tiempo_ns = 0, veces = 1): # perfil, nombre de la regla, tiempo, número de robots
+        acumulado = self.reglas[regla]
+        acumulado.llamadas += veces
+        acumulado.tiempo_ns += tiempo_ns
+        self.paso_reglas[regla] += veces
+
+    # ✓ Función que reemplaza los métodos de reglas de un robot por versiones medidas (solo en esa instancia)
+    def instrumentar_robot(self, robot): # perfil, robot
+        for metodo, regla in REGLAS.items():
+            setattr(robot, metodo, self.medir_regla(regla, getattr(robot, metodo)))
+
+    # ✓ Función que envuelve un método de regla para contar sus aplicaciones y su tiempo
+    def medir_regla(self, regla, metodo): # perfil, nombre de la regla, método ligado del robot
+        @wraps(metodo)
+        def medido():
+            inicio = perf_counter_ns()
+            metodo()
+            self.registrar_regla(regla, perf_counter_ns() - inicio)
+        return medido
+
+    # ✓ Función que cierra el paso en curso y, si hay archivo, escribe la fila del paso anterior
+    def cerrar_paso(self, paso): # perfil, número de paso
+        self.num_pasos += 1
+        if self.ruta:
+            self.escribir_pendiente()
+            self._pendiente = {"paso": paso}
+            self._pendiente.update({f"{fase}_ms": self.paso_fases[fase] / 1e6 for fase in FASES})
+            self._pendiente.update({regla: self.paso_reglas[regla] for regla in REGLAS.values()})
+        self.paso_fases.clear()
+        self.paso_reglas.clear()
+
+    # ✓ Función que suma lo medido desde el último paso (la verificación que detecta el salón limpio) a su fila,
+    # sin contarlo como otro paso
+    def sumar_al_ultimo_paso(self): # perfil
+        if self._pendiente is not None:
+            for fase in FASES:
+                self._pendiente[f"{fase}_ms"] += self.paso_fases[fase] / 1e6
+            for regla in REGLAS.values():
+                self._pendiente[regla] += self.paso_reglas[regla]
+        self.paso_fases.clear()
+        self.paso_reglas.clear()
+
+    # ✓ Función que escribe la fila del último paso cerrado (si hay)
+    def escribir_pendiente(self): # perfil
+        fila, self._pendiente = self._pendiente, None
+        if fila is None:
+            return
+        if self._escritor is not None:
+            self._escritor.writerow(fila.values())
+        elif self._filas is not None:
+            self._filas.append(fila)
+        else:
+            self._archivo.write(json.dumps(fila) + "\n")
+
+    # ✓ Función que devuelve las estadísticas acumuladas como diccionario
+    def resumen(self): # perfil
+        return {
+            "pasos": self.num_pasos,
+            "fases": {fase: self.fases[fase].como_dict() for fase in FASES if fase in self.fases},
+            "reglas": {regla: self.reglas[regla].como_dict() for regla in REGLAS.values() if regla in self.reglas},
+        }
+
+    # ✓ Función que devuelve las estadísticas acumuladas como una tabla de texto
+    def tabla(self): # perfil
+        resumen = self.resumen()
+        total_ms = sum(datos["total_ms"] for datos in resumen["fases"].values()) or 1.0
+        lineas = [f"{resumen['pasos']} pasos", f"{'fase / regla':<20}{'llamadas':>10}{'total ms':>12}{'prom. ms':>10}{'%':>7}"]
+        for fase, datos in resumen["fases"].items():
+            lineas.append(f"{fase:<20}{datos['llamadas']:>10}{datos['total_ms']:>12.2f}{datos['promedio_ms']:>10.4f}"
+                          f"{100 * datos['total_ms'] / total_ms:>7.1f}")
+        for regla, datos in resumen["reglas"].items():
+            lineas.append(f"  {regla:<18}{datos['llamadas']:>10}{datos['total_ms']:>12.2f}{datos['promedio_ms']:>10.4f}")
+        return "\n".join(lineas)
+
+    # ✓ Función que escribe lo pendiente y cierra el archivo del perfil
+    def cerrar(self): # perfil
+        if self.ruta:
+            self.escribir_pendiente()
+        if self._filas is not None:
+            with open(self.ruta, "w") as archivo:
+                json.dump({"resumen": self.resumen(), "pasos": self._filas}, archivo)
+            self._filas = None
+        if self._archivo is not None and not self._archivo.closed:
+            self._archivo.close()
+
+    # ✓ Función que reabre el archivo del perfil tras restaurar un checkpoint, descartando las filas posteriores
+    def reanudar(self): # perfil
+        if not self.ruta:
+            return
+        if self._posicion is not None:
+            with open(self.ruta, "r+b") as archivo:
+                archivo.truncate(self._posicion)
+        if self.formato == ".csv":
+            self._archivo = open(self.ruta, "a", newline = "")
+            self._escritor = csv.writer(self._archivo)
+        elif self.formato == ".jsonl":
+            self._archivo = open(self.ruta, "a")
+
+    # ✓ Función que desliga el perfil de su archivo (las estadísticas se siguen acumulando en memoria)
+    def desligar(self): # perfil
+        self.ruta = None
+        self._filas = None
+        self._pendiente = None
+
+    # En un checkpoint no se guarda el archivo abierto, solo hasta dónde se había escrito
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado["_posicion"] = None
+        if self._archivo is not None and not self._archivo.closed:
+            self._archivo.flush()
+            estado["_posicion"] = os.path.getsize(self.ruta)
+        estado["_archivo"] = None
+        estado["_escritor"] = None
+        return estado
+
+    def __str__(self):
+        return self.tabla()
@@ -0,0 +1,149 @@
+'''
+Recolección de datos configurable para la simulación de barredoras.
+
+Reemplaza al `DataCollector` de Mesa cuando las corridas son largas: cada reportero se muestrea cada cierto número
+de pasos, las series escalares se guardan en arreglos preasignados y las fotografías de la grid se guardan en un
+búfer circular acotado, codificadas como diferencias contra la fotografía anterior y reconstruidas bajo demanda.
+Expone `model_vars` con la misma forma que el `DataCollector` para que los `ChartModule` del server.py funcionen igual.
+'''
+
+from collections import deque
+
+import numpy as np
+
+
+class SerieEscalar:
+    # Serie de valores escalares en arreglos preasignados que crecen al doble cuando se llenan
+    def __init__(self, capacidad_inicial: int = 1024):
+        self.pasos = np.empty(capacidad_inicial, dtype = np.int64)
+        self.valores = np.empty(capacidad_inicial, dtype = np.float64)
+        self.tamano = 0
+
+    # ✓ Función que agrega un valor muestreado en un paso
+    def agregar(self, paso, valor): # serie, paso, valor
+        if self.tamano == len(self.valores):
+            self.pasos = np.resize(self.pasos, 2 * self.tamano)
+            self.valores = np.resize(self.valores, 2 * self.tamano)
+        self.pasos[self.tamano] = paso
+        self.valores[self.tamano] = valor
+        self.tamano += 1
+
+    # ✓ Función que devuelve los valores guardados (vista, sin copiar)
+    def datos(self): # serie
+        return self.valores[:self.tamano]
+
+    def __len__(self):
+        return self.tamano
+
+    def __getitem__(self, indice):
+        return self.datos()[indice]
+
+
+class HistorialGrid:
+    # Búfer circular de fotografías de la grid: una fotografía base más diferencias entre fotografías consecutivas
+    def __init__(self, capacidad: int = 100):
+        self.capacidad = capacidad
+        # Fotografía más antigua que se conserva y el paso en el que se tomó
+        self.base = None
+        self.paso_base = None
+        # Diferencias (paso, índices planos que cambiaron, nuevos valores) en orden de llegada
+        self.deltas = deque()
+        # Última fotografía completa, necesaria para calcular la siguiente diferencia
+        self.ultima = None
+
+    # ✓ Función que agrega una fotografía; si se excede la capacidad, la más antigua se integra a la base
+    def agregar(self, paso, grid): # historial, paso, fotografía
+        if self.base is None:
+            self.base = grid.copy()
+            self.paso_base = paso
+        else:
+            indices = np.flatnonzero(grid.ravel() != self.ultima.ravel())
+            self.deltas.append((paso, indices, grid.ravel()[indices]))
+            if len(self.deltas) >= self.capacidad:
+                paso_antiguo, indices_antiguos, valores_antiguos = self.deltas.popleft()
+                self.base.ravel()[indices_antiguos] = valores_antiguos
+                self.paso_base = paso_antiguo
+        self.ultima = grid.copy()
+
+    # ✓ Función que devuelve los pasos de las fotografías que se conservan
+    def pasos(self): # historial
+        if self.base is None:
+            return []
+        return [self.paso_base] + [paso for paso, _, _ in self.deltas]
+
+    # ✓ Función que reconstruye la fotografía número `indice` (negativo cuenta desde el final)
+    def reconstruir(self, indice): # historial, índice de la fotografía
+        total = len(self)
+        if indice < 0:
+            indice += total
+        if not 0 <= indice < total:
+            raise IndexError("No existe esa fotografía en el historial de la grid")
+
+        # La última fotografía se tiene completa; el resto se obtiene aplicando diferencias sobre la base
+        if indice == total - 1:
+            return self.ultima.copy()
+        grid = self.base.copy()
+        plano = grid.ravel()
+        for _, indices, valores in list(self.deltas)[:indice]:
+            plano[indices] = valores
+        return grid
+
+    def __len__(self):
+        return 0 if self.base is None else len(self.deltas) + 1
+
+    def __getitem__(self, indice):
+        return self.reconstruir(indice)
+
+
+class RecolectorDatos:
+    def __init__(self, model_reporters: dict, intervalos: dict = None, capacidad_grid: int = 100,
+                 reporteros_grid = ("Grid",), capacidad_inicial: int = 1024):
+        """
+        :param model_reporters: Reporteros del modelo (función o nombre de atributo), igual que en el DataCollector
+        :param intervalos: Cada cuántos pasos se muestrea cada reportero (1 por defecto, 0 lo desactiva)
+        :param capacidad_grid: Número máximo de fotografías de la grid que se conservan
+        :param reporteros_grid: Reporteros que devuelven una grid (se guardan en un HistorialGrid)
+        :param capacidad_inicial: Tamaño inicial de los arreglos de las series escalares
+        """
+        self.model_reporters = dict(model_reporters)
+        self.intervalos = {nombre: 1 for nombre in self.model_reporters}
+        self.intervalos.update(intervalos or {})
+        self.num_colectas = 0
+
+        self.series = dict()
+        for nombre in self.model_reporters:
+            if nombre in reporteros_grid:
+                self.series[nombre] = HistorialGrid(capacidad_grid)
+            else:
+                self.series[nombre] = SerieEscalar(capacidad_inicial)
+
+    # ✓ Función que muestrea los reporteros que toca en este paso
+    def collect(self, model): # recolector, modelo
+        paso = self.num_colectas
+        for nombre, reportero in self.model_reporters.items():
+            intervalo = self.intervalos[nombre]
+            if intervalo and paso % intervalo == 0:
+                valor = getattr(model, reportero) if isinstance(reportero, str) else reportero(model)
+                self.series[nombre].agregar(paso, valor)
+        self.num_colectas += 1
+
+    # ✓ Propiedad compatible con el DataCollector: nombre del reportero -> valores muestreados
+    @property
+    def model_vars(self): # recolector
+        return {nombre: (serie if isinstance(serie, HistorialGrid) else serie.datos())
+                for nombre, serie in self.series.items()}
+
+    # ✓ Función que devuelve los pasos en los que se muestreó un reportero
+    def get_pasos(self, nombre): # recolector, nombre del reportero
+        serie = self.series[nombre]
+        if isinstance(serie, HistorialGrid):
+            return serie.pasos()
+        return serie.pasos[:serie.tamano]
+
+    # ✓ Función compatible con el DataCollector: series escalares en un DataFrame indexado por paso
+    def get_model_vars_dataframe(self): # recolector
+        import pandas as pd
+
+        columnas = {nombre: pd.Series(serie.datos(), index = serie.pasos[:serie.tamano])
+                    for nombre, serie in self.series.items() if isinstance(serie, SerieEscalar)}
+        return pd.DataFrame(columnas)
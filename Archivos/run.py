@@ -1,3 +1,3 @@
-from bot_cleaners.server import server
+from bot_cleaners.__main__ import main
 
-server.launch(open_browser=True)
\ No newline at end of file
+main(["serve"])
@@ -1,9 +1,25 @@
+import base64
+import contextvars
+import os
+import struct
+import time
+import weakref
+import zlib
+from collections import defaultdict
+
 import mesa
+import numpy as np
+from mesa.visualization.ModularVisualization import SocketHandler
 
 from .model import Habitacion, RobotLimpieza, Celda, Mueble, Cargador
 
 MAX_NUMBER_ROBOTS = 20
 
+# Colores del piso en el mapa de calor: limpia, sucia y mueble
+PALETA_PISO = ["#ffffff", "#5b8fd9", "#8b5a2b"]
+# Conexión (pestaña del navegador) para la que se está dibujando el cuadro actual; None fuera de un websocket
+CLIENTE_ACTUAL = contextvars.ContextVar("cliente_actual", default = None)
+
 
 def agent_portrayal(agent):
     if isinstance(agent, RobotLimpieza):
@@ -17,7 +33,8 @@ def agent_portrayal(agent):
                 "w": 0.9, "h": 0.9, "text": "🪑"}
     elif isinstance(agent, Celda):
         portrayal = {"Shape": "rect", "Filled": "true", "Layer": 0, "w": 0.9, "h": 0.9, "text_color": "Black"}
-        if agent.sucia:
+        # Se lee directamente la capa de suciedad del modelo
+        if agent.model.capa_suciedad[agent.pos]:
             portrayal["Color"] = "white"
             portrayal["text"] = "💧"
         else:
@@ -26,7 +43,129 @@ def agent_portrayal(agent):
         return portrayal
 
 
-grid = mesa.visualization.CanvasGrid(agent_portrayal, 20, 20, 400, 400)
+class CanvasHabitacion(mesa.visualization.CanvasGrid):
+    # Igual que CanvasGrid, pero dibuja también las vistas de Celda y Mueble construidas desde las capas del modelo
+    def render(self, model):
+        grid_state = defaultdict(list)
+        for x in range(model.grid.width):
+            for y in range(model.grid.height):
+                for obj in model.get_contenido_celda((x, y)):
+                    portrayal = self.portrayal_method(obj)
+                    if portrayal:
+                        portrayal["x"] = x
+                        portrayal["y"] = y
+                        grid_state[portrayal["Layer"]].append(portrayal)
+
+        return grid_state
+
+
+# ✓ Función que codifica una matriz de índices de color (uint8) como PNG con paleta, en un data URI
+def codificar_png(indices, paleta): # matriz alto x ancho de índices, colores "#rrggbb"
+    alto, ancho = indices.shape
+
+    def bloque(tipo, datos):
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos))
+
+    # Cada fila empieza con el tipo de filtro (0 = ninguno)
+    filas = np.zeros((alto, ancho + 1), dtype = np.uint8)
+    filas[:, 1:] = indices
+    png = b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        bloque(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 3, 0, 0, 0)),
+        bloque(b"PLTE", b"".join(bytes.fromhex(color[1:]) for color in paleta)),
+        bloque(b"IDAT", zlib.compress(filas.tobytes(), 6)),
+        bloque(b"IEND", b""),
+    ])
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+class RasterHabitacion(mesa.visualization.VisualizationElement):
+    # Mapa de calor de la habitación: el piso viaja como un PNG comprimido o como las celdas que cambiaron,
+    # y solo los robots y los cargadores se mandan como posiciones para dibujarlos como figuras
+    local_includes = ["RasterHabitacion.js"]
+    local_dir = os.path.join(os.path.dirname(__file__), "static")
+
+    def __init__(self, tamano_maximo = 600, fps_max = 10, max_cambios = 0.05, cuadros_completos = 100):
+        """
+        :param tamano_maximo: Tamaño máximo del canvas en pixeles (cada celda mide lo mismo en ambos ejes)
+        :param fps_max: Cuadros por segundo máximos que se envían al navegador (el resto se omite)
+        :param max_cambios: Fracción máxima de celdas cambiadas para mandar solo los cambios en lugar del PNG
+        :param cuadros_completos: Cada cuántos cuadros se manda el PNG completo aunque haya pocos cambios
+        """
+        super().__init__()
+        self.intervalo_minimo = 1.0 / fps_max if fps_max else 0.0
+        self.max_cambios = max_cambios
+        self.cuadros_completos = cuadros_completos
+        self.js_code = f"elements.push(new RasterHabitacion({tamano_maximo}, {PALETA_PISO}));"
+        # Estado del último cuadro enviado a cada conexión: todas las pestañas comparten el elemento y el modelo,
+        # pero cada una calcula sus cambios contra lo que ella recibió (una conexión nueva empieza con el PNG)
+        self.clientes = weakref.WeakKeyDictionary()
+
+    # ✓ Función que obtiene el estado de envío de la conexión actual (lo crea si es la primera vez)
+    def estado_cliente(self): # elemento
+        cliente = CLIENTE_ACTUAL.get()
+        # Sin websocket (por ejemplo, al llamar a render directamente) el estado se guarda bajo el propio elemento
+        if cliente is None:
+            cliente = self
+        if cliente not in self.clientes:
+            self.clientes[cliente] = {"modelo": None, "ultimo_piso": None, "ultimo_envio": 0.0, "num_cuadros": 0}
+        return self.clientes[cliente]
+
+    # ✓ Función que obtiene el piso como índices de la paleta (0 = limpia, 1 = sucia, 2 = mueble)
+    def indices_piso(self, model): # elemento, modelo
+        piso = model.capa_suciedad.copy()
+        piso[model.capa_muebles == 1] = 2
+        return piso
+
+    def render(self, model):
+        estado = self.estado_cliente()
+        # Un modelo nuevo (reinicio) o una conexión nueva siempre se dibuja completo; si no, se respeta el límite
+        # de cuadros por segundo de esa conexión
+        nuevo = model is not estado["modelo"]
+        ahora = time.monotonic()
+        if not nuevo and model.running and ahora - estado["ultimo_envio"] < self.intervalo_minimo:
+            return {"omitido": True}
+        estado["ultimo_envio"] = ahora
+
+        piso = self.indices_piso(model)
+        M, N = piso.shape
+        cambios = None if nuevo else np.flatnonzero(piso.ravel() != estado["ultimo_piso"].ravel())
+        estado["num_cuadros"] += 1
+
+        if cambios is not None and cambios.size <= self.max_cambios * piso.size and estado["num_cuadros"] % self.cuadros_completos:
+            # Solo las celdas que cambiaron desde el último cuadro enviado
+            x, y = np.divmod(cambios, N)
+            datos_piso = {"tipo": "cambios", "x": x.tolist(), "y": y.tolist(), "v": piso.ravel()[cambios].tolist()}
+        else:
+            # PNG completo: x hacia la derecha y la y mayor arriba, como en el CanvasGrid de Mesa
+            datos_piso = {"tipo": "png", "datos": codificar_png(piso.T[::-1], PALETA_PISO)}
+
+        estado["modelo"] = model
+        estado["ultimo_piso"] = piso
+        robots = model.schedule.agents
+        return {
+            "ancho": M,
+            "alto": N,
+            "piso": datos_piso,
+            "robots": [coordenada for robot in robots for coordenada in robot.pos],
+            "cargas": [robot.carga for robot in robots],
+            "cargadores": [coordenada for pos in model.pos_cargadores for coordenada in pos],
+        }
+
+
+class SocketHabitacion(SocketHandler):
+    # Igual que el websocket de Mesa, pero marca la conexión que pide el cuadro para que el mapa de calor
+    # calcule los cambios contra el último cuadro que recibió esa misma pestaña
+    @property
+    def viz_state_message(self):
+        marca = CLIENTE_ACTUAL.set(self)
+        try:
+            return super().viz_state_message
+        finally:
+            CLIENTE_ACTUAL.reset(marca)
+
+
+grid = RasterHabitacion()
 
 chart_celdas = mesa.visualization.ChartModule(
     [{"Label": "CeldasSucias", "Color": '#36A2EB', "label": "Celdas Sucias"}],
@@ -80,12 +219,70 @@ model_params = {
         ["Fija", "Aleatoria"],
         "Seleciona la forma se posicionan los robots"
     ),
-    
-    "M": 20,
-    "N": 20,
+    "estrategia": mesa.visualization.Choice(
+        "Estrategia de Recorrido",
+        "Aleatoria",
+        ["Aleatoria", "Frontera", "Boustrophedon"],
+        "Selecciona cómo se mueven los robots cuando no tienen basura alrededor"
+    ),
+    "modo_asignacion": mesa.visualization.Choice(
+        "Asignación de Problemas",
+        "Voraz",
+        ["Voraz", "Subasta"],
+        "Selecciona si cada problema va al robot libre más cercano o se agrupan y reparten con una subasta"
+    ),
+    "modo_cargadores": mesa.visualization.Choice(
+        "Ubicación de los Cargadores",
+        "Fija",
+        ["Fija", "Automatica"],
+        "Selecciona si los cargadores van en la posición original o se reparten automáticamente (k-centro)"
+    ),
+    "num_cargadores": mesa.visualization.Slider(
+        "Número de Cargadores (Automática)",
+        4, # Valor inicial al correr la simulación
+        1, # Valor mínimo
+        16, # Valor máximo
+        1, # Salto del slider
+        description = "Escoge cuántos cargadores se reparten en la ubicación automática",
+    ),
+    "modo_bateria": mesa.visualization.Choice(
+        "Regreso a Cargar",
+        "Fijo",
+        ["Fijo", "Predictivo"],
+        "Selecciona si los robots vuelven al 30% de batería o justo a tiempo según su distancia al cargador más cercano"
+    ),
+    "modo_suciedad": mesa.visualization.Choice(
+        "Llegada de Suciedad",
+        "Ninguna",
+        ["Ninguna", "Poisson", "Focos"],
+        "Selecciona si aparece suciedad nueva en cada paso (la simulación ya no termina al quedar limpia)"
+    ),
+    "tasa_suciedad": mesa.visualization.Slider(
+        "Tasa de Suciedad por Celda y Paso",
+        0.001, # Valor inicial al correr la simulación
+        0.0, # Valor mínimo
+        0.01, # Valor máximo
+        0.0005, # Salto del slider
+        description = "Probabilidad de que una celda se ensucie en cada paso (con llegada de suciedad)",
+    ),
+
+    "M": mesa.visualization.NumberInput(
+        "Ancho de la Habitación (M)",
+        20, # Valor inicial al correr la simulación
+        description = "Número de columnas de la habitación",
+    ),
+    "N": mesa.visualization.NumberInput(
+        "Alto de la Habitación (N)",
+        20, # Valor inicial al correr la simulación
+        description = "Número de filas de la habitación",
+    ),
+    # El mapa de calor lee las capas del modelo: no hace falta guardar fotografías de la grid en cada paso
+    "intervalos_recoleccion": {"Grid": 0},
 }
 
 server = mesa.visualization.ModularServer(
     Habitacion, [grid, chart_celdas, chart_tiempo, chart_movimientos, chart_recarga],
     "botCleaner", model_params, 8521
 )
+# Las reglas agregadas después tienen prioridad sobre las de ModularServer: /ws usa el websocket por conexión
+server.add_handlers(r".*", [(r"/ws", SocketHabitacion)])
@@ -0,0 +1,391 @@
+'''
+Servicio HTTP/JSON (asyncio) para correr simulaciones de barredoras en cola.
+
+A diferencia del `ModularServer` de Mesa (una simulación por navegador en el puerto 8521), este servicio acepta
+varias corridas a la vez: cada parámetro de `Habitacion` que llega se forma en una cola, un pool acotado de
+procesos las ejecuta y las métricas de cada paso (`CeldasSucias`, `Movimientos`, `Recargas`) se transmiten por
+Server-Sent Events mientras la corrida avanza. Los procesos mandan sus métricas en lotes (cada `INTERVALO_LOTE`
+segundos) por una cola compartida, así que una corrida rápida no inunda el servicio con un mensaje por paso.
+
+Rutas:
+    POST   /corridas                 {"parametros": {...}, "max_pasos": 5000} -> {"id": ..., "estado": "en_cola"}
+    GET    /corridas                 Estado de todas las corridas
+    GET    /corridas/<id>            Estado, resultado final y últimas métricas de una corrida
+    GET    /corridas/<id>/eventos    Métricas por SSE (reanuda desde `Last-Event-ID` o `?desde=`), termina con `fin`
+    DELETE /corridas/<id>            Cancela una corrida en cola o en ejecución
+
+Uso:
+    python -m bot_cleaners.servicio --puerto 8522 --trabajadores 4          # solo escucha en 127.0.0.1
+    curl -X POST localhost:8522/corridas -d '{"parametros": {"M": 50, "N": 50, "num_agentes": 10, "seed": 1}}'
+    curl -N localhost:8522/corridas/1/eventos
+'''
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tornado.iostream
+import tornado.web
+
+from .model import Habitacion, get_sucias
+
+# Parámetros de Habitacion que se aceptan por HTTP (no se permiten rutas de archivos del servidor)
+PARAMETROS_PERMITIDOS = {
+    "M", "N", "num_agentes", "porc_celdas_sucias", "porc_muebles", "modo_pos_inicial", "estrategia",
+    "modo_cargadores", "num_cargadores", "pos_cargadores", "modo_bateria", "margen_bateria", "modo_asignacion",
+    "modo_suciedad", "tasa_suciedad", "calentamiento", "max_campos_objetivo", "modo_vectorizado", "seed",
+}
+# Cada cuántos segundos un proceso manda el lote de métricas acumulado
+INTERVALO_LOTE = 0.1
+# Cada cuántos segundos se manda un comentario por SSE para mantener viva la conexión
+INTERVALO_LATIDO = 15
+# Estados en los que una corrida ya no cambia
+ESTADOS_FINALES = ("terminada", "cancelada", "error")
+
+
+# ✓ Función que ejecuta una corrida en un proceso del pool, mandando sus métricas por lotes a la cola compartida
+def ejecutar_corrida(id_corrida, parametros, max_pasos, cola, canceladas): # id, parámetros, límite de pasos, cola, canceladas
+    # Solo se transmiten métricas escalares: no se guardan fotografías de la grid
+    modelo = Habitacion(**parametros, intervalos_recoleccion = {"Grid": 0})
+    lote = list()
+    ultimo_envio = time.monotonic()
+    while modelo.running and modelo.tiempo < max_pasos:
+        modelo.step()
+        # El paso que detecta el salón limpio no avanza el tiempo: no agrega una fila repetida
+        if not modelo.running:
+            break
+        lote.append({
+            "paso": modelo.tiempo,
+            "CeldasSucias": get_sucias(modelo),
+            "Movimientos": modelo.movimientos,
+            "Recargas": modelo.cantidad_recargas,
+        })
+        ahora = time.monotonic()
+        if ahora - ultimo_envio >= INTERVALO_LOTE:
+            cola.put((id_corrida, lote, None))
+            lote = list()
+            ultimo_envio = ahora
+            # La cancelación se revisa junto con cada lote (consultar la lista compartida en cada paso es caro)
+            if id_corrida in canceladas:
+                break
+    if lote:
+        cola.put((id_corrida, lote, None))
+
+    modelo.finalizar()
+    return {
+        "tiempo": modelo.tiempo,
+        "movimientos": modelo.movimientos,
+        "cantidad_recargas": modelo.cantidad_recargas,
+        "limpio": modelo.salon_limpio(),
+    }
+
+
+class Corrida:
+    # Estado de una corrida en el servicio: parámetros, métricas recibidas y aviso a los clientes de SSE
+    def __init__(self, id_corrida: int, parametros: dict, max_pasos: int, max_metricas: int = 10_000):
+        self.id = id_corrida
+        self.parametros = parametros
+        self.max_pasos = max_pasos
+        self.estado = "en_cola"
+        # Solo se guardan las últimas `max_metricas` filas; `descartadas` cuenta las que ya se quitaron
+        self.metricas = list()
+        self.max_metricas = max_metricas
+        self.descartadas = 0
+        self.resultado = None
+        self.error = None
+        self.creada = time.time()
+        # Evento que se reemplaza en cada cambio: quien espera el anterior se despierta
+        self.cambio = asyncio.Event()
+
+    # ✓ Función que avisa a los clientes que esperan un cambio de la corrida
+    def notificar(self): # corrida
+        self.cambio.set()
+        self.cambio = asyncio.Event()
+
+    # ✓ Función que agrega filas de métricas, descartando las más viejas si se pasa del límite
+    def agregar_metricas(self, lote): # corrida, filas nuevas
+        self.metricas.extend(lote)
+        exceso = len(self.metricas) - self.max_metricas
+        if exceso > 0:
+            del self.metricas[:exceso]
+            self.descartadas += exceso
+
+    # ✓ Función que devuelve el número total de filas recibidas (guardadas y descartadas)
+    def total_metricas(self): # corrida
+        return self.descartadas + len(self.metricas)
+
+    # ✓ Función que devuelve las filas guardadas a partir de la fila `desde` (las descartadas se saltan)
+    def metricas_desde(self, desde): # corrida, número de filas que el cliente ya recibió
+        return self.metricas[max(desde - self.descartadas, 0):]
+
+    # ✓ Función que indica si la corrida ya no va a cambiar
+    def finalizada(self): # corrida
+        return self.estado in ESTADOS_FINALES
+
+    # ✓ Función que devuelve el estado de la corrida como diccionario (para las respuestas JSON)
+    def como_dict(self, detalle = False): # corrida, incluir parámetros, resultado y última métrica
+        datos = {"id": self.id, "estado": self.estado, "pasos": self.total_metricas()}
+        if detalle:
+            datos.update({
+                "parametros": self.parametros,
+                "max_pasos": self.max_pasos,
+                "resultado": self.resultado,
+                "error": self.error,
+                "ultima_metrica": self.metricas[-1] if self.metricas else None,
+            })
+        return datos
+
+
+class ServicioSimulaciones:
+    def __init__(self, trabajadores: int = None, max_en_cola: int = 100, max_pasos: int = 100_000,
+                 max_celdas: int = 4_000_000, max_agentes: int = 1_000, max_cargadores: int = 64,
+                 max_metricas: int = 10_000):
+        """
+        :param trabajadores: Número de corridas simultáneas (procesos del pool); por defecto, uno por núcleo
+        :param max_en_cola: Número máximo de corridas esperando (las demás se rechazan con 503)
+        :param max_pasos: Límite de pasos de cualquier corrida
+        :param max_celdas: Tamaño máximo de la habitación (M * N) que se acepta
+        :param max_agentes: Número máximo de robots por corrida
+        :param max_cargadores: Número máximo de cargadores por corrida (cada uno cuesta un recorrido de la habitación)
+        :param max_metricas: Filas de métricas que se guardan por corrida (las más viejas se descartan)
+        """
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.max_en_cola = max_en_cola
+        self.max_pasos = max_pasos
+        self.max_celdas = max_celdas
+        self.max_agentes = max_agentes
+        self.max_cargadores = max_cargadores
+        self.max_metricas = max_metricas
+        self.corridas = dict()
+        self.siguiente_id = 1
+        self.cola = None
+        self.pool = None
+
+    # ✓ Función que arranca el pool de procesos, la lectura de métricas y los trabajadores de la cola
+    async def iniciar(self): # servicio
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize = self.max_en_cola)
+        contexto = multiprocessing.get_context("spawn")
+        self.pool = ProcessPoolExecutor(max_workers = self.trabajadores, mp_context = contexto)
+        # Cola y conjunto compartidos con los procesos del pool (las métricas llegan por un hilo lector)
+        self.administrador = contexto.Manager()
+        self.metricas = self.administrador.Queue()
+        self.canceladas = self.administrador.dict()
+        self.lector = threading.Thread(target = self.leer_metricas, daemon = True)
+        self.lector.start()
+        self.tareas = [asyncio.create_task(self.trabajar()) for _ in range(self.trabajadores)]
+
+    # ✓ Función que detiene los trabajadores, el pool y la lectura de métricas
+    async def detener(self): # servicio
+        for tarea in self.tareas:
+            tarea.cancel()
+        self.pool.shutdown(cancel_futures = True)
+        self.metricas.put(None)
+        self.lector.join()
+        self.administrador.shutdown()
+
+    # ✓ Función que valida los parámetros de una corrida y la forma en la cola
+    def enviar(self, parametros, max_pasos = None): # servicio, parámetros de Habitacion, límite de pasos
+        desconocidos = set(parametros) - PARAMETROS_PERMITIDOS
+        if desconocidos:
+            raise ValueError(f"Parámetros no soportados: {sorted(desconocidos)}")
+        if not all(isinstance(parametros.get(dimension), int) and parametros[dimension] > 0 for dimension in ("M", "N")):
+            raise ValueError("M y N son obligatorios y deben ser enteros positivos")
+        if parametros["M"] * parametros["N"] > self.max_celdas:
+            raise ValueError(f"La habitación excede el máximo de {self.max_celdas} celdas")
+        num_agentes = parametros.get("num_agentes", 5)
+        if not isinstance(num_agentes, int) or not 0 < num_agentes <= self.max_agentes:
+            raise ValueError(f"num_agentes debe ser un entero entre 1 y {self.max_agentes}")
+        num_cargadores = parametros.get("num_cargadores", 4)
+        if not isinstance(num_cargadores, int) or not 0 < num_cargadores <= self.max_cargadores:
+            raise ValueError(f"num_cargadores debe ser un entero entre 1 y {self.max_cargadores}")
+        pos_cargadores = parametros.get("pos_cargadores")
+        if pos_cargadores is not None and not (isinstance(pos_cargadores, list)
+                                               and len(pos_cargadores) <= self.max_cargadores):
+            raise ValueError(f"pos_cargadores debe ser una lista de a lo más {self.max_cargadores} posiciones")
+        max_pasos = min(int(max_pasos or self.max_pasos), self.max_pasos)
+
+        corrida = Corrida(self.siguiente_id, parametros, max_pasos, self.max_metricas)
+        # Si la cola está llena se rechaza (asyncio.QueueFull) sin registrar la corrida
+        self.cola.put_nowait(corrida)
+        self.corridas[corrida.id] = corrida
+        self.siguiente_id += 1
+        return corrida
+
+    # ✓ Función que cancela una corrida (en cola se descarta; en ejecución se detiene en su siguiente lote)
+    def cancelar(self, corrida): # servicio, corrida
+        if corrida.estado == "en_cola":
+            corrida.estado = "cancelada"
+            corrida.notificar()
+        elif corrida.estado == "corriendo":
+            self.canceladas[corrida.id] = True
+
+    # ✓ Función que toma corridas de la cola y las ejecuta en el pool, una a la vez por trabajador
+    async def trabajar(self): # servicio
+        while True:
+            corrida = await self.cola.get()
+            if corrida.estado == "cancelada":
+                continue
+            corrida.estado = "corriendo"
+            corrida.notificar()
+            try:
+                corrida.resultado = await self.loop.run_in_executor(
+                    self.pool, ejecutar_corrida, corrida.id, corrida.parametros, corrida.max_pasos,
+                    self.metricas, self.canceladas)
+                estado = "cancelada" if self.canceladas.pop(corrida.id, False) else "terminada"
+            except Exception as error:
+                estado = "error"
+                corrida.error = f"{type(error).__name__}: {error}"
+            # Los últimos lotes pueden seguir en la cola compartida: el estado final viaja detrás de ellos
+            self.metricas.put((corrida.id, list(), estado))
+
+    # ✓ Función del hilo lector: pasa los lotes de métricas de la cola compartida al loop de asyncio
+    def leer_metricas(self): # servicio
+        while True:
+            mensaje = self.metricas.get()
+            if mensaje is None:
+                break
+            self.loop.call_soon_threadsafe(self.aplicar_lote, *mensaje)
+
+    # ✓ Función que agrega un lote de métricas a su corrida y despierta a sus clientes
+    def aplicar_lote(self, id_corrida, lote, estado): # servicio, id de la corrida, filas, estado final (o None)
+        corrida = self.corridas.get(id_corrida)
+        if corrida is None:
+            return
+        corrida.agregar_metricas(lote)
+        if estado is not None:
+            corrida.estado = estado
+        corrida.notificar()
+
+
+class ManejadorBase(tornado.web.RequestHandler):
+    def initialize(self, servicio):
+        self.servicio = servicio
+
+    # ✓ Función que responde con un JSON y un código de estado
+    def responder(self, datos, estado = 200): # manejador, datos, código HTTP
+        self.set_status(estado)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(datos))
+
+    # ✓ Función que obtiene la corrida de la ruta (responde 404 si no existe)
+    def obtener_corrida(self, id_corrida): # manejador, id de la ruta
+        corrida = self.servicio.corridas.get(int(id_corrida))
+        if corrida is None:
+            self.responder({"error": f"No existe la corrida {id_corrida}"}, 404)
+        return corrida
+
+
+class ManejadorCorridas(ManejadorBase):
+    def get(self):
+        self.responder([corrida.como_dict() for corrida in self.servicio.corridas.values()])
+
+    def post(self):
+        try:
+            cuerpo = json.loads(self.request.body or b"{}")
+            corrida = self.servicio.enviar(cuerpo.get("parametros", {}), cuerpo.get("max_pasos"))
+        except (ValueError, AttributeError) as error:
+            self.responder({"error": str(error)}, 400)
+        except asyncio.QueueFull:
+            self.responder({"error": "La cola de corridas está llena"}, 503)
+        else:
+            self.responder(corrida.como_dict(), 201)
+
+
+class ManejadorCorrida(ManejadorBase):
+    def get(self, id_corrida):
+        corrida = self.obtener_corrida(id_corrida)
+        if corrida is not None:
+            self.responder(corrida.como_dict(detalle = True))
+
+    def delete(self, id_corrida):
+        corrida = self.obtener_corrida(id_corrida)
+        if corrida is not None:
+            self.servicio.cancelar(corrida)
+            self.responder(corrida.como_dict())
+
+
+class ManejadorEventos(ManejadorBase):
+    # Métricas por Server-Sent Events: cada evento lleva las filas nuevas y su id es el número de filas enviadas
+    async def get(self, id_corrida):
+        corrida = self.obtener_corrida(id_corrida)
+        if corrida is None:
+            return
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        enviadas = int(self.get_argument("desde", self.request.headers.get("Last-Event-ID", 0)))
+
+        try:
+            while True:
+                # Se toma el evento antes de revisar el estado, para no perder un aviso entre ambos
+                cambio = corrida.cambio
+                if corrida.total_metricas() > enviadas:
+                    # Si el cliente se atrasó más que el límite, se salta las filas descartadas
+                    filas = corrida.metricas_desde(enviadas)
+                    enviadas = corrida.total_metricas()
+                    self.write(f"id: {enviadas}\nevent: metricas\ndata: {json.dumps(filas)}\n\n")
+                    await self.flush()
+                elif corrida.finalizada():
+                    self.write(f"event: fin\ndata: {json.dumps(corrida.como_dict(detalle = True))}\n\n")
+                    await self.flush()
+                    break
+                else:
+                    try:
+                        await asyncio.wait_for(cambio.wait(), INTERVALO_LATIDO)
+                    except asyncio.TimeoutError:
+                        self.write(": latido\n\n")
+                        await self.flush()
+        except tornado.iostream.StreamClosedError:
+            # El cliente cerró la conexión: puede reanudar después con Last-Event-ID
+            return
+        self.finish()
+
+
+# ✓ Función que crea la aplicación de tornado con las rutas del servicio
+def crear_aplicacion(servicio): # servicio de simulaciones
+    argumentos = {"servicio": servicio}
+    return tornado.web.Application([
+        (r"/corridas", ManejadorCorridas, argumentos),
+        (r"/corridas/(\d+)", ManejadorCorrida, argumentos),
+        (r"/corridas/(\d+)/eventos", ManejadorEventos, argumentos),
+    ])
+
+
+# ✓ Función que arranca el servicio y lo deja escuchando hasta que se interrumpa
+async def servir(puerto, trabajadores = None, max_en_cola = 100, max_pasos = 100_000,
+                 host = "127.0.0.1"): # puerto, procesos, cola, límite de pasos, interfaz (por defecto, solo local)
+    servicio = ServicioSimulaciones(trabajadores, max_en_cola, max_pasos)
+    await servicio.iniciar()
+    servidor = crear_aplicacion(servicio).listen(puerto, address = host)
+    print(f"Servicio de simulaciones en http://{host}:{puerto} ({servicio.trabajadores} trabajadores)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        servidor.stop()
+        await servicio.detener()
+
+
+# ✓ Función principal: lee los argumentos de la línea de comandos y arranca el servicio
+def main(argumentos = None): # lista de argumentos (None = sys.argv)
+    parser = argparse.ArgumentParser(description = "Servicio HTTP para correr simulaciones de barredoras en cola")
+    parser.add_argument("--puerto", type = int, default = 8522)
+    parser.add_argument("--host", default = "127.0.0.1",
+                        help = "Interfaz en la que escucha (por defecto, solo la máquina local)")
+    parser.add_argument("--trabajadores", type = int, default = None,
+                        help = "Corridas simultáneas (por defecto, una por núcleo)")
+    parser.add_argument("--max-en-cola", type = int, default = 100)
+    parser.add_argument("--max-pasos", type = int, default = 100_000)
+    args = parser.parse_args(argumentos)
+    try:
+        asyncio.run(servir(args.puerto, args.trabajadores, args.max_en_cola, args.max_pasos, args.host))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+/* RasterHabitacion.js
+ Dibuja la habitación de barredoras como un mapa de calor: el piso llega como una imagen PNG (un pixel por celda)
+ o como las celdas que cambiaron, y solo los robots y los cargadores se dibujan como figuras.
+ El tamaño del canvas se ajusta a las dimensiones M x N que envía el servidor.
+*/
+
+const RasterHabitacion = function (tamano_maximo, paleta) {
+  // Canvas visible
+  const canvas = document.createElement("canvas");
+  canvas.className = "world-grid";
+  canvas.style.imageRendering = "pixelated";
+  const parent = document.createElement("div");
+  parent.appendChild(canvas);
+  document.getElementById("elements").appendChild(parent);
+  const context = canvas.getContext("2d");
+
+  // Canvas auxiliar con el piso a un pixel por celda (y invertido: la fila 0 es la y más alta)
+  const piso = document.createElement("canvas");
+  const contextoPiso = piso.getContext("2d");
+  let ancho = 0;
+  let alto = 0;
+  let celda = 1;
+  // Último estado de robots y cargadores (se vuelve a dibujar encima del piso)
+  let ultimo = null;
+  // Indica si ya se cargó un PNG completo: los cambios solo se aplican sobre un piso conocido
+  let tieneBase = false;
+
+  const colores = paleta.map((hex) => [
+    parseInt(hex.slice(1, 3), 16),
+    parseInt(hex.slice(3, 5), 16),
+    parseInt(hex.slice(5, 7), 16),
+  ]);
+
+  // Ajusta los canvas si cambian las dimensiones de la habitación
+  const ajustarTamano = (M, N) => {
+    if (M === ancho && N === alto) return;
+    ancho = M;
+    alto = N;
+    celda = Math.max(1, Math.floor(tamano_maximo / Math.max(M, N)));
+    canvas.width = M * celda;
+    canvas.height = N * celda;
+    parent.style.height = `${N * celda}px`;
+    piso.width = M;
+    piso.height = N;
+  };
+
+  // Dibuja el piso escalado y, encima, los cargadores y robots
+  const dibujar = () => {
+    context.imageSmoothingEnabled = false;
+    context.drawImage(piso, 0, 0, canvas.width, canvas.height);
+    if (ultimo === null) return;
+
+    context.fillStyle = "#f2c200";
+    const cargadores = ultimo.cargadores;
+    for (let i = 0; i < cargadores.length; i += 2) {
+      context.fillRect(cargadores[i] * celda, (alto - 1 - cargadores[i + 1]) * celda, celda, celda);
+    }
+
+    const robots = ultimo.robots;
+    const radio = Math.max(1.5, celda / 2);
+    for (let i = 0; i < robots.length; i += 2) {
+      const carga = ultimo.cargas[i / 2];
+      context.fillStyle = carga > 30 ? "#1b1b1b" : carga > 0 ? "#d9480f" : "#c92a2a";
+      context.beginPath();
+      context.arc((robots[i] + 0.5) * celda, (alto - 0.5 - robots[i + 1]) * celda, radio, 0, 2 * Math.PI);
+      context.fill();
+    }
+  };
+
+  // Aplica una lista de celdas cambiadas sobre el piso
+  const aplicarCambios = (cambios) => {
+    const imagen = contextoPiso.getImageData(0, 0, ancho, alto);
+    for (let i = 0; i < cambios.x.length; i++) {
+      const p = 4 * ((alto - 1 - cambios.y[i]) * ancho + cambios.x[i]);
+      const color = colores[cambios.v[i]];
+      imagen.data[p] = color[0];
+      imagen.data[p + 1] = color[1];
+      imagen.data[p + 2] = color[2];
+      imagen.data[p + 3] = 255;
+    }
+    contextoPiso.putImageData(imagen, 0, 0);
+  };
+
+  // Carga una imagen PNG (data URI) sobre el piso
+  const cargarPng = (datos) =>
+    new Promise((resolve) => {
+      const imagen = new Image();
+      imagen.onload = () => {
+        contextoPiso.clearRect(0, 0, ancho, alto);
+        contextoPiso.drawImage(imagen, 0, 0);
+        resolve();
+      };
+      imagen.src = datos;
+    });
+
+  // Los cuadros se procesan en orden: un cambio no se aplica antes de que termine de cargar el PNG anterior
+  let cola = Promise.resolve();
+
+  this.render = (data) => {
+    // Cuadro omitido por el límite de cuadros por segundo del servidor
+    if (data.omitido) return;
+    cola = cola.then(async () => {
+      ajustarTamano(data.ancho, data.alto);
+      ultimo = data;
+      if (data.piso.tipo === "png") {
+        await cargarPng(data.piso.datos);
+        tieneBase = true;
+      } else if (tieneBase) {
+        aplicarCambios(data.piso);
+      }
+      window.requestAnimationFrame(dibujar);
+    });
+  };
+
+  this.reset = () => {
+    ultimo = null;
+    tieneBase = false;
+    context.clearRect(0, 0, canvas.width, canvas.height);
+  };
+};
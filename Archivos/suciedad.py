@@ -0,0 +1,66 @@
+'''
+Procesos de llegada de suciedad para correr la habitación en estado estable.
+
+Con un proceso de suciedad el modelo no termina al quedar limpio: en cada paso aparecen celdas sucias nuevas y los
+robots atienden una carga sostenida. Los procesos muestrean las llegadas en bloque con NumPy (nunca recorren la
+habitación celda por celda) y devuelven índices planos (x * N + y); el modelo descarta los que caen sobre muebles,
+cargadores, robots o celdas que ya estaban sucias. Hay dos procesos:
+    - Poisson (el proceso base): cada celda se ensucia de forma independiente con probabilidad `tasa` en cada paso.
+    - Focos: la misma cantidad esperada de suciedad, pero concentrada alrededor de unos cuantos focos fijos
+      (entradas, cocinas...) con una dispersión normal.
+El modelo le pasa a cada proceso todas sus opciones por nombre (p. ej. `num_focos`); cada uno toma las suyas.
+
+Uso:
+    modelo = Habitacion(50, 50, porc_celdas_sucias = 0.0, modo_suciedad = "Focos", tasa_suciedad = 0.002)
+'''
+
+import numpy as np
+
+
+class SuciedadPoisson:
+    # Proceso base: muestrea las celdas que se ensucian en un paso, todas con la misma probabilidad
+    def __init__(self, modelo, tasa: float, **opciones):
+        """
+        :param modelo: Habitación a la que llega la suciedad
+        :param tasa: Celdas sucias nuevas esperadas por celda y por paso
+        :param opciones: Opciones de otros procesos (p. ej. `num_focos`), que este no usa
+        """
+        self.M, self.N = modelo.capa_suciedad.shape
+        self.tasa = tasa
+        # Generador propio, sembrado desde el del modelo para que las corridas sean reproducibles
+        self.rng = np.random.default_rng(modelo.random.getrandbits(64))
+
+    # ✓ Función que devuelve los índices planos de las celdas que se ensucian en este paso: primero cuántas (binomial)
+    # y luego dónde (uniforme)
+    def generar(self): # proceso
+        total = self.M * self.N
+        return self.rng.integers(0, total, size = self.rng.binomial(total, self.tasa))
+
+
+class SuciedadFocos(SuciedadPoisson):
+    def __init__(self, modelo, tasa: float, num_focos: int = 4, radio: float = None, **opciones):
+        """
+        :param num_focos: Número de focos de suciedad (se eligen al azar entre las celdas libres)
+        :param radio: Desviación estándar (en celdas) de la suciedad alrededor de cada foco
+        """
+        super().__init__(modelo, tasa, **opciones)
+        self.radio = radio or max(2.0, min(self.M, self.N) / 10)
+        libres = np.flatnonzero((modelo.capa_muebles == 0) & (modelo.capa_cargadores == 0))
+        focos = self.rng.choice(libres, size = min(num_focos, libres.size), replace = False)
+        self.focos_x, self.focos_y = np.divmod(focos, self.N)
+
+    # ✓ Función que muestrea las llegadas alrededor de los focos (misma cantidad esperada que el proceso Poisson)
+    def generar(self):
+        cantidad = self.rng.poisson(self.tasa * self.M * self.N)
+        foco = self.rng.integers(0, self.focos_x.size, size = cantidad)
+        x = np.rint(self.focos_x[foco] + self.rng.normal(0, self.radio, cantidad)).astype(np.int64)
+        y = np.rint(self.focos_y[foco] + self.rng.normal(0, self.radio, cantidad)).astype(np.int64)
+        dentro = (x >= 0) & (x < self.M) & (y >= 0) & (y < self.N)
+        return x[dentro] * self.N + y[dentro]
+
+
+# Procesos disponibles por nombre (las opciones del parámetro `modo_suciedad` del modelo; 'Ninguna' = sin llegadas)
+PROCESOS_SUCIEDAD = {
+    "Poisson": SuciedadPoisson,
+    "Focos": SuciedadFocos,
+}
@@ -0,0 +1,278 @@
+'''
+Paso sincrónico vectorizado de la flota de robots.
+
+En lugar de activar a cada `RobotLimpieza` en orden aleatorio, evalúa las cuatro reglas de la simulación para todos
+los robots a la vez con máscaras de NumPy (cargarse, viajar a un objetivo, batería baja y limpiar), resuelve los
+conflictos de movimiento de forma determinista (gana el robot de menor índice) y limpia las celdas en bloque.
+Al final de cada paso se copian los resultados a los agentes para que el resto del modelo los siga viendo.
+'''
+
+import numpy as np
+
+from .model import INALCANZABLE, DESPLAZAMIENTOS_MOORE, PASOS_BLOQUEO
+from .eventos import MOVIMIENTO, CARGA
+from .estrategias import EstrategiaAleatoria
+
+# Desplazamientos de la vecindad de Moore, en el mismo orden que `MultiGrid.get_neighborhood`
+DESPLAZAMIENTOS = np.array(DESPLAZAMIENTOS_MOORE)
+
+
+class PasoVectorizado:
+    def __init__(self, modelo):
+        self.modelo = modelo
+        M, N = modelo.grid.width, modelo.grid.height
+        self.M, self.N = M, N
+
+        # Robots en orden fijo (por unique_id); el índice en los arreglos es la prioridad ante conflictos
+        self.robots = sorted(modelo.schedule.agents, key = lambda robot: robot.unique_id)
+        self.ids = np.array([robot.unique_id for robot in self.robots], dtype = np.int64)
+        self.pos = np.array([robot.pos[0] * N + robot.pos[1] for robot in self.robots], dtype = np.int64)
+        self.carga = np.array([robot.carga for robot in self.robots], dtype = np.int64)
+        self.movimientos = np.array([robot.movimientos for robot in self.robots], dtype = np.int64)
+        self.celdas_sucias = np.array([robot.celdas_sucias for robot in self.robots], dtype = np.int64)
+        self.pasos_bloqueado = np.array([robot.pasos_bloqueado for robot in self.robots], dtype = np.int64)
+
+        # Capa plana de cargadores (la de suciedad se lee del modelo, ver la propiedad `suciedad`; los muebles ya
+        # están excluidos de la tabla de vecinos del modelo)
+        self.cargadores = modelo.capa_cargadores.ravel().astype(bool)
+
+        # Campos de distancias de los cargadores apilados: (cargadores, M * N)
+        self.pos_cargadores = np.array([x * N + y for x, y in modelo.pos_cargadores], dtype = np.int64)
+        self.campos_cargadores = np.stack([modelo.campos_cargadores[pos].ravel() for pos in modelo.pos_cargadores])
+        # Índice de cada cargador dentro de la pila (-1 en celdas sin cargador)
+        self.indice_cargador = np.full(M * N, -1, dtype = np.int64)
+        self.indice_cargador[self.pos_cargadores] = np.arange(len(self.pos_cargadores))
+
+        # Generador propio, sembrado desde el generador del modelo para que las corridas sean reproducibles
+        self.rng = np.random.default_rng(modelo.random.getrandbits(64))
+
+    # ✓ Propiedad con la capa de suciedad plana: es una vista, así que se escribe directamente en el modelo
+    # (se obtiene cada vez para que siga siendo una vista después de restaurar un checkpoint)
+    @property
+    def suciedad(self): # paso
+        return self.modelo.capa_suciedad.ravel()
+
+    # ✓ Propiedad con el número de robots en cada celda: es una vista del mapa de ocupación del modelo
+    @property
+    def ocupacion(self): # paso
+        return np.frombuffer(self.modelo.ocupacion_robots, dtype = np.intc)
+
+    # ✓ Función que obtiene las posiciones vecinas (y si son válidas) de un grupo de robots
+    def vecinos(self, pos): # paso, posiciones planas de los robots
+        # La tabla de vecinos del modelo ya excluye los muebles y las posiciones fuera de la habitación
+        candidatos = self.modelo.tabla_vecinos[pos].astype(np.int64)
+        validos = candidatos >= 0
+        candidatos[~validos] = 0
+        # Los vecinos ocupados por robots nunca están disponibles
+        validos &= self.ocupacion[candidatos] == 0
+        return candidatos, validos
+
+    # ✓ Función que lee los objetivos de los agentes (notificar_problema los asigna fuera de este paso)
+    def leer_objetivos(self): # paso
+        objetivos = np.full(len(self.robots), -1, dtype = np.int64)
+        for i, robot in enumerate(self.robots):
+            if robot.objetivo:
+                objetivos[i] = robot.objetivo[0] * self.N + robot.objetivo[1]
+        return objetivos
+
+    # ✓ Función que acerca a los robots que viajan a su objetivo siguiendo los campos de distancias
+    def viajar(self, indices, objetivos, sig_pos): # paso, robots que viajan, objetivos planos, siguientes posiciones
+        # Hacia cargadores: todos a la vez, con los campos apilados
+        a_cargador = self.cargadores[objetivos[indices]]
+        grupo = indices[a_cargador]
+        if grupo.size:
+            cargador = self.indice_cargador[objetivos[grupo]]
+            candidatos, validos = self.vecinos(self.pos[grupo])
+            distancias = np.where(validos, self.campos_cargadores[cargador[:, None], candidatos], INALCANZABLE)
+            distancia_actual = self.campos_cargadores[cargador, self.pos[grupo]]
+            estricto = False
+            if self.modelo.modo_bateria == 'Predictivo':
+                # Con el planificador predictivo, los que llegarían antes de su turno esperan donde están
+                esperan = np.array([self.modelo.espera_cargador(int(self.ids[i]), divmod(int(objetivos[i]), self.N), distancia) > 0
+                                    for i, distancia in zip(grupo.tolist(), distancia_actual.tolist())], dtype = bool)
+                grupo, candidatos = grupo[~esperan], candidatos[~esperan]
+                distancias, distancia_actual = distancias[~esperan], distancia_actual[~esperan]
+                # y solo rodean (paso a la misma distancia) los que tienen batería de sobra
+                estricto = self.carga[grupo] <= distancia_actual + 1
+            self.avanzar_por_campo(grupo, candidatos, distancias, distancia_actual, objetivos, sig_pos, estricto = estricto)
+
+        # Hacia otros objetivos (solicitudes de ayuda): los vecinos se calculan en bloque, cada robot consulta su campo
+        grupo = indices[~a_cargador]
+        if grupo.size:
+            candidatos, validos = self.vecinos(self.pos[grupo])
+            # Solo se pisan cargadores si el objetivo es un cargador
+            validos &= ~self.cargadores[candidatos]
+            distancias = np.full(candidatos.shape, INALCANZABLE, dtype = np.int64)
+            distancia_actual = np.empty(grupo.size, dtype = np.int64)
+
+            cand_x, cand_y = np.divmod(candidatos, self.N)
+            cand_x, cand_y, validos_lista = cand_x.tolist(), cand_y.tolist(), validos.tolist()
+            for fila, (objetivo, pos) in enumerate(zip(objetivos[grupo].tolist(), self.pos[grupo].tolist())):
+                pos_xy = divmod(pos, self.N)
+                # Los campos de estos objetivos pueden estar acotados: se pide uno que cubra la posición del robot
+                campo = self.modelo.get_campo_distancias(divmod(objetivo, self.N), pos_xy)
+                distancia_actual[fila] = campo[pos_xy]
+                for k, valido in enumerate(validos_lista[fila]):
+                    if valido:
+                        distancias[fila, k] = campo[cand_x[fila][k], cand_y[fila][k]]
+
+            self.avanzar_por_campo(grupo, candidatos, distancias, distancia_actual, objetivos, sig_pos)
+
+    # ✓ Función que elige, para cada robot del grupo, el vecino más cercano al objetivo
+    def avanzar_por_campo(self, grupo, candidatos, distancias, distancia_actual, objetivos, sig_pos, estricto = False):
+        filas = np.arange(grupo.size)
+        mejor = distancias.argmin(axis = 1)
+        distancia_mejor = distancias[filas, mejor]
+
+        # Objetivos inalcanzables se descartan; si no hay un paso que no aleje al robot (o que lo acerque, para los
+        # robots estrictos), espera
+        inalcanzable = distancia_actual == INALCANZABLE
+        objetivos[grupo[inalcanzable]] = -1
+        for i in grupo[inalcanzable].tolist():
+            self.modelo.liberar_cargador(int(self.ids[i]))
+        avanza = ~inalcanzable & (distancia_mejor <= distancia_actual - estricto)
+        sig_pos[grupo[avanza]] = candidatos[filas, mejor][avanza]
+
+        # Con el planificador predictivo, tras varios pasos bloqueados los robots sueltan su objetivo (una solicitud
+        # de ayuda se abandona y el lugar en la cola del cargador se libera), igual que en `RobotLimpieza`
+        self.pasos_bloqueado[grupo[avanza]] = 0
+        if self.modelo.modo_bateria == 'Predictivo':
+            bloqueados = grupo[~inalcanzable & ~avanza]
+            self.pasos_bloqueado[bloqueados] += 1
+            for i in bloqueados[self.pasos_bloqueado[bloqueados] >= PASOS_BLOQUEO].tolist():
+                objetivos[i] = -1
+                self.modelo.liberar_cargador(int(self.ids[i]))
+                self.pasos_bloqueado[i] = 0
+
+    # ✓ Función que elige al azar una columna verdadera de cada fila de una máscara
+    def elegir(self, mascara): # paso, máscara (robots x vecinos)
+        claves = np.where(mascara, self.rng.random(mascara.shape), -1.0)
+        return claves.argmax(axis = 1)
+
+    # ✓ Función encargada de ejecutar un paso sincrónico de toda la flota
+    def step(self): # paso
+        modelo = self.modelo
+        objetivos = self.leer_objetivos()
+        sig_pos = self.pos.copy()
+
+        # El robot llegó a su objetivo
+        objetivos[objetivos == self.pos] = -1
+        # Carga con la que cada robot ya debe volver a cargarse (según el modo de batería del modelo)
+        umbral = modelo.umbral_bateria(self.pos)
+        # Con el planificador predictivo, las solicitudes de ayuda se abandonan cuando ya hay que volver
+        if modelo.modo_bateria == 'Predictivo':
+            objetivos[(objetivos >= 0) & ~self.cargadores[np.maximum(objetivos, 0)] & (self.carga <= umbral)] = -1
+
+        # 1. Robots cargándose
+        cargando = (self.carga < 100) & self.cargadores[self.pos]
+        self.carga[cargando] = np.minimum(self.carga[cargando] + 25, 100)
+        completos = cargando & (self.carga == 100)
+        modelo.cantidad_recargas += int(np.count_nonzero(completos))
+        # Colas de los cargadores: los que terminaron liberan su lugar, el resto actualiza lo que le falta
+        for i in np.flatnonzero(cargando).tolist():
+            if completos[i]:
+                modelo.liberar_cargador(int(self.ids[i]))
+            else:
+                modelo.actualizar_reserva(int(self.ids[i]), int(self.carga[i]))
+        if modelo.eventos is not None and cargando.any():
+            x, y = np.divmod(self.pos[cargando], self.N)
+            modelo.eventos.registrar_bloque(modelo.tiempo, CARGA, self.ids[cargando], x, y, self.carga[cargando])
+
+        # 2. Robots con un objetivo asignado
+        viajando = ~cargando & (objetivos >= 0)
+        # 3. Robots con batería baja: se les asigna el cargador con menor espera más viaje y viajan hacia él
+        bateria_baja = ~cargando & ~viajando & (self.carga <= umbral)
+        if bateria_baja.any():
+            distancias = self.campos_cargadores[:, self.pos[bateria_baja]]
+            # Las reservas se hacen en orden de índice, así cada robot ve la cola con las reservas anteriores
+            for columna, i in enumerate(np.flatnonzero(bateria_baja).tolist()):
+                x, y = modelo.asignar_cargador(int(self.ids[i]), distancias[:, columna].tolist(), int(self.carga[i]))
+                objetivos[i] = x * self.N + y
+                modelo.estrategia.olvidar(int(self.ids[i]))
+            viajando |= bateria_baja
+        viajeros = np.flatnonzero(viajando)
+        if viajeros.size:
+            self.viajar(viajeros, objetivos, sig_pos)
+
+        # 4. Robots limpiando
+        limpiadores = np.flatnonzero(~cargando & ~viajando)
+        if limpiadores.size:
+            candidatos, validos = self.vecinos(self.pos[limpiadores])
+            validos &= ~self.cargadores[candidatos]
+            sucias = validos & (self.suciedad[candidatos] == 1)
+            self.celdas_sucias[limpiadores] = sucias.sum(axis = 1)
+
+            # Robots con mucha basura alrededor agregan un problema
+            for i in limpiadores[self.celdas_sucias[limpiadores] >= 4]:
+                modelo.pedir_ayuda_aux(self.robots[i].pos, int(self.celdas_sucias[i]))
+
+            # Con basura alrededor se elige una celda sucia; si no, cualquier vecino disponible
+            filas = np.arange(limpiadores.size)
+            hay_sucias = self.celdas_sucias[limpiadores] > 0
+            eleccion = np.where(hay_sucias, self.elegir(sucias), self.elegir(validos))
+            puede_moverse = hay_sucias | validos.any(axis = 1)
+            sig_pos[limpiadores[puede_moverse]] = candidatos[filas, eleccion][puede_moverse]
+
+            # Con otra estrategia de recorrido, los robots sin basura alrededor le piden su siguiente posición
+            if not isinstance(modelo.estrategia, EstrategiaAleatoria):
+                for fila in np.flatnonzero(~hay_sucias).tolist():
+                    i = int(limpiadores[fila])
+                    disponibles = [divmod(int(c), self.N) for c in candidatos[fila][validos[fila]]]
+                    x, y = modelo.estrategia.siguiente_pos(self.robots[i], disponibles)
+                    sig_pos[i] = x * self.N + y
+            self.celdas_sucias[limpiadores[hay_sucias]] -= 1
+
+        # Con el perfilado activo se cuentan las reglas aplicadas (su costo queda dentro de la fase "schedule")
+        if modelo.perfil is not None:
+            modelo.perfil.registrar_regla("cargar", veces = int(np.count_nonzero(cargando)))
+            modelo.perfil.registrar_regla("viajar", veces = int(np.count_nonzero(viajando & ~bateria_baja)))
+            modelo.perfil.registrar_regla("bateria_baja", veces = int(np.count_nonzero(bateria_baja)))
+            modelo.perfil.registrar_regla("limpiar", veces = int(limpiadores.size))
+
+        # Los robots sin batería no pueden moverse: no compiten por celdas (si no, bloquearían para siempre a otro)
+        sig_pos[self.carga == 0] = self.pos[self.carga == 0]
+        # Conflictos: si varios robots eligen la misma celda, solo avanza el de menor índice
+        quieren_moverse = np.flatnonzero(sig_pos != self.pos)
+        _, primeros = np.unique(sig_pos[quieren_moverse], return_index = True)
+        perdedores = np.ones(quieren_moverse.size, dtype = bool)
+        perdedores[primeros] = False
+        sig_pos[quieren_moverse[perdedores]] = self.pos[quieren_moverse[perdedores]]
+
+        # Se limpian en bloque las celdas a las que entran los robots
+        ganadores = quieren_moverse[~perdedores]
+        modelo.limpiar_celdas(sig_pos[ganadores], self.ids[ganadores])
+
+        # Avance (todos los ganadores tienen batería)
+        movidos = ganadores
+        self.carga[movidos] -= 1
+        self.movimientos[movidos] += 1
+        modelo.movimientos += int(movidos.size)
+        ocupacion = self.ocupacion
+        np.subtract.at(ocupacion, self.pos[movidos], 1)
+        np.add.at(ocupacion, sig_pos[movidos], 1)
+        self.pos[movidos] = sig_pos[movidos]
+        # Robots sin batería fuera de un cargador ya no llegarán: quedan varados y dejan libre su lugar en la cola
+        for i in movidos[(self.carga[movidos] == 0) & ~self.cargadores[self.pos[movidos]]].tolist():
+            modelo.robots_varados += 1
+            modelo.liberar_cargador(int(self.ids[i]))
+        if modelo.eventos is not None and movidos.size:
+            x, y = np.divmod(self.pos[movidos], self.N)
+            modelo.eventos.registrar_bloque(modelo.tiempo, MOVIMIENTO, self.ids[movidos], x, y, self.carga[movidos])
+
+        self.escribir_agentes(objetivos, sig_pos, movidos)
+
+    # ✓ Función que copia el estado de los arreglos a los agentes
+    def escribir_agentes(self, objetivos, sig_pos, movidos): # paso, objetivos, siguientes posiciones, robots movidos
+        N = self.N
+        # El mapa de ocupación ya se actualizó en bloque: solo se mueven los agentes en la grid
+        for i in movidos:
+            self.modelo.grid.move_agent(self.robots[i], (int(self.pos[i]) // N, int(self.pos[i]) % N))
+
+        for i, robot in enumerate(self.robots):
+            robot.carga = int(self.carga[i])
+            robot.movimientos = int(self.movimientos[i])
+            robot.celdas_sucias = int(self.celdas_sucias[i])
+            robot.pasos_bloqueado = int(self.pasos_bloqueado[i])
+            robot.objetivo = (int(objetivos[i]) // N, int(objetivos[i]) % N) if objetivos[i] >= 0 else None
+            robot.sig_pos = (int(sig_pos[i]) // N, int(sig_pos[i]) % N)
+            self.modelo.indice_robots.actualizar(robot)
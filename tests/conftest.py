@@ -0,0 +1,13 @@
+import pytest
+
+
+# ✓ Función que avanza un modelo hasta que termine o llegue al límite de pasos
+def correr(modelo, max_pasos: int = 3000): # modelo, límite de pasos
+    while modelo.running and modelo.tiempo < max_pasos:
+        modelo.step()
+    return modelo
+
+
+@pytest.fixture
+def correr_modelo():
+    return correr
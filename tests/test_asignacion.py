@@ -0,0 +1,84 @@
+import pytest
+
+from bot_cleaners.asignacion import ASIGNADORES, AsignadorVoraz, subasta
+from bot_cleaners.eventos import AYUDA, LectorEventos
+from bot_cleaners.model import Habitacion, IndiceRobotsLibres
+
+
+class RobotFalso:
+    # Lo mínimo que el índice espacial lee de un robot
+    def __init__(self, unique_id, pos):
+        self.unique_id = unique_id
+        self.pos = pos
+        self.celdas_sucias = 0
+        self.objetivo = None
+
+
+def test_la_subasta_encuentra_el_emparejamiento_optimo():
+    # Voraz le daría el objeto 0 a la persona 0 y dejaría a la 1 sin nada
+    beneficios = [[(0, 10.0), (1, 9.0)], [(0, 8.0)]]
+    assert subasta(beneficios, 2) == [1, 0]
+
+
+def test_la_subasta_deja_sin_objeto_a_quien_no_le_conviene():
+    assert subasta([[(0, 5.0)], [(0, 4.0)], []], 1) == [0, None, None]
+
+
+def test_todos_los_asignadores_comparten_la_base():
+    assert all(issubclass(asignador, AsignadorVoraz) for asignador in ASIGNADORES.values())
+
+
+@pytest.mark.parametrize("num_robots", [1, 3, 40])
+def test_la_busqueda_en_lote_coincide_con_la_del_indice(num_robots):
+    indice = IndiceRobotsLibres(60, 60)
+    for i in range(num_robots):
+        # Varios robots a la misma distancia: el desempate es por id
+        indice.actualizar(RobotFalso(i, ((7 * i) % 60, (11 * i) % 60)))
+    posiciones = [(0, 0), (30, 30), (59, 1), (14, 22)]
+
+    esperado = [indice.k_mas_cercanos(pos, 4) for pos in posiciones]
+    assert indice.k_mas_cercanos_lote(posiciones, 4) == esperado
+    # Sin lugar para medir todas las distancias se usa la búsqueda por anillos
+    assert indice.k_mas_cercanos_lote(posiciones, 4, max_pares = 0) == esperado
+
+
+def test_sin_robots_libres_no_hay_candidatos():
+    indice = IndiceRobotsLibres(20, 20)
+    assert indice.k_mas_cercanos_lote([(1, 1), (5, 5)], 4) == [[], []]
+
+
+def test_la_subasta_no_le_da_dos_problemas_al_mismo_robot(correr_modelo):
+    modelo = Habitacion(40, 40, num_agentes = 15, modo_asignacion = 'Subasta', seed = 2)
+    for _ in range(150):
+        modelo.step()
+        asignaciones = modelo.asignador.asignaciones
+        # Cada robot asignado va hacia su problema
+        assert all(robot.objetivo == pos for robot, (_, pos) in asignaciones.items())
+    assert correr_modelo(modelo).salon_limpio()
+
+
+@pytest.mark.parametrize("modo", ["Voraz", "Subasta"])
+def test_un_robot_que_rechaza_la_ayuda_no_cuenta_como_asignado(tmp_path, modo):
+    ruta = str(tmp_path / "eventos.bin")
+    modelo = Habitacion(30, 30, num_agentes = 3, porc_celdas_sucias = 0.0, porc_muebles = 0.0,
+                        modo_pos_inicial = 'Aleatoria', modo_asignacion = modo, ruta_eventos = ruta, seed = 1)
+    ocupado, *libres = sorted(modelo.schedule.agents, key = lambda robot: robot.unique_id)
+    problema = ocupado.pos
+    modelo.capa_suciedad[problema] = 1
+    # El índice todavía lo tiene libre, pero ya encontró basura a su alrededor
+    ocupado.celdas_sucias = 1
+
+    modelo.asignador.asignar([(3, problema)])
+    if modo == "Subasta":
+        # El problema rechazado queda pendiente y se asigna en el siguiente paso
+        assert all(robot.objetivo is None for robot in libres)
+        modelo.asignador.asignar([])
+    assert ocupado.objetivo is None
+    assert ocupado not in modelo.indice_robots.cubeta_robot
+    asignados = [robot for robot in libres if robot.objetivo == problema]
+    assert len(asignados) == 1
+    modelo.finalizar()
+
+    eventos = LectorEventos(ruta).eventos
+    ayudas = eventos[eventos["tipo"] == AYUDA]
+    assert ayudas["robot"].tolist() == [asignados[0].unique_id]
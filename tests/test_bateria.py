@@ -0,0 +1,45 @@
+import pytest
+
+from bot_cleaners.model import Habitacion, UMBRAL_BATERIA
+
+
+@pytest.mark.parametrize("semilla", [1, 4])
+@pytest.mark.parametrize("vectorizado", [False, True])
+def test_el_modo_predictivo_termina_de_limpiar(correr_modelo, semilla, vectorizado):
+    # Los robots que se cierran el paso camino al cargador no deben trabarse para siempre
+    modelo = correr_modelo(Habitacion(30, 30, num_agentes = 5, modo_bateria = 'Predictivo',
+                                      modo_vectorizado = vectorizado, seed = semilla))
+    assert modelo.salon_limpio()
+    assert modelo.robots_varados == 0
+
+
+def test_el_umbral_predictivo_depende_de_la_distancia_al_cargador():
+    modelo = Habitacion(20, 20, porc_muebles = 0.0, modo_bateria = 'Predictivo', margen_bateria = 5, seed = 1)
+    x, y = modelo.pos_cargadores[0]
+    # Junto al cargador basta con el margen; lejos de todos se necesita el camino más el margen
+    assert modelo.necesita_cargar((x, y + 1), 6)
+    assert not modelo.necesita_cargar((x, y + 1), 7)
+    lejos = max(((i, j) for i in range(20) for j in range(20)), key = lambda pos: modelo.distancia_cargador[pos])
+    distancia = int(modelo.distancia_cargador[lejos])
+    assert modelo.necesita_cargar(lejos, distancia + 5)
+    assert not modelo.necesita_cargar(lejos, distancia + 6)
+
+
+def test_el_modo_fijo_usa_el_umbral_constante():
+    modelo = Habitacion(20, 20, seed = 1)
+    assert modelo.necesita_cargar((10, 10), UMBRAL_BATERIA)
+    assert not modelo.necesita_cargar((10, 10), UMBRAL_BATERIA + 1)
+
+
+def test_la_cola_del_cargador_se_atiende_en_orden_de_llegada():
+    modelo = Habitacion(20, 20, modo_bateria = 'Predictivo', seed = 1)
+    cargador = modelo.pos_cargadores[0]
+    distancias = [0 if pos == cargador else 10 ** 6 for pos in modelo.pos_cargadores]
+    # El primero llega ya y se carga 4 pasos; el segundo, que también llega ya, tiene que esperar su turno
+    assert modelo.asignar_cargador(1, distancias, 0) == cargador
+    assert modelo.asignar_cargador(2, distancias, 0) == cargador
+    assert modelo.espera_cargador(1, cargador, 0) == 0
+    assert modelo.espera_cargador(2, cargador, 0) == 4
+    # Al liberarse el primero, el segundo ya no espera
+    modelo.liberar_cargador(1)
+    assert modelo.espera_cargador(2, cargador, 0) == 0
@@ -0,0 +1,10 @@
+from bot_cleaners.bench import formatear, generar_configuraciones, medir_configuracion
+
+
+def test_sin_pasos_medidos_las_latencias_quedan_en_null():
+    configuracion, = generar_configuraciones([(5, 5)], [1], [0.3], [0.1], 1, 0, False, pasos_memoria = 1,
+                                             pasos_limpieza = 1)
+    resultado = medir_configuracion(configuracion)
+    assert resultado["step_p50_ms"] is None and resultado["step_p99_ms"] is None
+    assert formatear(resultado["step_p50_ms"]) == "n/a"
+    assert formatear(1.23456) == "1.235"
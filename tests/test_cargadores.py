@@ -0,0 +1,20 @@
+import pytest
+
+from bot_cleaners.model import Habitacion
+
+
+def test_la_ubicacion_automatica_pone_los_cargadores_pedidos():
+    modelo = Habitacion(30, 30, modo_cargadores = 'Automatica', num_cargadores = 3, seed = 1)
+    assert len(set(modelo.pos_cargadores)) == 3
+
+
+@pytest.mark.parametrize("modo", ["Automatica", "Fija"])
+def test_sin_cargadores_falla_claro(modo):
+    # En 10x10 el arreglo fijo no cabe y también se ubican `num_cargadores` cargadores
+    with pytest.raises(ValueError, match = "num_cargadores"):
+        Habitacion(10, 10, modo_cargadores = modo, num_cargadores = 0)
+
+
+def test_una_lista_de_cargadores_vacia_falla_claro():
+    with pytest.raises(ValueError, match = "pos_cargadores"):
+        Habitacion(10, 10, pos_cargadores = [])
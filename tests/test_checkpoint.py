@@ -0,0 +1,73 @@
+import gzip
+import pickle
+
+import pytest
+
+from bot_cleaners.checkpoint import bifurcar, cargar_checkpoint, guardar_checkpoint
+from bot_cleaners.model import Habitacion
+
+
+# ✓ Función que resume el estado completo de un modelo para compararlo bit a bit
+def huella(modelo):
+    robots = sorted((robot.unique_id, robot.pos, robot.carga, robot.objetivo, robot.sig_pos, robot.movimientos,
+                     robot.celdas_sucias) for robot in modelo.schedule.agents)
+    return (robots, modelo.tiempo, modelo.movimientos, modelo.cantidad_recargas, modelo.capa_suciedad.tobytes(),
+            modelo.random.getstate(), modelo.datacollector.model_vars["CeldasSucias"].tobytes())
+
+
+@pytest.mark.parametrize("parametros", [
+    dict(),
+    dict(estrategia = 'Frontera', modo_asignacion = 'Subasta'),
+    dict(modo_vectorizado = True, modo_bateria = 'Predictivo'),
+    dict(estrategia = 'Boustrophedon', modo_cargadores = 'Automatica', num_cargadores = 6, modo_suciedad = 'Poisson'),
+])
+def test_la_corrida_restaurada_es_identica(tmp_path, parametros):
+    modelo = Habitacion(40, 40, num_agentes = 8, porc_celdas_sucias = 0.4, modo_pos_inicial = 'Aleatoria', seed = 5,
+                        ruta_eventos = str(tmp_path / "eventos.bin"), **parametros)
+    for _ in range(60):
+        modelo.step()
+    guardar_checkpoint(modelo, tmp_path / "paso_60.ckpt")
+    for _ in range(150):
+        modelo.step()
+    esperado = huella(modelo)
+    modelo.finalizar()
+    eventos_esperados = (tmp_path / "eventos.bin").read_bytes()
+
+    # Al restaurar, el registro de eventos descarta lo escrito después del checkpoint y se vuelve a escribir igual
+    restaurado = cargar_checkpoint(tmp_path / "paso_60.ckpt")
+    for _ in range(150):
+        restaurado.step()
+    assert huella(restaurado) == esperado
+    restaurado.finalizar()
+    assert (tmp_path / "eventos.bin").read_bytes() == eventos_esperados
+
+
+def test_las_copias_sin_semilla_siguen_igual_que_el_origen(tmp_path):
+    modelo = Habitacion(30, 30, seed = 2)
+    for _ in range(40):
+        modelo.step()
+    guardar_checkpoint(modelo, tmp_path / "origen.ckpt")
+    copias = bifurcar(tmp_path / "origen.ckpt", 2)
+    for copia in [modelo] + copias:
+        for _ in range(100):
+            copia.step()
+    assert huella(copias[0]) == huella(copias[1]) == huella(modelo)
+
+
+def test_las_copias_con_otra_semilla_se_separan(tmp_path):
+    modelo = Habitacion(30, 30, seed = 2)
+    for _ in range(40):
+        modelo.step()
+    copias = bifurcar(modelo, 2, semillas = [1, 2])
+    for copia in copias:
+        for _ in range(100):
+            copia.step()
+    assert huella(copias[0]) != huella(copias[1])
+
+
+def test_una_version_distinta_no_se_carga(tmp_path):
+    ruta = tmp_path / "viejo.ckpt"
+    with gzip.open(ruta, "wb") as archivo:
+        pickle.dump({"version": 0, "modelo": None}, archivo)
+    with pytest.raises(ValueError):
+        cargar_checkpoint(ruta)
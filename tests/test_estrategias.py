@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from bot_cleaners.estrategias import ESTRATEGIAS, EstrategiaAleatoria
+from bot_cleaners.model import Habitacion
+
+
+# ✓ Función que arma una habitación de 12x12 con una celda sucia encerrada por muebles en la franja del primer robot
+def habitacion_con_celda_encerrada(estrategia):
+    muebles = np.zeros((12, 12), dtype = np.uint8)
+    muebles[0:3, 4] = 1
+    muebles[3, 0:5] = 1
+    suciedad = np.zeros((12, 12), dtype = np.uint8)
+    suciedad[1, 1] = 1
+    suciedad[2, 8] = 1
+    plano = {"muebles": muebles, "suciedad": suciedad, "robots": [(6, 6), (10, 2)]}
+    return Habitacion(12, 12, num_agentes = 2, estrategia = estrategia, plano = plano, pos_cargadores = [(11, 11)],
+                      seed = 1)
+
+
+def test_boustrophedon_salta_las_celdas_inalcanzables():
+    modelo = habitacion_con_celda_encerrada('Boustrophedon')
+    robot = min(modelo.schedule.agents, key = lambda robot: robot.unique_id)
+    assert modelo.estrategia.buscar_destino(robot) == (2, 8)
+    # El cursor ya no vuelve a la celda encerrada
+    modelo.capa_suciedad[2, 8] = 0
+    assert modelo.estrategia.buscar_destino(robot) != (1, 1)
+
+
+@pytest.mark.parametrize("estrategia", ["Frontera", "Boustrophedon"])
+def test_las_estrategias_limpian_lo_alcanzable(correr_modelo, estrategia):
+    modelo = correr_modelo(habitacion_con_celda_encerrada(estrategia), max_pasos = 300)
+    assert modelo.pos_celdas_sucias == {(1, 1)}
+
+
+def test_las_estrategias_comparten_la_base_aleatoria():
+    assert all(issubclass(estrategia, EstrategiaAleatoria) for estrategia in ESTRATEGIAS.values())
+    modelo = Habitacion(12, 12, num_agentes = 1, porc_muebles = 0.0, seed = 1)
+    robot = modelo.schedule.agents[0]
+    disponibles = [(robot.pos[0], robot.pos[1] + 1)]
+    assert modelo.estrategia.siguiente_pos(robot, disponibles) == disponibles[0]
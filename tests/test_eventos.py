@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from bot_cleaners.eventos import (AYUDA, CARGA, DTYPE_EVENTO, ENCABEZADO, LIMPIEZA, MOVIMIENTO, LectorEventos,
+                                  RegistroEventos)
+from bot_cleaners.model import Habitacion
+
+
+def test_el_formato_es_de_registros_fijos_tras_el_encabezado(tmp_path):
+    ruta = tmp_path / "eventos.bin"
+    with RegistroEventos(str(ruta), tamano_buffer = 4) as registro:
+        registro.registrar(0, LIMPIEZA, 7, (1, 2))
+        registro.registrar_bloque(1, MOVIMIENTO, np.array([7, 8]), np.array([3, 4]), np.array([5, 6]), np.array([99, 98]))
+        # Un bloque mayor que el búfer se escribe directo, después de lo pendiente
+        registro.registrar_bloque(2, CARGA, np.arange(6), np.zeros(6), np.zeros(6), 25)
+        registro.registrar(3, AYUDA, 8, (9, 9), 5)
+
+    datos = ruta.read_bytes()
+    assert DTYPE_EVENTO.itemsize == 17
+    assert datos[:len(ENCABEZADO)] == ENCABEZADO
+    eventos = np.frombuffer(datos[len(ENCABEZADO):], dtype = DTYPE_EVENTO)
+    assert eventos["paso"].tolist() == [0, 1, 1] + [2] * 6 + [3]
+    assert eventos["tipo"].tolist() == [LIMPIEZA, MOVIMIENTO, MOVIMIENTO] + [CARGA] * 6 + [AYUDA]
+    assert eventos[1].tolist() == (1, MOVIMIENTO, 7, 3, 5, 99)
+    assert eventos[-1].tolist() == (3, AYUDA, 8, 9, 9, 5)
+
+
+def test_un_archivo_ajeno_no_se_lee(tmp_path):
+    ruta = tmp_path / "otro.bin"
+    ruta.write_bytes(b"NO-ES-UN-REGISTRO")
+    with pytest.raises(ValueError):
+        LectorEventos(str(ruta))
+
+
+@pytest.mark.parametrize("vectorizado", [False, True])
+def test_el_registro_cuenta_lo_que_paso_en_la_corrida(tmp_path, correr_modelo, vectorizado):
+    ruta = str(tmp_path / "eventos.bin")
+    modelo = Habitacion(20, 20, num_agentes = 4, modo_vectorizado = vectorizado, ruta_eventos = ruta, seed = 1)
+    sucias_iniciales = modelo.num_celdas_sucias
+    correr_modelo(modelo, max_pasos = 300)
+    modelo.finalizar()
+
+    lector = LectorEventos(ruta)
+    assert np.all(np.diff(lector.eventos["paso"].astype(np.int64)) >= 0)
+    assert len(lector.rango(0, modelo.tiempo + 1, MOVIMIENTO)) == modelo.movimientos
+    assert len(lector.rango(0, modelo.tiempo + 1, LIMPIEZA)) == sucias_iniciales - modelo.num_celdas_sucias
+
+    # Reproducir un rango entrega cada paso una sola vez, en orden, con los mismos eventos que `rango`
+    pasos = [(paso, len(bloque)) for paso, bloque in lector.reproducir(10, 20)]
+    assert [paso for paso, _ in pasos] == sorted({paso for paso, _ in pasos})
+    assert all(10 <= paso < 20 for paso, _ in pasos)
+    assert sum(cantidad for _, cantidad in pasos) == len(lector.rango(10, 20))
@@ -0,0 +1,32 @@
+import pytest
+
+from bot_cleaners.fragmentos import HabitacionFragmentada
+
+
+# ✓ Función que corre una habitación fragmentada y devuelve (pasos, movimientos, celdas sucias) revisando el piso
+def correr_fragmentada(pasos: int, **parametros):
+    fragmentada = HabitacionFragmentada(60, 30, num_fragmentos = 2, num_agentes = 6, porc_celdas_sucias = 0.3, **parametros)
+    with fragmentada as modelo:
+        ids = sorted(robot[0] for robot in modelo.get_robots())
+        while modelo.running and modelo.tiempo < pasos:
+            modelo.step()
+            if modelo.tiempo % 50 == 0:
+                # El conteo del coordinador coincide con el piso de los fragmentos y ningún robot se pierde al cruzar
+                assert int(modelo.obtener_capa_suciedad().sum()) == modelo.num_celdas_sucias
+                assert sorted(robot[0] for robot in modelo.get_robots()) == ids
+        return modelo.tiempo, modelo.movimientos, modelo.num_celdas_sucias
+
+
+def test_los_fragmentos_conservan_robots_y_suciedad():
+    tiempo, movimientos, sucias = correr_fragmentada(300, seed = 3)
+    assert movimientos > 0
+    assert sucias < int(60 * 30 * 0.3)
+
+
+def test_la_corrida_fragmentada_es_reproducible():
+    assert correr_fragmentada(150, seed = 1) == correr_fragmentada(150, seed = 1)
+
+
+def test_una_habitacion_muy_angosta_no_se_fragmenta():
+    with pytest.raises(ValueError):
+        HabitacionFragmentada(3, 30, num_fragmentos = 2)
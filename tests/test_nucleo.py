@@ -0,0 +1,53 @@
+import importlib.util
+import sys
+import types
+
+import pytest
+
+import bot_cleaners.model as modelo_nucleo
+
+mesa = pytest.importorskip("mesa")
+
+
+# ✓ Función que carga una copia de model.py cuyas clases base son las de Mesa en lugar de las de nucleo.py
+def modelo_con_mesa(monkeypatch):
+    from mesa.space import MultiGrid
+    from mesa.time import RandomActivation
+
+    nucleo_mesa = types.ModuleType("bot_cleaners.nucleo")
+    nucleo_mesa.Model, nucleo_mesa.Agent = mesa.Model, mesa.Agent
+    nucleo_mesa.MultiGrid, nucleo_mesa.RandomActivation = MultiGrid, RandomActivation
+    monkeypatch.setitem(sys.modules, "bot_cleaners.nucleo", nucleo_mesa)
+    spec = importlib.util.spec_from_file_location("bot_cleaners.model_mesa", modelo_nucleo.__file__)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    assert issubclass(modulo.Habitacion, mesa.Model) and issubclass(modulo.RobotLimpieza, mesa.Agent)
+    return modulo
+
+
+# ✓ Función que resume el estado de un paso: robots, contadores, piso y generador aleatorio
+def estado(modelo):
+    robots = [(robot.unique_id, robot.pos, robot.carga, robot.objetivo) for robot in modelo.schedule.agents]
+    ocupadas = sorted((pos, sorted(agente.unique_id for agente in modelo.grid.get_cell_list_contents([pos])))
+                      for pos in {robot.pos for robot in modelo.schedule.agents} | set(modelo.pos_cargadores))
+    return (robots, ocupadas, modelo.tiempo, modelo.movimientos, modelo.cantidad_recargas, modelo.running,
+            modelo.capa_suciedad.tobytes(), modelo.random.getstate())
+
+
+@pytest.mark.parametrize("parametros", [
+    dict(),
+    dict(modo_pos_inicial = 'Aleatoria', estrategia = 'Frontera', modo_asignacion = 'Subasta'),
+    dict(modo_cargadores = 'Automatica', num_cargadores = 6, modo_bateria = 'Predictivo', modo_suciedad = 'Poisson'),
+    dict(modo_vectorizado = True, estrategia = 'Boustrophedon'),
+])
+def test_la_trayectoria_es_la_misma_que_con_mesa(monkeypatch, parametros):
+    modulo_mesa = modelo_con_mesa(monkeypatch)
+    nucleo = modelo_nucleo.Habitacion(30, 30, num_agentes = 6, seed = 7, **parametros)
+    con_mesa = modulo_mesa.Habitacion(30, 30, num_agentes = 6, seed = 7, **parametros)
+    assert estado(nucleo) == estado(con_mesa)
+    for _ in range(300):
+        nucleo.step()
+        con_mesa.step()
+        assert estado(nucleo) == estado(con_mesa)
+        if not nucleo.running:
+            break
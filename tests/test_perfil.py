@@ -0,0 +1,71 @@
+import csv
+import json
+
+import pytest
+
+from bot_cleaners.checkpoint import cargar_checkpoint, guardar_checkpoint
+from bot_cleaners.model import Habitacion
+from bot_cleaners.perfil import FASES, REGLAS
+
+
+# ✓ Función que lee las filas de un perfil en cualquiera de sus formatos
+def leer_filas(ruta):
+    if ruta.suffix == ".csv":
+        with open(ruta, newline = "") as archivo:
+            return [{clave: float(valor) for clave, valor in fila.items()} for fila in csv.DictReader(archivo)]
+    if ruta.suffix == ".jsonl":
+        return [json.loads(linea) for linea in ruta.read_text().splitlines()]
+    return json.loads(ruta.read_text())["pasos"]
+
+
+@pytest.mark.parametrize("extension", [".csv", ".json", ".jsonl"])
+def test_una_fila_por_paso_en_cada_formato(tmp_path, correr_modelo, extension):
+    ruta = tmp_path / f"perfil{extension}"
+    modelo = correr_modelo(Habitacion(8, 8, num_agentes = 2, ruta_perfil = str(ruta), seed = 1))
+    modelo.finalizar()
+    assert not modelo.running
+
+    # La verificación que detecta el salón limpio no agrega otro paso
+    filas = leer_filas(ruta)
+    assert modelo.perfil.num_pasos == modelo.tiempo
+    assert [int(fila["paso"]) for fila in filas] == list(range(1, modelo.tiempo + 1))
+    assert set(filas[0]) == {"paso"} | {f"{fase}_ms" for fase in FASES} | set(REGLAS.values())
+    assert modelo.perfil.fases["recoleccion"].llamadas == modelo.tiempo + 1
+    if extension == ".json":
+        assert json.loads(ruta.read_text())["resumen"]["pasos"] == modelo.tiempo
+
+
+@pytest.mark.parametrize("vectorizado", [False, True])
+def test_las_reglas_se_cuentan_por_robot_y_paso(tmp_path, vectorizado):
+    ruta = tmp_path / "perfil.jsonl"
+    modelo = Habitacion(20, 20, num_agentes = 4, modo_vectorizado = vectorizado, ruta_perfil = str(ruta), seed = 2)
+    for _ in range(40):
+        modelo.step()
+    modelo.finalizar()
+
+    filas = leer_filas(ruta)
+    reglas = modelo.perfil.resumen()["reglas"]
+    for regla in REGLAS.values():
+        assert sum(fila[regla] for fila in filas) == reglas.get(regla, {"llamadas": 0})["llamadas"]
+    # Sin robots varados, cada robot aplica exactamente una regla en cada paso
+    assert all(sum(fila[regla] for regla in REGLAS.values()) == 4 for fila in filas)
+
+
+def test_reanudar_descarta_las_filas_posteriores_al_checkpoint(tmp_path):
+    ruta = tmp_path / "perfil.csv"
+    modelo = Habitacion(20, 20, num_agentes = 4, ruta_perfil = str(ruta), seed = 3)
+    for _ in range(20):
+        modelo.step()
+    guardar_checkpoint(modelo, tmp_path / "paso_20.ckpt")
+    for _ in range(30):
+        modelo.step()
+    modelo.finalizar()
+    reglas_esperadas = [[fila[regla] for regla in REGLAS.values()] for fila in leer_filas(ruta)]
+
+    restaurado = cargar_checkpoint(tmp_path / "paso_20.ckpt")
+    for _ in range(10):
+        restaurado.step()
+    restaurado.finalizar()
+    filas = leer_filas(ruta)
+    assert [int(fila["paso"]) for fila in filas] == list(range(1, 31))
+    assert [[fila[regla] for regla in REGLAS.values()] for fila in filas] == reglas_esperadas[:30]
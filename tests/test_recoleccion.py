@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from bot_cleaners.model import Habitacion, get_sucias
+from bot_cleaners.recoleccion import HistorialGrid, RecolectorDatos
+
+
+# ✓ Función que genera fotografías de la grid en las que cambian unas cuantas celdas de una a la siguiente
+def fotografias(cantidad, forma = (12, 9), semilla = 1):
+    rng = np.random.default_rng(semilla)
+    grid = rng.integers(0, 3, size = forma).astype(float)
+    resultado = [grid.copy()]
+    for _ in range(cantidad - 1):
+        celdas = rng.integers(0, grid.size, size = 5)
+        grid.ravel()[celdas] = rng.integers(0, 3, size = 5)
+        resultado.append(grid.copy())
+    return resultado
+
+
+def test_las_fotografias_antiguas_se_reconstruyen_desde_la_base():
+    historial = HistorialGrid(capacidad = 10)
+    originales = fotografias(7)
+    for paso, grid in enumerate(originales):
+        historial.agregar(paso, grid)
+
+    assert len(historial) == 7
+    assert historial.pasos() == list(range(7))
+    for indice, grid in enumerate(originales):
+        assert np.array_equal(historial[indice], grid)
+        assert np.array_equal(historial[indice - 7], grid)
+    # Reconstruir no modifica lo que se guarda
+    historial[3][0, 0] = 99
+    assert np.array_equal(historial[3], originales[3])
+
+
+def test_al_llenarse_la_base_avanza_y_lo_antiguo_se_descarta():
+    historial = HistorialGrid(capacidad = 4)
+    originales = fotografias(10)
+    for paso, grid in enumerate(originales):
+        historial.agregar(10 * paso, grid)
+
+    assert len(historial) == 4
+    assert historial.pasos() == [60, 70, 80, 90]
+    assert historial.paso_base == 60
+    for indice, grid in enumerate(originales[6:]):
+        assert np.array_equal(historial[indice], grid)
+    for indice in (4, -5):
+        with pytest.raises(IndexError):
+            historial[indice]
+
+
+def test_cada_reportero_se_muestrea_con_su_intervalo():
+    recolector = RecolectorDatos({"A": lambda modelo: modelo, "B": lambda modelo: 2 * modelo}, intervalos = {"B": 3},
+                                 capacidad_inicial = 2)
+    for valor in range(10):
+        recolector.collect(valor)
+    assert recolector.get_pasos("A").tolist() == list(range(10))
+    assert recolector.get_pasos("B").tolist() == [0, 3, 6, 9]
+    assert recolector.model_vars["B"].tolist() == [0, 6, 12, 18]
+
+
+def test_el_dataframe_coincide_con_el_datacollector_de_mesa():
+    mesa = pytest.importorskip("mesa")
+    pd = pytest.importorskip("pandas")
+
+    modelo = Habitacion(20, 20, num_agentes = 4, seed = 3)
+    reporteros = {"CeldasSucias": get_sucias, "Tiempo": "tiempo", "Movimientos": "movimientos",
+                  "Recargas": "cantidad_recargas"}
+    referencia = mesa.DataCollector(model_reporters = reporteros)
+    while modelo.running and modelo.tiempo < 200:
+        # El modelo recolecta al inicio de su paso: la referencia se muestrea sobre el mismo estado
+        referencia.collect(modelo)
+        modelo.step()
+
+    esperado = referencia.get_model_vars_dataframe()
+    obtenido = modelo.datacollector.get_model_vars_dataframe()
+    assert obtenido.index.tolist() == list(range(len(esperado)))
+    pd.testing.assert_frame_equal(obtenido.reset_index(drop = True), esperado, check_dtype = False)
+    # La grid se guarda en su historial, no como columna del DataFrame
+    assert "Grid" not in obtenido
@@ -0,0 +1,83 @@
+import base64
+import struct
+import zlib
+
+import numpy as np
+
+from bot_cleaners.model import Habitacion
+from bot_cleaners.server import CLIENTE_ACTUAL, PALETA_PISO, RasterHabitacion, codificar_png
+
+
+# ✓ Función que lee un PNG con paleta (data URI) y devuelve sus índices y sus colores
+def leer_png(uri):
+    png = base64.b64decode(uri.split(",", 1)[1])
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    bloques, i = dict(), 8
+    while i < len(png):
+        largo, = struct.unpack(">I", png[i:i + 4])
+        tipo, datos = png[i + 4:i + 8], png[i + 8:i + 8 + largo]
+        assert struct.unpack(">I", png[i + 8 + largo:i + 12 + largo])[0] == zlib.crc32(tipo + datos)
+        bloques[tipo] = datos
+        i += 12 + largo
+    ancho, alto, profundidad, color = struct.unpack(">IIBB", bloques[b"IHDR"][:10])
+    assert (profundidad, color) == (8, 3)
+    filas = np.frombuffer(zlib.decompress(bloques[b"IDAT"]), dtype = np.uint8).reshape(alto, ancho + 1)
+    assert not filas[:, 0].any()
+    paleta = ["#" + bloques[b"PLTE"][j:j + 3].hex() for j in range(0, len(bloques[b"PLTE"]), 3)]
+    return filas[:, 1:], paleta
+
+
+def test_el_png_conserva_los_indices_y_la_paleta():
+    indices = np.random.default_rng(1).integers(0, 3, size = (7, 11), dtype = np.uint8)
+    leidos, paleta = leer_png(codificar_png(indices, PALETA_PISO))
+    assert np.array_equal(leidos, indices)
+    assert paleta == PALETA_PISO
+
+
+# ✓ Función que aplica un cuadro del mapa de calor sobre el piso que tiene el navegador
+def aplicar(piso, cuadro):
+    datos = cuadro["piso"]
+    if datos["tipo"] == "png":
+        return leer_png(datos["datos"])[0][::-1].T.copy()
+    piso[datos["x"], datos["y"]] = datos["v"]
+    return piso
+
+
+def test_los_cambios_van_sobre_el_ultimo_cuadro_completo():
+    raster = RasterHabitacion(fps_max = 0, max_cambios = 1.0)
+    modelo = Habitacion(20, 20, num_agentes = 3, intervalos_recoleccion = {"Grid": 0}, seed = 1)
+    cuadro = raster.render(modelo)
+    assert cuadro["piso"]["tipo"] == "png"
+    piso = aplicar(None, cuadro)
+    for _ in range(5):
+        modelo.step()
+        cuadro = raster.render(modelo)
+        assert cuadro["piso"]["tipo"] == "cambios"
+        piso = aplicar(piso, cuadro)
+        assert np.array_equal(piso, raster.indices_piso(modelo))
+
+    # Un reinicio cambia el modelo: se manda otra vez el PNG completo
+    assert raster.render(Habitacion(20, 20, intervalos_recoleccion = {"Grid": 0}, seed = 2))["piso"]["tipo"] == "png"
+
+
+def test_cada_conexion_recibe_su_propio_cuadro_completo():
+    raster = RasterHabitacion(fps_max = 0, max_cambios = 1.0)
+    modelo = Habitacion(20, 20, intervalos_recoleccion = {"Grid": 0}, seed = 1)
+
+    class Pestana:
+        pass
+
+    primera, segunda = Pestana(), Pestana()
+    # ✓ Función que dibuja el cuadro como si lo pidiera la pestaña indicada
+    def render(pestana):
+        marca = CLIENTE_ACTUAL.set(pestana)
+        try:
+            return raster.render(modelo)
+        finally:
+            CLIENTE_ACTUAL.reset(marca)
+
+    assert render(primera)["piso"]["tipo"] == "png"
+    modelo.step()
+    # La segunda pestaña no recibió el cuadro base de la primera: empieza con el PNG
+    assert render(segunda)["piso"]["tipo"] == "png"
+    assert render(primera)["piso"]["tipo"] == "cambios"
@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+
+import pytest
+
+from bot_cleaners.servicio import Corrida, ServicioSimulaciones, servir
+
+
+# ✓ Función que crea un servicio con su cola, sin arrancar el pool de procesos
+def servicio_sin_pool(**opciones):
+    servicio = ServicioSimulaciones(trabajadores = 1, **opciones)
+    servicio.cola = asyncio.Queue(maxsize = servicio.max_en_cola)
+    return servicio
+
+
+def test_se_aceptan_los_modos_de_bateria_asignacion_y_suciedad():
+    servicio = servicio_sin_pool()
+    parametros = {"M": 20, "N": 20, "modo_bateria": "Predictivo", "margen_bateria": 5, "modo_asignacion": "Subasta",
+                  "modo_suciedad": "Poisson", "tasa_suciedad": 0.01, "calentamiento": 10}
+    assert servicio.enviar(parametros).estado == "en_cola"
+    with pytest.raises(ValueError, match = "ruta_eventos"):
+        servicio.enviar({"M": 20, "N": 20, "ruta_eventos": "/tmp/x.bin"})
+
+
+@pytest.mark.parametrize("num_agentes", [0, 11, "3"])
+def test_el_numero_de_agentes_esta_acotado(num_agentes):
+    servicio = servicio_sin_pool(max_agentes = 10)
+    with pytest.raises(ValueError, match = "num_agentes"):
+        servicio.enviar({"M": 20, "N": 20, "num_agentes": num_agentes})
+    assert not servicio.corridas
+
+
+def test_las_metricas_guardadas_estan_acotadas():
+    corrida = Corrida(1, {}, 1000, max_metricas = 5)
+    corrida.agregar_metricas([{"paso": paso} for paso in range(1, 9)])
+    corrida.agregar_metricas([{"paso": 9}])
+    assert [fila["paso"] for fila in corrida.metricas] == [5, 6, 7, 8, 9]
+    assert corrida.total_metricas() == corrida.como_dict()["pasos"] == 9
+    # Un cliente atrasado recibe solo lo que sigue guardado; uno al día, solo lo nuevo
+    assert [fila["paso"] for fila in corrida.metricas_desde(2)] == [5, 6, 7, 8, 9]
+    assert [fila["paso"] for fila in corrida.metricas_desde(7)] == [8, 9]
+    assert corrida.metricas_desde(9) == []
+
+
+@pytest.mark.parametrize("parametros", [
+    {"num_cargadores": 0},
+    {"num_cargadores": 9},
+    {"pos_cargadores": [[1, 2]] * 9},
+    {"pos_cargadores": 3},
+])
+def test_el_numero_de_cargadores_esta_acotado(parametros):
+    servicio = servicio_sin_pool(max_cargadores = 8)
+    with pytest.raises(ValueError, match = "cargadores"):
+        servicio.enviar({"M": 20, "N": 20, **parametros})
+    assert servicio.enviar({"M": 20, "N": 20, "num_cargadores": 8}).estado == "en_cola"
+
+
+def test_el_servicio_escucha_solo_en_la_maquina_local():
+    assert inspect.signature(servir).parameters["host"].default == "127.0.0.1"
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from bot_cleaners.model import Habitacion
+from bot_cleaners.suciedad import PROCESOS_SUCIEDAD, SuciedadPoisson
+
+
+def test_un_modo_de_suciedad_desconocido_falla_claro():
+    with pytest.raises(ValueError, match = "Lluvia"):
+        Habitacion(10, 10, modo_suciedad = 'Lluvia')
+
+
+def test_los_procesos_comparten_la_base_y_reciben_sus_opciones():
+    assert all(issubclass(proceso, SuciedadPoisson) for proceso in PROCESOS_SUCIEDAD.values())
+    modelo = Habitacion(30, 30, modo_suciedad = 'Focos', num_focos = 2, seed = 1)
+    assert modelo.proceso_suciedad.focos_x.size == 2
+    llegadas = modelo.proceso_suciedad.generar()
+    assert np.all((llegadas >= 0) & (llegadas < 30 * 30))
+
+
+@pytest.mark.parametrize("modo", ["Poisson", "Focos"])
+def test_la_suciedad_sigue_llegando(modo):
+    modelo = Habitacion(30, 30, porc_celdas_sucias = 0.0, modo_suciedad = modo, tasa_suciedad = 0.01, seed = 1)
+    for _ in range(20):
+        modelo.step()
+    assert modelo.running
+    assert modelo.num_celdas_sucias == int(modelo.capa_suciedad.sum()) > 0
+
+
+def test_el_calentamiento_no_cuenta():
+    modelo = Habitacion(20, 20, modo_suciedad = 'Poisson', calentamiento = 30, seed = 1)
+    for _ in range(100):
+        modelo.step()
+    assert modelo.metricas.resumen()["pasos"] == 70
+
+
+def test_la_latencia_se_cuenta_desde_el_paso_de_la_solicitud():
+    modelo = Habitacion(10, 10, porc_celdas_sucias = 0.0, medir_metricas = True, seed = 1)
+    metricas = modelo.metricas
+    modelo.capa_suciedad[3, 3] = 1
+    # Solicitud durante el paso 5 (el modelo aumenta su tiempo antes de cerrar el paso)
+    modelo.tiempo = 5
+    metricas.registrar_solicitud((3, 3))
+    modelo.tiempo = 6
+    metricas.registrar_paso()
+    # La celda se limpia durante el paso 7
+    modelo.capa_suciedad[3, 3] = 0
+    modelo.tiempo = 8
+    metricas.registrar_paso()
+    assert list(metricas.latencias) == [2]
+
+
+def test_sin_celdas_libres_la_fraccion_sucia_es_cero():
+    modelo = Habitacion(10, 10, medir_metricas = True, seed = 1)
+    # Todas las celdas ocupadas por muebles o cargadores
+    modelo.metricas.celdas_libres = 0
+    modelo.step()
+    assert modelo.metricas.resumen()["fraccion_sucia_media"] == 0.0
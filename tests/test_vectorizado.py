@@ -0,0 +1,28 @@
+import pytest
+
+from bot_cleaners.model import Habitacion
+
+
+@pytest.mark.parametrize("semilla", [1, 4, 6])
+@pytest.mark.parametrize("vectorizado", [False, True])
+def test_la_flota_termina_de_limpiar(correr_modelo, semilla, vectorizado):
+    # Un robot varado no debe bloquear para siempre la celda que otro quiere ocupar
+    modelo = correr_modelo(Habitacion(30, 30, num_agentes = 5, modo_vectorizado = vectorizado, seed = semilla))
+    assert modelo.salon_limpio()
+    assert modelo.num_celdas_sucias == 0
+
+
+def test_el_paso_vectorizado_es_reproducible(correr_modelo):
+    uno = correr_modelo(Habitacion(20, 20, modo_vectorizado = True, seed = 3))
+    otro = correr_modelo(Habitacion(20, 20, modo_vectorizado = True, seed = 3))
+    assert (uno.tiempo, uno.movimientos, uno.cantidad_recargas) == (otro.tiempo, otro.movimientos, otro.cantidad_recargas)
+
+
+def test_el_paso_vectorizado_mantiene_el_mapa_de_ocupacion(correr_modelo):
+    modelo = Habitacion(25, 25, num_agentes = 8, modo_vectorizado = True, seed = 2)
+    for _ in range(200):
+        modelo.step()
+    ocupacion = [0] * (25 * 25)
+    for robot in modelo.schedule.agents:
+        ocupacion[robot.pos[0] * 25 + robot.pos[1]] += 1
+    assert list(modelo.ocupacion_robots) == ocupacion